@@ -1,8 +1,19 @@
 import aiohttp
 import asyncio
-from aiocache import cached
+import json
+import os
+import time
+from urllib.parse import urlparse
+from utils import jsonCodec
+from utils.asyncOperations import SingleFlight
+from utils.cacheOperations import TwoTierCache
+from utils.circuitBreaker import CircuitOpenError, HostPolicy
+from utils.jsonStream import decodeProjected
+from utils.rateLimiter import RateLimitError
+from dotenv import load_dotenv
+load_dotenv()
 
-'''   
+'''
 API LINKS:
 https://corona-api.com/countries
 https://newsapi.org/
@@ -25,43 +36,869 @@ class APIHandler:
     headers: dict
         a dictionary of strings that lets you pass on specific arguments into the HTTP header (empty by default)
 
+    session : aiohttp.ClientSession
+        a long-lived session shared by every handler so connections (and DNS lookups) are reused between requests
+
+    cache : TwoTierCache
+        a bounded memory LRU in front of a SQLite file, shared by every handler and kept between restarts
+
+    cacheTTLs : dict
+        how long (in seconds) responses are cached for, by the endpoint they came from
+
+    rateLimiter : RateLimiter
+        paces the requests that actually reach the API (None by default, which means requests aren't limited)
+
+    streamedEndpoints : dict
+        the endpoints whose responses are decoded a piece at a time, mapped to the array that is cut down and the fields kept from each of its items (empty by default)
+
+    bandwidthStats : dict
+        the number of requests, bytes downloaded, 304 (Not Modified) responses, and bytes saved by them, by endpoint
+
+    maxStaleness : dict
+        how long (in seconds) an expired response can still be served while it is refreshed in the background, by endpoint (empty by default, which means callers always wait for a fresh response)
+
+    diskOnlyEndpoints : tuple
+        the endpoints whose responses are only cached on disk, because the subclass keeps its own (smaller) form of them in memory (empty by default)
+
+    hostPolicies : dict
+        the timeouts, retries, and circuit breaker of each host (hosts that aren't listed get the default policy)
+
     Methods
     -------
-    getAPI()
+    startSession()
+        Opens the shared, pooled session used by every handler (called when the bot starts).
+
+    closeSession()
+        Closes the shared session and its connection pool (called when the bot shuts down).
+
+    getSession()
+        Returns the shared session, opening it first if it hasn't been started yet.
+
+    getRequestKey(baseURL, payload = {}, headers = {})
+        Returns a key that identifies a request, leaving out any secret headers.
+
+    getCoalesceStats()
+        Returns how many requests were sent upstream and how many were coalesced into an identical in-flight request.
+
+    getCacheTTL(baseURL)
+        Returns how long (in seconds) a response from a link is cached for.
+
+    getMaxStaleness(baseURL)
+        Returns how long (in seconds) an expired response from a link can still be served.
+
+    isDiskOnly(baseURL)
+        Returns True if the response of a link is only cached on disk.
+
+    getCacheExpiry(baseURL, payload = {}, headers = {})
+        Returns when the cached response of a link expires, without reading it.
+
+    getCacheStats()
+        Returns the hit/miss/eviction counts and the size of both cache tiers.
+
+    getRateLimitStats()
+        Returns how many requests the rate limiter allowed, delayed, and shed, and how much of the quota is left.
+
+    getBandwidthStats()
+        Returns how many bytes were downloaded and how many were saved by 304 (Not Modified) responses, by endpoint.
+
+    getBandwidthCounters(baseURL)
+        Returns the bandwidth counters of the endpoint a link belongs to (creating them if needed).
+
+    getStreamProjection(baseURL)
+        Returns the array and fields a response is cut down to while it is decoded, or None if it is decoded as a whole.
+
+    getHostPolicy(baseURL)
+        Returns the timeout/retry/circuit breaker policy of the host a link belongs to (creating a default one if needed).
+
+    getBreakerStats()
+        Returns the circuit breaker state and retry counters of every host.
+
+    refreshInBackground(key, baseURL, payload = {}, headers = {}, cacheKey = '')
+        Refreshes a stale response in a background task (unless it is already being fetched).
+
+    getAPI(baseURL, payload = {}, headers = {}, priority = 'interactive')
         returns a json response from a get request and caches it to avoid hitting rate-limit and overusing the API.
+
+    fetchAPI(baseURL, payload = {}, headers = {}, priority = 'interactive')
+        Sends the actual get request (uncached and uncoalesced), retrying timeouts and server errors as the host's policy allows.
+
+    sendRequest(baseURL, payload = {}, headers = {}, priority = 'interactive', timeout = None)
+        Makes a single attempt at a get request through the shared session.
+
+    fetchAndCache(baseURL, payload = {}, headers = {}, cacheKey = '', priority = 'interactive')
+        Fetches a response (revalidating the cached one if it has an ETag or Last-Modified date) and stores it in the cache if the request succeeded.
     '''
 
+    session = None # shared between every instance/subclass so all APIs go through the same connection pool
+    closed = False # set once the session is closed on shutdown, so nothing that is still running can reopen it
+
+    # connection pool settings (can be overriden in the .env file)
+    connectionLimit = int(os.getenv('API_CONNECTION_LIMIT', 100)) # max number of open connections in total
+    connectionLimitPerHost = int(os.getenv('API_CONNECTION_LIMIT_PER_HOST', 10)) # max number of open connections to a single host
+    keepAliveTimeout = float(os.getenv('API_KEEPALIVE_TIMEOUT', 30)) # how long (in seconds) an idle connection is kept open
+    dnsCacheTTL = int(os.getenv('API_DNS_CACHE_TTL', 300)) # how long (in seconds) resolved hosts are cached
+
+    singleFlight = SingleFlight() # shared so identical requests coming from any handler are coalesced together
+    secretHeaders = {'x-api-key', 'authorization'} # headers that are left out of request keys
+
+    # responses are kept in memory and on disk so a restarted bot doesn't need to refetch everything (sizes can be overriden in the .env file)
+    cache = TwoTierCache(
+        os.getenv('API_CACHE_PATH', 'cache/apiCache.sqlite3'),
+        maxMemoryBytes=int(os.getenv('API_CACHE_MEMORY_BYTES', 64 * 1024 ** 2)),
+        maxDiskBytes=int(os.getenv('API_CACHE_DISK_BYTES', 256 * 1024 ** 2))
+    )
+
+    # the first endpoint found in a link decides how long its response is cached, anything else uses defaultTTL
+    cacheTTLs = {
+        '/timeline': 3600,
+        '/countries': 3600,
+        '/v2/sources': 86400,
+        '/v2/top-headlines': 900,
+        '/v2/everything': 1800
+    }
+    defaultTTL = int(os.getenv('API_CACHE_TTL', 3600))
+
+    rateLimiter = None # subclasses for APIs with a quota set their own
+    bandwidthStats = {}
+    streamedEndpoints = {} # subclasses list the (large) endpoints they only need a few fields from
+
+    maxStaleness = {} # stale-while-revalidate is opt-in, subclasses list the endpoints they want it for
+    diskOnlyEndpoints = () # subclasses list the endpoints they convert into something smaller, so the response isn't kept in memory twice
+    refreshTasks = set() # background refreshes that are still running (a reference is kept so they aren't garbage collected)
+    refreshStats = {'refreshes': 0, 'refreshFailures': 0, 'staleOnError': 0}
+
+    # timeouts, retries, and circuit breakers are kept per host (the defaults can be overriden in the .env file)
+    hostPolicies = {}
+    defaultPolicy = {
+        'timeout': float(os.getenv('API_TIMEOUT', 10)),
+        'deadline': float(os.getenv('API_DEADLINE', 30)),
+        'retries': int(os.getenv('API_RETRIES', 2)),
+        'failureThreshold': int(os.getenv('API_BREAKER_THRESHOLD', 5)),
+        'resetTimeout': float(os.getenv('API_BREAKER_RESET', 30))
+    }
+
     def __init__(self):
         pass
 
-    @cached(ttl=3600) # cached all responses to avoid over-calling whatever API is used
-    async def getAPI(self, baseURL, payload = {}, headers = {}):
-        '''Returns a cached json response of the link (cached for 1hr)
+    @classmethod
+    async def startSession(cls):
+        '''Opens the shared, pooled session used by every handler (called when the bot starts).
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        aiohttp.ClientSession
+            the shared session
+
+        Raises
+        ------
+        ...
+        '''
+
+        # starting the session on purpose (unlike getSession) lifts a previous shutdown
+        APIHandler.closed = False
+        APIHandler.cache.closed = False
+
+        # only one session is ever opened, calling this again just returns the current one
+        if APIHandler.session is None or APIHandler.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=cls.connectionLimit,
+                limit_per_host=cls.connectionLimitPerHost,
+                keepalive_timeout=cls.keepAliveTimeout,
+                ttl_dns_cache=cls.dnsCacheTTL,
+                use_dns_cache=True
+            )
+            APIHandler.session = aiohttp.ClientSession(connector=connector)
+
+        return APIHandler.session
+
+    @classmethod
+    async def closeSession(cls):
+        '''Closes the shared session and its connection pool (called when the bot shuts down).
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        ...
+
+        Raises
+        ------
+        ...
+        '''
+
+        APIHandler.closed = True # from here on, anything still running gets an error instead of a new session
+
+        # background refreshes, ingests, and the requests being coalesced are cancelled (and waited for) before anything is closed
+        tasks = list(APIHandler.refreshTasks) + APIHandler.singleFlight.cancelAll()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if APIHandler.session is not None and not APIHandler.session.closed:
+            await APIHandler.session.close()
+            await asyncio.sleep(0.250) # gives the connector a moment to close the underlying SSL transports (see aiohttp docs on graceful shutdown)
+
+        APIHandler.session = None
+        APIHandler.cache.close()
+
+    async def getSession(self):
+        '''Returns the shared session, opening it first if it hasn't been started yet.
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        aiohttp.ClientSession
+            the shared session
+
+        Raises
+        ------
+        RuntimeError
+            if the session was closed for shutdown
+        '''
+
+        if APIHandler.closed:
+            raise RuntimeError('The session was closed, the bot is shutting down.')
+
+        if APIHandler.session is None or APIHandler.session.closed:
+            await self.startSession()
+
+        return APIHandler.session
+
+    def getRequestKey(self, baseURL, payload = {}, headers = {}):
+        '''Returns a key that identifies a request, leaving out any secret headers.
+
+        Parameters
+        ----------
+        baseURL : str
+            the link that is requested
+
+        payload : dict
+            the query parameters of the request
+
+        headers : dict
+            the HTTP headers of the request (secret ones like the API key are ignored)
+
+        Returns
+        -------
+        tuple
+            a hashable key that is the same for identical requests
+
+        Raises
+        ------
+        ...
+        '''
+
+        params = tuple(sorted((str(key), str(value)) for key, value in payload.items()))
+        publicHeaders = tuple(sorted((key.lower(), str(value)) for key, value in headers.items() if key.lower() not in self.secretHeaders))
+        return (baseURL, params, publicHeaders)
+
+    def getCoalesceStats(self):
+        '''Returns how many requests were sent upstream and how many were coalesced into an identical in-flight request.
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        dict
+            a dictionary with the leaders (sent upstream), coalesced, and inFlight counts
+
+        Raises
+        ------
+        ...
+        '''
+
+        return self.singleFlight.getStats()
+
+    def getCacheTTL(self, baseURL):
+        '''Returns how long (in seconds) a response from a link is cached for.
+
+        Parameters
+        ----------
+        baseURL : str
+            the link that is requested
+
+        Returns
+        -------
+        int
+            the number of seconds the response stays fresh
+
+        Raises
+        ------
+        ...
+        '''
+
+        for endpoint, ttl in self.cacheTTLs.items():
+            if endpoint in baseURL:
+                return ttl
+        else:
+            return self.defaultTTL
+
+    def getMaxStaleness(self, baseURL):
+        '''Returns how long (in seconds) an expired response from a link can still be served.
+
+        Parameters
+        ----------
+        baseURL : str
+            the link that is requested
+
+        Returns
+        -------
+        int
+            the number of seconds past expiry the response can be served for (0 if it can't be served once expired)
+
+        Raises
+        ------
+        ...
+        '''
+
+        for endpoint, staleness in self.maxStaleness.items():
+            if endpoint in baseURL:
+                return staleness
+        else:
+            return 0
+
+    def isDiskOnly(self, baseURL):
+        '''Returns True if the response of a link is only cached on disk (see diskOnlyEndpoints).
+
+        Parameters
+        ----------
+        baseURL : str
+            the link that is requested
+
+        Returns
+        -------
+        bool
+            True if the response isn't kept in the memory tier
+
+        Raises
+        ------
+        ...
+        '''
+
+        return any(endpoint in baseURL for endpoint in self.diskOnlyEndpoints)
+
+    def getCacheExpiry(self, baseURL, payload = {}, headers = {}):
+        '''Returns when the cached response of a link expires, without reading it (so it isn't decoded again just to check).
+
+        Parameters
+        ----------
+        baseURL : str
+            the link that is requested
+
+        payload : dict
+            the query parameters of the request
+
+        headers : dict
+            the HTTP headers of the request
+
+        Returns
+        -------
+        float/None
+            the time the response expires (in seconds since the epoch), or None if it isn't cached
+
+        Raises
+        ------
+        ...
+        '''
+
+        return self.cache.getExpiry(json.dumps(self.getRequestKey(baseURL, payload, headers)))
+
+    def getCacheStats(self):
+        '''Returns the hit/miss/eviction counts and the size of both cache tiers.
 
         Parameters
         ----------
         ...
 
+        Returns
+        -------
+        dict
+            a dictionary of counters (memoryHits, diskHits, staleHits, misses, expired, memoryEvictions, diskEvictions, refreshes, refreshFailures, staleOnError) and sizes
+
+        Raises
+        ------
+        ...
+        '''
+
+        return {**self.cache.getStats(), **self.refreshStats}
+
+    def getRateLimitStats(self):
+        '''Returns how many requests the rate limiter allowed, delayed, and shed, and how much of the quota is left.
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        dict/None
+            a dictionary of counters (allowed, delayed, shed, upstreamLimited, used, remaining, tokens), or None if there is no rate limiter
+
+        Raises
+        ------
+        ...
+        '''
+
+        if self.rateLimiter is None:
+            return None
+
+        return self.rateLimiter.getStats()
+
+    def getBandwidthStats(self):
+        '''Returns how many bytes were downloaded and how many were saved by 304 (Not Modified) responses, by endpoint.
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        dict
+            a dictionary mapping each endpoint (host and path) to its counters (requests, bytesDownloaded, notModified, bytesSaved)
+
+        Raises
+        ------
+        ...
+        '''
+
+        return {endpoint: dict(counters) for endpoint, counters in self.bandwidthStats.items()}
+
+    def getBandwidthCounters(self, baseURL):
+        '''Returns the bandwidth counters of the endpoint a link belongs to (creating them if needed).
+
+        Parameters
+        ----------
+        baseURL : str
+            the link that is requested
+
+        Returns
+        -------
+        dict
+            the counters (requests, bytesDownloaded, notModified, bytesSaved) of the endpoint
+
+        Raises
+        ------
+        ...
+        '''
+
+        link = urlparse(baseURL)
+        endpoint = f'{link.netloc}{link.path}'
+
+        if endpoint not in self.bandwidthStats:
+            self.bandwidthStats[endpoint] = {'requests': 0, 'bytesDownloaded': 0, 'notModified': 0, 'bytesSaved': 0}
+
+        return self.bandwidthStats[endpoint]
+
+    def getStreamProjection(self, baseURL):
+        '''Returns the array and fields a response is cut down to while it is decoded, or None if it is decoded as a whole.
+
+        Parameters
+        ----------
+        baseURL : str
+            the link that is requested
+
+        Returns
+        -------
+        tuple/None
+            the key of the array and the fields kept from each of its items, or None
+
+        Raises
+        ------
+        ...
+        '''
+
+        path = urlparse(baseURL).path.rstrip('/')
+        return self.streamedEndpoints.get(path)
+
+    def getHostPolicy(self, baseURL):
+        '''Returns the timeout/retry/circuit breaker policy of the host a link belongs to (creating a default one if needed).
+
+        Parameters
+        ----------
+        baseURL : str
+            the link that is requested
+
+        Returns
+        -------
+        HostPolicy
+            the policy of the host
+
+        Raises
+        ------
+        ...
+        '''
+
+        host = urlparse(baseURL).hostname
+
+        if host not in self.hostPolicies:
+            self.hostPolicies[host] = HostPolicy(**self.defaultPolicy)
+
+        return self.hostPolicies[host]
+
+    def getBreakerStats(self):
+        '''Returns the circuit breaker state and retry counters of every host.
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        dict
+            a dictionary mapping each host to its breaker state (closed, open, halfOpen) and counters
+
+        Raises
+        ------
+        ...
+        '''
+
+        return {host: {**policy.breaker.getStats(), **policy.stats} for host, policy in self.hostPolicies.items()}
+
+    async def getAPI(self, baseURL, payload = {}, headers = {}, priority = 'interactive', refresh = False):
+        '''Returns a cached json response of the link (cached for 1hr by default, see cacheTTLs)
+
+        Responses are looked up in memory, then on disk, and are only fetched if neither has a fresh copy.
+        Identical requests that are made while one is already in flight wait for that one instead of sending their own.
+        If the endpoint allows it (see maxStaleness), an expired response is returned right away and refreshed in the background.
+        If the API is down (or its circuit breaker is open), an expired response is returned instead of failing, if there is one.
+
+        Parameters
+        ----------
+        ...
+
+        priority : str
+            'interactive' (default) for requests made by users, 'background' for prefetches and syncs (which are shed first when the quota runs low)
+
+        refresh : bool
+            if True, a cached response isn't used even if it's fresh, it's revalidated (or fetched again) instead (False by default)
+
         Returns
         -------
         dict
             a json response in the form of a dictionary/list of dictionaries
 
+        Raises
+        ------
+        RateLimitError
+            if the request would go over the rate limit or the daily quota
+
+        CircuitOpenError
+            if the API has been failing and there is no cached response to fall back on
+        '''
+
+        key = self.getRequestKey(baseURL, payload, headers)
+        cacheKey = json.dumps(key) # the cache is persisted, so the key is stored as a string (always with the standard json module, so keys don't change with the codec)
+
+        staleness = self.getMaxStaleness(baseURL)
+        entry = None if refresh else self.cache.get(cacheKey, allowExpired=bool(staleness), promote=not self.isDiskOnly(baseURL))
+
+        if entry is not None:
+            # serves the stale response while a fresh one is fetched, unless it is too old (in that case the caller waits)
+            if entry.isExpired():
+                if time.time() - entry.expiresAt < staleness:
+                    self.refreshInBackground(key, baseURL, payload, headers, cacheKey)
+                    return entry.value
+            else:
+                return entry.value
+
+        return await self.singleFlight.do(key, self.fetchAndCache, baseURL, payload, headers, cacheKey, priority)
+
+    def refreshInBackground(self, key, baseURL, payload = {}, headers = {}, cacheKey = ''):
+        '''Refreshes a stale response in a background task (unless it is already being fetched).
+
+        Parameters
+        ----------
+        key : tuple
+            the request key (see getRequestKey)
+
+        baseURL : str
+            the link that is requested
+
+        payload : dict
+            the query parameters of the request
+
+        headers : dict
+            the HTTP headers of the request
+
+        cacheKey : str
+            the key the response is cached under
+
+        Returns
+        -------
+        ...
+
         Raises
         ------
         ...
         '''
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(baseURL, params = payload, headers = headers) as r:
-                if r.status == 200:
-                    data = await r.json()
-                    return data
-                else:
-                    return r.status
+        if key in self.singleFlight.inFlight:
+            return
+
+        async def refresh():
+            try:
+                data = await self.singleFlight.do(key, self.fetchAndCache, baseURL, payload, headers, cacheKey, 'background')
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                data = None
+
+            # if the refresh failed, the stale response is kept and served until it goes past its max staleness
+            if data is None or isinstance(data, int):
+                self.refreshStats['refreshFailures'] += 1
+            else:
+                self.refreshStats['refreshes'] += 1
+
+        task = asyncio.ensure_future(refresh())
+        self.refreshTasks.add(task)
+        task.add_done_callback(self.refreshTasks.discard)
+
+    async def fetchAndCache(self, baseURL, payload = {}, headers = {}, cacheKey = '', priority = 'interactive'):
+        '''Fetches a response (revalidating the cached one if it has an ETag or Last-Modified date) and stores it in the cache if the request succeeded.
+
+        If the API answers 304 (Not Modified), the cached response is kept and made fresh again without downloading it.
+        If the API can't be reached (or answers with a server error), or the request would go over the rate limit,
+        the expired response is returned instead, if there is one.
+
+        Parameters
+        ----------
+        baseURL : str
+            the link that is requested
+
+        payload : dict
+            the query parameters of the request
+
+        headers : dict
+            the HTTP headers of the request
+
+        cacheKey : str
+            the key the response is cached under
+
+        priority : str
+            the priority of the request for the rate limiter ('interactive' by default)
+
+        Returns
+        -------
+        dict/int
+            a json response in the form of a dictionary/list of dictionaries, or the status code if the request failed
+
+        Raises
+        ------
+        aiohttp.ClientError
+            if the connection to the API fails (and there is no expired response to fall back on)
+
+        asyncio.TimeoutError
+            if the API doesn't answer in time (and there is no expired response to fall back on)
+
+        CircuitOpenError
+            if the API has been failing (and there is no expired response to fall back on)
+
+        RateLimitError
+            if the request would go over the rate limit or the daily quota (and there is no expired response to fall back on)
+        '''
+
+        ttl = self.getCacheTTL(baseURL)
+        inMemory = not self.isDiskOnly(baseURL)
+
+        # if there is an expired copy with validators, the API is asked to only send the response if it changed
+        stale = self.cache.peek(cacheKey)
+        conditionalHeaders = {}
+        if stale is not None:
+            if stale.etag:
+                conditionalHeaders['If-None-Match'] = stale.etag
+            if stale.lastModified:
+                conditionalHeaders['If-Modified-Since'] = stale.lastModified
+
+        try:
+            status, data, validators = await self.fetchAPI(baseURL, payload, {**headers, **conditionalHeaders}, priority)
+        except (CircuitOpenError, asyncio.TimeoutError, aiohttp.ClientError):
+            if stale is None:
+                raise
+
+            self.refreshStats['staleOnError'] += 1
+            return stale.value # an old response is better than none while the API is unhealthy
+        except RateLimitError:
+            if stale is None:
+                raise
+
+            self.refreshStats['staleOnError'] += 1
+            return stale.value # the quota is better spent on responses that aren't cached at all
+
+        if status >= 500 and stale is not None:
+            self.refreshStats['staleOnError'] += 1
+            return stale.value
+
+        if status == 304 and stale is not None:
+            counters = self.getBandwidthCounters(baseURL)
+            counters['notModified'] += 1
+            counters['bytesSaved'] += stale.transferSize # what downloading it again would have cost, not the (possibly cut down) cached size
+            self.cache.renew(cacheKey, ttl, inMemory)
+            return stale.value
 
+        # error codes aren't cached so the next request tries again
+        if status != 200:
+            return status
 
+        self.cache.set(cacheKey, data, ttl, validators['etag'], validators['lastModified'], validators['size'], inMemory)
+        return data
 
+    async def fetchAPI(self, baseURL, payload = {}, headers = {}, priority = 'interactive'):
+        '''Sends the actual get request (uncached and uncoalesced), retrying timeouts and server errors as the host's policy allows.
 
+        Every attempt has its own timeout and the retries are spaced out with a jittered exponential backoff,
+        all within the overall deadline of the host's policy. Failed attempts count towards the host's circuit breaker,
+        and no attempt is made while it is open.
 
+        Parameters
+        ----------
+        baseURL : str
+            the link that is requested
+
+        payload : dict
+            the query parameters of the request
+
+        headers : dict
+            the HTTP headers of the request
+
+        priority : str
+            the priority of the request for the rate limiter ('interactive' by default)
+
+        Returns
+        -------
+        tuple
+            the status code, the json response (None unless the status is 200), and a dictionary of the response's validators (etag, lastModified) and the number of bytes downloaded (size)
+
+        Raises
+        ------
+        aiohttp.ClientError
+            if the connection to the API fails on every attempt
+
+        asyncio.TimeoutError
+            if the API doesn't answer in time on every attempt
+
+        CircuitOpenError
+            if the circuit breaker of the host is open
+
+        RateLimitError
+            if the request would go over the rate limit or the daily quota
+        '''
+
+        policy = self.getHostPolicy(baseURL)
+        deadline = time.monotonic() + policy.deadline
+        attempt = 0
+
+        while True:
+            if not policy.breaker.allowRequest():
+                raise CircuitOpenError(f'{urlparse(baseURL).hostname} is having issues right now, please try again in a few minutes!')
+
+            failure = None
+            result = None
+
+            try:
+                result = await self.sendRequest(baseURL, payload, headers, priority, max(min(policy.timeout, deadline - time.monotonic()), 0.1))
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as error:
+                if isinstance(error, asyncio.TimeoutError):
+                    policy.stats['timeouts'] += 1
+
+                policy.breaker.recordFailure()
+                failure = error
+            except asyncio.CancelledError:
+                policy.breaker.releaseTrial()
+                raise
+            except Exception:
+                policy.breaker.releaseTrial() # not the host's fault (ex. the rate limiter said no)
+                raise
+            else:
+                # only server errors are worth retrying, anything else is returned as is
+                if result[0] < 500:
+                    policy.breaker.recordSuccess()
+                    return result
+
+                policy.breaker.recordFailure()
+
+            # gives up once the retries are used up or the next attempt couldn't finish before the deadline
+            backoff = policy.getBackoff(attempt)
+            if attempt >= policy.retries or time.monotonic() + backoff >= deadline:
+                if failure is not None:
+                    raise failure
+                return result
+
+            policy.stats['retries'] += 1
+            attempt += 1
+            await asyncio.sleep(backoff)
+
+    async def sendRequest(self, baseURL, payload = {}, headers = {}, priority = 'interactive', timeout = None):
+        '''Makes a single attempt at a get request through the shared session.
+
+        Parameters
+        ----------
+        baseURL : str
+            the link that is requested
+
+        payload : dict
+            the query parameters of the request
+
+        headers : dict
+            the HTTP headers of the request
+
+        priority : str
+            the priority of the request for the rate limiter ('interactive' by default)
+
+        timeout : float
+            the number of seconds the attempt (including reading the response) is allowed to take (None by default, which means no limit)
+
+        Returns
+        -------
+        tuple
+            the status code, the json response (None unless the status is 200), and a dictionary of the response's validators (etag, lastModified) and the number of bytes downloaded (size)
+
+        Raises
+        ------
+        aiohttp.ClientError
+            if the connection to the API fails
+
+        asyncio.TimeoutError
+            if the attempt takes longer than the timeout
+
+        RateLimitError
+            if the request would go over the rate limit or the daily quota
+        '''
+
+        if self.rateLimiter is not None:
+            await self.rateLimiter.acquire(priority) # waits for a token (or raises a RateLimitError)
+
+        session = await self.getSession() # reuses the pooled session instead of opening a new one for every request
+        async with session.get(baseURL, params = payload, headers = headers, timeout = aiohttp.ClientTimeout(total=timeout)) as r:
+            if self.rateLimiter is not None:
+                self.rateLimiter.update(r.status, r.headers) # keeps the quota in sync with the API's own count
+
+            validators = {'etag': r.headers.get('ETag'), 'lastModified': r.headers.get('Last-Modified'), 'size': 0}
+            counters = self.getBandwidthCounters(baseURL)
+            counters['requests'] += 1
+
+            if r.status == 200:
+                projection = self.getStreamProjection(baseURL)
+
+                # large responses are decoded as they arrive and cut down to what is used, instead of building the whole thing in memory
+                if projection is not None:
+                    data, size = await decodeProjected(r.content, *projection)
+                else:
+                    body = await r.read()
+                    data, size = jsonCodec.loads(body), len(body)
 
+                counters['bytesDownloaded'] += size
+                validators['size'] = size
+                return r.status, data, validators
+            else:
+                return r.status, None, validators
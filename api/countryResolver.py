@@ -0,0 +1,115 @@
+import difflib
+import string
+import unicodedata
+
+'''
+Common names/abbreviations for countries mapped to their ISO codes, so they can be looked up even if
+the API calls the country something else (only aliases whose code the API actually has are used).
+'''
+ALIASES = {
+    'us': 'US', 'usa': 'US', 'united states': 'US', 'united states of america': 'US', 'america': 'US',
+    'uk': 'GB', 'united kingdom': 'GB', 'great britain': 'GB', 'britain': 'GB', 'england': 'GB',
+    'south korea': 'KR', 's korea': 'KR', 'korea': 'KR', 'republic of korea': 'KR',
+    'north korea': 'KP', 'n korea': 'KP',
+    'uae': 'AE', 'united arab emirates': 'AE',
+    'russia': 'RU', 'russian federation': 'RU',
+    'iran': 'IR', 'syria': 'SY', 'vietnam': 'VN', 'viet nam': 'VN', 'laos': 'LA', 'bolivia': 'BO',
+    'venezuela': 'VE', 'tanzania': 'TZ', 'moldova': 'MD', 'czechia': 'CZ', 'czech republic': 'CZ',
+    'drc': 'CD', 'dr congo': 'CD', 'democratic republic of the congo': 'CD', 'ivory coast': 'CI', 'cote d ivoire': 'CI',
+    'holland': 'NL', 'macedonia': 'MK', 'north macedonia': 'MK', 'burma': 'MM', 'myanmar': 'MM',
+    'taiwan': 'TW', 'palestine': 'PS', 'vatican': 'VA', 'holy see': 'VA', 'eswatini': 'SZ', 'swaziland': 'SZ'
+}
+
+punctuation = str.maketrans(string.punctuation, ' ' * len(string.punctuation)) # every punctuation mark becomes a space
+
+def normalize(name):
+    '''Returns a name in lowercase, without accents, punctuation, or extra spaces (ex. " S. Korea " -> "s korea").'''
+
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode() # removes accents (ex. Côte d'Ivoire -> Cote d'Ivoire)
+    name = name.lower().translate(punctuation)
+    name = ' '.join(name.split())
+
+    if name.startswith('the '):
+        name = name[4:]
+
+    return name
+
+class CountryResolver:
+    '''
+    An index that resolves country names, ISO codes, and common aliases to a country in constant time.
+
+    ...
+
+    Attributes
+    ----------
+    countries : list
+        the countries in the index as dictionaries with the name and country code (in the order the API lists them)
+
+    index : dict
+        every normalized name, code, and alias mapped to its country
+
+    Methods
+    -------
+    resolve(query, fuzzy=False)
+        Returns the country a name, code, or alias refers to (or None)
+    '''
+
+    def __init__(self, countries):
+        '''
+        Parameters
+        ----------
+        countries : list
+            the countries to index, as dictionaries with (at least) the name and country code
+        '''
+
+        self.countries = [{'name': country['name'], 'code': country['code']} for country in countries]
+        self.index = {}
+        byCode = {}
+
+        for country in self.countries:
+            byCode[country['code'].upper()] = country
+            self.index[normalize(country['code'])] = country
+
+        # names are added after codes so a name always wins over a code that is spelled the same
+        for country in self.countries:
+            self.index[normalize(country['name'])] = country
+
+        for alias, code in ALIASES.items():
+            if code in byCode and alias not in self.index:
+                self.index[alias] = byCode[code]
+
+        self.keys = [key for key in self.index if len(key) > 3] # only used by the fuzzy fallback (codes and short aliases are left out)
+
+    def resolve(self, query, fuzzy=False):
+        '''Returns the country a name, code, or alias refers to (or None).
+
+        Parameters
+        ----------
+        query : str
+            the name, two letter code, or alias of the country, in any case (ex. canada, CA, USA, S. Korea)
+
+        fuzzy : bool
+            if True, the closest name is returned when nothing matches exactly, to make up for typos (False by default)
+
+        Returns
+        -------
+        dict/None
+            a dictionary with the name and country code, or None if nothing matched
+
+        Raises
+        ------
+        ...
+        '''
+
+        country = self.index.get(query.lower()) # most queries are already plain names, so normalizing can be skipped
+
+        if country is None:
+            key = normalize(query)
+            country = self.index.get(key)
+
+        if country is None and fuzzy and len(key) > 3: # short queries are too ambiguous to guess
+            matches = difflib.get_close_matches(key, self.keys, n=1, cutoff=0.8)
+            if matches:
+                country = self.index[matches[0]]
+
+        return country
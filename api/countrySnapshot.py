@@ -0,0 +1,130 @@
+import time
+
+class CountryStats:
+    '''
+    The statistics of a country that the bot shows, taken out of the API's nested response once when it's ingested.
+
+    ...
+
+    Attributes
+    ----------
+    name : str
+        the name of the country
+
+    code : str
+        the two letter code of the country
+
+    population, deathsToday, confirmedToday, deaths, confirmed, recovered, critical : int/None
+        the population and case counts (None if the API doesn't have them)
+
+    deathRate, recoveryRate, recoveredVsDeathRatio : float/None
+        the rates calculated by the API, in percent (None if the API doesn't have them)
+
+    casesPerMillion : int/None
+        the number of confirmed cases per million people (None if the API doesn't have it)
+
+    display : tuple
+        every statistic above (from population on) ready to be shown, with missing ones as 'N/A' and rates rounded to two decimals
+
+    Methods
+    -------
+    ...
+    '''
+
+    __slots__ = ('name', 'code', 'population', 'deathsToday', 'confirmedToday', 'deaths', 'confirmed', 'recovered', 'critical',
+                 'deathRate', 'recoveryRate', 'recoveredVsDeathRatio', 'casesPerMillion', 'display')
+
+    def __init__(self, country):
+        '''
+        Parameters
+        ----------
+        country : dict
+            the country as the API sends it (from /countries or /countries/{code})
+        '''
+
+        today = country.get('today') or {}
+        latest = country.get('latest_data') or {}
+        calculated = latest.get('calculated') or {}
+
+        self.name = country['name']
+        self.code = country['code']
+        self.population = country.get('population')
+        self.deathsToday = today.get('deaths')
+        self.confirmedToday = today.get('confirmed')
+        self.deaths = latest.get('deaths')
+        self.confirmed = latest.get('confirmed')
+        self.recovered = latest.get('recovered')
+        self.critical = latest.get('critical')
+        self.deathRate = calculated.get('death_rate')
+        self.recoveryRate = calculated.get('recovery_rate')
+        self.recoveredVsDeathRatio = calculated.get('recovered_vs_death_ratio')
+        self.casesPerMillion = calculated.get('cases_per_million_population')
+
+        # formatted once here instead of on every ?countryStats
+        counts = [self.population, self.deathsToday, self.confirmedToday, self.deaths, self.confirmed, self.recovered, self.critical]
+        rates = [self.deathRate, self.recoveryRate, self.recoveredVsDeathRatio]
+        self.display = tuple(['N/A' if count is None else count for count in counts] +
+                             ['N/A' if rate is None else '{:.2f}'.format(rate) for rate in rates] +
+                             ['N/A' if self.casesPerMillion is None else self.casesPerMillion])
+
+class CountrySnapshot:
+    '''
+    The latest statistics of every country, taken from a single /countries response and indexed by country code.
+
+    ...
+
+    Attributes
+    ----------
+    records : dict
+        the country code (uppercase) of each country mapped to its statistics (as a CountryStats)
+
+    takenAt : float
+        when the snapshot was taken (as a unix timestamp)
+
+    Methods
+    -------
+    get(code)
+        Returns the statistics of a country given its code (or None)
+
+    getAge()
+        Returns how old the snapshot is in seconds
+    '''
+
+    def __init__(self, countries):
+        '''
+        Parameters
+        ----------
+        countries : list
+            the countries from a /countries response, as dictionaries with the country code and latest statistics
+        '''
+
+        self.records = {country['code'].upper(): CountryStats(country) for country in countries}
+        self.takenAt = time.time()
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, code):
+        '''Returns the statistics of a country given its code (or None).
+
+        Parameters
+        ----------
+        code : str
+            the two letter code of the country, in any case (ex. CA, us)
+
+        Returns
+        -------
+        CountryStats/None
+            the statistics of the country, or None if it isn't in the snapshot
+
+        Raises
+        ------
+        ...
+        '''
+
+        return self.records.get(code.upper())
+
+    def getAge(self):
+        '''Returns how old the snapshot is in seconds.'''
+
+        return time.time() - self.takenAt
@@ -1,11 +1,22 @@
+import aiohttp
 import asyncio
-import matplotlib
+import io
+import os
 import string
-import matplotlib.dates as mdates
+import time
+import numpy as np
 from api import APIHandler
+from api.countryResolver import CountryResolver
+from api.countrySnapshot import CountrySnapshot, CountryStats
 from utils.asyncOperations import *
+from utils.cacheOperations import GraphCache
+from utils.circuitBreaker import CircuitOpenError
+from utils.columnarTimeline import ColumnarTimeline, fields, missing as missingValue
+from utils.derivedMetrics import DerivedMetrics, metrics
+from utils.leaderboards import Leaderboards, statistics as rankedStatistics
+from utils.renderPool import RenderPool
+from utils.timelineStore import TimelineStore
 from datetime import datetime
-from matplotlib import pyplot as plt
 
 class CovidAPI(APIHandler.APIHandler):
     '''
@@ -16,46 +27,840 @@ class CovidAPI(APIHandler.APIHandler):
     Attributes
     ----------
     baseURL : str
-        the base link in the form of a string that will be used to access the data
+        the base link in the form of a string that will be used to access the data (can be pointed at the local stand-in server with COVID_API_URL in the .env file)
 
     payload : dict
         a dictionary of strings that lets you pass on specific arguments into the link (empty by default)
 
+    maxStaleness : dict
+        how long (in seconds) expired country and timeline data is still served while it's refreshed in the background
+
+    streamedEndpoints : dict
+        the fields kept from the (large) list of countries and global timeline, which are cut down while they are decoded
+
+    resolver : CountryResolver
+        the index used to look up countries by name, code, or alias (rebuilt only when the list of countries changes)
+
+    columnarTimelines : dict
+        the timelines converted to columns (by country code, or 'global'), along with when the response each was converted from expires
+
+    diskOnlyEndpoints : tuple
+        the endpoints whose responses are only cached on disk, since what's kept in memory is their columnar timeline (and the snapshot's statistics)
+
+    revisionWindow : int
+        how many of the newest days of a timeline are replaced when it's refreshed (older days are kept as they are)
+
+    timelineStats : dict
+        the number of timelines converted in full, refreshes merged in, and refreshes that didn't change anything
+
+    compareLimit : int
+        the most countries that can be compared at once
+
+    compareConcurrency : int
+        the most countries whose data is fetched at the same time while comparing
+
+    compareDeadline : float
+        how long (in seconds) fetching the data of every compared country may take in total
+
+    snapshotEnabled : bool
+        if True (default), country statistics are answered from a snapshot of every country instead of a request per country
+
+    snapshotInterval : float
+        how often (in seconds) the snapshot is refreshed in the background
+
+    snapshot : CountrySnapshot
+        the latest statistics of every country, indexed by country code (rebuilt only when the list of countries changes)
+
+    snapshotStats : dict
+        the number of times the snapshot was ingested, failed to refresh, and answered country statistics
+
+    store : TimelineStore
+        every timeline (and the list of countries) kept on disk, mapped when the bot starts and used while the API is down
+
+    storeInterval : float
+        how often (in seconds) every timeline is refreshed and saved to the store in the background
+
+    storeMaxAge : float
+        how long (in seconds) a timeline mapped from the store is served without asking the API for a fresher one
+
+    storeStats : dict
+        the number of times every timeline was ingested, timelines that failed to, and requests answered from the store because the API was down
+
+    derivedMetrics : DerivedMetrics
+        the 7-day averages, growth rates, and doubling times of every timeline (recomputed only for the timelines that changed)
+
+    renderPool : RenderPool
+        the worker processes graphs are drawn in, so drawing one doesn't block the event loop
+
+    graphCache : GraphCache
+        rendered graphs, bounded by size in memory (and optionally spilled to disk), keyed by a digest of their data
+
+    leaderboards : Leaderboards
+        every country ranked by cases per million, death rate, new cases, and growth (rebuilt whenever the snapshot or the metrics are refreshed)
+
     Methods
     -------
     getCountries()
         Returns a list of available countries in a dictionary format with the country code
 
-    getCountryCode(country)
-        Returns the country code of a specific country as a string
+    getCountryResolver()
+        Returns the index of countries, rebuilding it if the list of countries has changed
+
+    resolveCountry(country, fuzzy=False)
+        Returns the name and country code of a country given its name, code, or an alias
+
+    parseCountry(query)
+        Splits a query that starts with a country into the country's name and the rest of the query
+
+    getCountryCode(country, fuzzy=False)
+        Returns the country code of a specific country as a string
+
+    getSnapshot(refresh=False)
+        Returns the snapshot of every country's latest statistics, rebuilding it if the list of countries has changed
+
+    ingestSnapshots()
+        Keeps the snapshot fresh by refreshing it every snapshotInterval seconds (runs until cancelled)
+
+    startSnapshotIngest()
+        Starts refreshing the snapshot in the background
+
+    getSnapshotStats()
+        Returns how many countries the snapshot has, how old it is, and its counters
+
+    getCountryStats(country)
+        Returns the specific statistics of a country
+
+    getCountriesResponse(refresh=False)
+        Returns the /countries response, or the stored one if the API can't be reached
+
+    getTimelineLink(key)
+        Returns the link the timeline of a country code (or 'global') is requested from
+
+    fetchTimeline(key, refresh=False)
+        Returns the timeline of a country code (or 'global') from the API, or None if it can't be reached but the timeline is stored
+
+    getTimelineKey(country)
+        Returns the key a country's timeline is kept under (its country code, or 'global')
+
+    getCountryTimeline(country, refresh=False)
+        Returns the timeline of cases within a given country
+
+    getColumnarTimeline(country, refresh=False)
+        Returns the timeline of a country stored as columns, merging in only the newest days when it's refreshed
+
+    updateColumnarTimeline(key, timeline)
+        Merges a freshly fetched timeline into the one stored as columns
+
+    loadStore()
+        Maps every timeline in the store, so they don't have to be fetched again after a restart
+
+    ingestTimelines()
+        Refreshes every timeline and saves the ones that changed to the store every storeInterval seconds (runs until cancelled)
+
+    startStoreIngest()
+        Starts refreshing the store in the background
+
+    getStoreStats()
+        Returns the number of timelines in the store, their size on disk, how long mapping them took, and the counters
+
+    refreshMetrics()
+        Computes the derived metrics of every timeline that changed, in one pass
+
+    getMetrics(country)
+        Returns the latest 7-day averages, growth rate, and doubling time of a country
+
+    rankCountries()
+        Ranks every country in the snapshot by each leaderboard statistic
+
+    getLeaderboard(statistic, k=10)
+        Returns the k countries with the largest values of a statistic
+
+    getPercentiles(code)
+        Returns a country's rank and percentile on every leaderboard, without making a request
+
+    getTimelineStats()
+        Returns the number of timelines converted, merged, and left unchanged
+
+    getTimelineDigest(key, timeline)
+        Returns a digest of a timeline's data, computed once per version of the timeline
+
+    renderGraph(key, renderer, *args)
+        Returns a graph from the graph cache, or renders it (in the render pool) and caches it
+
+    getRenderStats()
+        Returns the number of graphs rendered, how many are queued right now, and how long they take, along with the graph cache's counters
+
+    queryDate(country, date)
+        Returns the statistics given a certain date
+
+    queryDateRange(country, start, end)
+        Returns the part of a country's timeline between two dates
+
+    getDateGraph(country, date, graphType = 'bar')
+        Generates a graph that displays the statistics of a certain date, given a country
+
+    getTimelineGraph(country, statistic, graphType = 'line')
+        Generates a graph that displays the timeline of a certain statistic overtime given a country and graph type
+
+    resolveCountries(countries)
+        Returns the names of the countries that exist (and the ones that don't)
+
+    compareCountries(countries)
+        Returns the statistics of several countries, fetched concurrently
+
+    getComparisonGraph(countries, statistic, graphType = 'line')
+        Generates a graph that overlays the timelines of a certain statistic for several countries
+    '''
+
+    # expired data is served right away and refreshed in the background, unless it's older than this (can be overriden in the .env file)
+    maxStaleness = {
+        '/timeline': int(os.getenv('COVID_MAX_STALENESS', 6 * 3600)),
+        '/countries': int(os.getenv('COVID_MAX_STALENESS', 6 * 3600))
+    }
+
+    # only the fields that are actually used are kept from the two largest responses (the latest statistics of every country are kept for the snapshot)
+    streamedEndpoints = {
+        '/countries': ('data', ('name', 'code', 'population', 'updated_at', 'today', 'latest_data')),
+        '/timeline': ('data', ('date', 'deaths', 'confirmed', 'recovered', 'active', 'new_confirmed', 'new_recovered', 'new_deaths'))
+    }
+
+    # every country's statistics come from one bulk /countries request, refreshed this often (can be overriden in the .env file)
+    snapshotEnabled = os.getenv('COVID_SNAPSHOT', 'true').lower() != 'false'
+    snapshotInterval = float(os.getenv('COVID_SNAPSHOT_INTERVAL', 900))
+    snapshotStats = {'ingests': 0, 'ingestFailures': 0, 'snapshotHits': 0, 'snapshotMisses': 0}
+
+    # timelines are kept in memory as columns (and the latest statistics in the snapshot), so the responses they come from are only cached on disk (for revalidating them)
+    diskOnlyEndpoints = ('/timeline', '/countries/')
+
+    # the API only revises the last few days of a timeline, so that's all that is replaced on a refresh (can be overriden in the .env file)
+    revisionWindow = int(os.getenv('COVID_REVISION_WINDOW', 14))
+    timelineStats = {'builds': 0, 'merges': 0, 'unchanged': 0}
+
+    # comparisons fan out over several countries, so how many are fetched at once and for how long is bounded (can be overriden in the .env file)
+    compareLimit = int(os.getenv('COVID_COMPARE_LIMIT', 10))
+    compareConcurrency = int(os.getenv('COVID_COMPARE_CONCURRENCY', 4))
+    compareDeadline = float(os.getenv('COVID_COMPARE_DEADLINE', 15))
+
+    # every timeline is also kept on disk, so a restarted bot doesn't refetch them and keeps answering while the API is down (can be overriden in the .env file)
+    store = TimelineStore(os.getenv('COVID_STORE_PATH', 'cache/timelines'))
+    storeInterval = float(os.getenv('COVID_STORE_INTERVAL', 3600))
+    storeMaxAge = float(os.getenv('COVID_STORE_MAX_AGE', 3600))
+    storeStats = {'ingests': 0, 'ingestFailures': 0, 'offlineHits': 0}
+    offlineErrors = (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError) # the errors that mean the API can't be reached
+
+    # graphs are drawn in worker processes (RENDER_WORKERS=0 draws them on the event loop instead)
+    renderPool = RenderPool(
+        workers=int(os.getenv('RENDER_WORKERS', 2)),
+        timeout=float(os.getenv('RENDER_TIMEOUT', 20)),
+        recycleAfter=int(os.getenv('RENDER_RECYCLE_AFTER', 200))
+    )
+
+    # rendered graphs, keyed by what they show and a digest of the data they were drawn from (so a change in the data is never served stale)
+    graphCache = GraphCache(
+        os.getenv('GRAPH_CACHE_PATH', ''),
+        maxMemoryBytes=int(os.getenv('GRAPH_CACHE_MEMORY_BYTES', 32 * 1024 ** 2)),
+        maxDiskBytes=int(os.getenv('GRAPH_CACHE_DISK_BYTES', 128 * 1024 ** 2))
+    )
+    graphCacheTTL = int(os.getenv('GRAPH_CACHE_TTL', 86400))
+    renderFlight = SingleFlight() # identical graphs asked for at the same time are only drawn once
+
+    derivedMetrics = DerivedMetrics() # recomputed for every country after each ingest, and for a single one when it's asked for after changing
+
+    def __init__(self):
+        '''
+        Parameters
+        ----------
+        ...
+        '''
+
+        self.baseURL = os.getenv('COVID_API_URL', 'https://corona-api.com').rstrip('/') # environment variable so it can be pointed at the local stand-in server
+        self.resolver = None
+        self.resolverSource = None # the response the resolver was built from
+        self.columnarTimelines = {}
+        self.snapshot = None
+        self.snapshotSource = None # the response the snapshot was built from
+        self.leaderboards = None
+        self.timelineDigests = {} # the digest of every timeline a graph was drawn from, see getTimelineDigest
+        super().__init__() # inherit from parent class
+
+    async def getCountries(self):
+        '''Returns a list of available countries in a dictionary format with the country code.
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        list
+            list of all available countries as dictionaries with the name and country code
+
+        Raises
+        ------
+        ...
+        '''
+
+        resolver = await self.getCountryResolver()
+        return resolver.countries
+
+    async def getCountryResolver(self):
+        '''Returns the index of countries, rebuilding it if the list of countries has changed.
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        CountryResolver
+            the index of every available country
+
+        Raises
+        ------
+        ...
+        '''
+
+        api = await self.getCountriesResponse() # grabs api (from the cache most of the time)
+
+        # the cache hands back the same object until the list is refetched, so the index is only rebuilt after a refresh
+        if api is not self.resolverSource:
+            self.resolver = CountryResolver(api['data'])
+            self.resolverSource = api
+
+        return self.resolver
+
+    async def resolveCountry(self, country, fuzzy=False):
+        '''Returns the name and country code of a country given its name, code, or an alias.
+
+        Parameters
+        ----------
+        country : str
+            the name, two letter code, or alias of the country, in any case (ex. Canada, usa, S. Korea, JP)
+
+        fuzzy : bool
+            if True, the closest country is returned when nothing matches exactly, to make up for typos (False by default)
+
+        Returns
+        -------
+        dict/None
+            a dictionary with the name and country code, or None if no country matched
+
+        Raises
+        ------
+        ...
+        '''
+
+        resolver = await self.getCountryResolver()
+        return resolver.resolve(country, fuzzy)
+
+    async def parseCountry(self, query):
+        '''Splits a query that starts with a country into the country's name and the rest of the query.
+
+        Parameters
+        ----------
+        query : str
+            the query, starting with the name, code, or alias of a country, or 'global' (ex. S. Korea January 1 2021 bar)
+
+        Returns
+        -------
+        tuple
+            the name of the country ('global' for the global timeline, None if no country matched) and the rest of the query
+
+        Raises
+        ------
+        ...
+        '''
+
+        resolver = await self.getCountryResolver()
+        words = query.split()
+
+        # the longest run of leading words that names a country wins (so "South Africa" isn't read as "South")
+        for end in range(len(words), 0, -1):
+            name = ' '.join(words[:end])
+            rest = ' '.join(words[end:])
+
+            if name.lower() == 'global':
+                return 'global', rest
+
+            country = resolver.resolve(name)
+            if country is not None:
+                return country['name'], rest
+
+        return None, query
+
+    async def getCountryCode(self, country, fuzzy=False):
+        '''Returns the country code of a specific country as a string.
+
+        Parameters
+        ----------
+        country : str
+            the name, code, or alias of the country, in any case (ex. Canada, USA, Japan)
+
+        fuzzy : bool
+            if True, the closest country is used when nothing matches exactly (False by default)
+
+        Returns
+        -------
+        str
+            the country code of the given country a two character string (or False if there is no such country)
+
+        Raises
+        ------
+        ...
+        '''
+
+        match = await self.resolveCountry(country, fuzzy) # constant time lookup in the index of countries
+        return match['code'] if match else False
+
+    async def getSnapshot(self, refresh=False):
+        '''Returns the snapshot of every country's latest statistics, rebuilding it if the list of countries has changed.
+
+        Parameters
+        ----------
+        refresh : bool
+            if True, the list of countries is revalidated with the API even if the cached one is still fresh (False by default)
+
+        Returns
+        -------
+        CountrySnapshot
+            the latest statistics of every country, indexed by country code
+
+        Raises
+        ------
+        ...
+        '''
+
+        api = await self.getCountriesResponse(refresh)
+
+        # a 304 or a cache hit hands back the same object, so the table is only rebuilt when the data actually changed
+        if api is not self.snapshotSource:
+            self.snapshot = CountrySnapshot(api['data'])
+            self.snapshotSource = api
+            self.rankCountries() # the leaderboards are ranked here, once per refresh, instead of on every query
+
+        return self.snapshot
+
+    async def ingestSnapshots(self):
+        '''Keeps the snapshot fresh by refreshing it every snapshotInterval seconds (runs until cancelled).
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        ...
+
+        Raises
+        ------
+        ...
+        '''
+
+        while True:
+            try:
+                await self.getSnapshot(refresh=True)
+                self.snapshotStats['ingests'] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.snapshotStats['ingestFailures'] += 1 # the previous snapshot keeps being served until the next try
+
+            await asyncio.sleep(self.snapshotInterval)
+
+    def startSnapshotIngest(self):
+        '''Starts refreshing the snapshot in the background (called when the bot starts, stopped when the session is closed).
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        asyncio.Task/None
+            the task refreshing the snapshot, or None if snapshots are disabled
+
+        Raises
+        ------
+        ...
+        '''
+
+        if not self.snapshotEnabled:
+            return None
+
+        task = asyncio.ensure_future(self.ingestSnapshots())
+        self.refreshTasks.add(task) # cancelled along with the other background refreshes when the session closes
+        task.add_done_callback(self.refreshTasks.discard)
+        return task
+
+    def getSnapshotStats(self):
+        '''Returns how many countries the snapshot has, how old it is, and its counters.
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        dict
+            the number of countries, age of the snapshot in seconds (None if there isn't one yet), and counters
+
+        Raises
+        ------
+        ...
+        '''
+
+        age = round(self.snapshot.getAge(), 1) if self.snapshot is not None else None
+        countries = len(self.snapshot) if self.snapshot is not None else 0
+        return {'countries': countries, 'age': age, **self.snapshotStats}
+
+    async def getCountryStats(self, country):
+        '''Returns the specific statistics of a country.
+
+        The statistics come from the snapshot of every country (a dictionary lookup), only falling back on a request
+        for the country if snapshots are disabled or the country isn't in it.
+
+        Parameters
+        ----------
+        country : str
+            the name of the country (ex. Canada, USA, Japan)
+
+        Returns
+        -------
+        CountryStats
+            the name, country code, population, today's statistics, and latest statistics (already formatted for display in .display)
+
+        Raises
+        ------
+        ...
+        '''
+
+        code = await self.getCountryCode(country) # gets the code of the country
+
+        if self.snapshotEnabled and code:
+            snapshot = await self.getSnapshot()
+            stats = snapshot.get(code)
+            if stats is not None:
+                self.snapshotStats['snapshotHits'] += 1
+                return stats
+
+            self.snapshotStats['snapshotMisses'] += 1
+
+        data = await self.getAPI(f'{self.baseURL}/countries/{code}') # gets the country's stats with the code (read from the disk tier if it's cached)
+        return CountryStats(data['data']) # only the fields that are shown are kept
+
+    async def getCountriesResponse(self, refresh=False):
+        '''Returns the /countries response, or the stored one if the API can't be reached.
+
+        Parameters
+        ----------
+        refresh : bool
+            if True, the response is revalidated with the API even if the cached one is still fresh (False by default)
+
+        Returns
+        -------
+        dict/int
+            the /countries response (always the same object until it changes), or the status code if the request failed and nothing is stored
+
+        Raises
+        ------
+        aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError
+            if the API can't be reached and the list of countries isn't stored
+        '''
+
+        try:
+            api = await self.getAPI(f'{self.baseURL}/countries', priority='background' if refresh else 'interactive', refresh=refresh)
+            if not isinstance(api, int):
+                return api
+        except self.offlineErrors:
+            if self.store.loadCountries() is None:
+                raise
+
+        stored = self.store.loadCountries()
+        if stored is None:
+            return api
+
+        self.storeStats['offlineHits'] += 1
+        return stored
+
+    def getTimelineLink(self, key):
+        '''Returns the link the timeline of a country code (or 'global') is requested from.'''
+
+        return f'{self.baseURL}/timeline' if key == 'global' else f'{self.baseURL}/countries/{key}'
+
+    async def fetchTimeline(self, key, refresh=False):
+        '''Returns the timeline of a country code (or 'global') from the API, or None if it can't be reached but the timeline is stored.
+
+        Parameters
+        ----------
+        key : str
+            the country code, or 'global' for the global timeline
+
+        refresh : bool
+            if True, the timeline is revalidated with the API even if the cached one is still fresh (False by default)
+
+        Returns
+        -------
+        list/None
+            a list of dictionaries containing data for cases in previous dates (the same list until it changes), or None
+
+        Raises
+        ------
+        aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError
+            if the API can't be reached and the timeline isn't stored
+        '''
+
+        link = self.getTimelineLink(key)
+
+        try:
+            stats = await self.getAPI(link, priority='background' if refresh else 'interactive', refresh=refresh)
+        except self.offlineErrors:
+            if not self.store.has(key):
+                raise
+            return None
+
+        if isinstance(stats, int) and self.store.has(key):
+            return None # the API answered with an error, but the stored timeline can still be served
+
+        return stats['data'] if key == 'global' else stats['data']['timeline']
+
+    async def getTimelineKey(self, country):
+        '''Returns the key a country's timeline is kept under (its country code, or 'global').
+
+        Parameters
+        ----------
+        country : str
+            the name, code, or alias of the country, or 'global'
+
+        Returns
+        -------
+        str/bool
+            the country code, 'global', or False if there is no such country
+
+        Raises
+        ------
+        ...
+        '''
+
+        return 'global' if country.lower() == 'global' else await self.getCountryCode(country)
+
+    async def getCountryTimeline(self, country, refresh=False):
+        '''Returns the timeline of cases within a given country.
+
+        Parameters
+        ----------
+        country : str
+            the name of the country, if 'global' is inputted instead of a country name it will grab the global timeline instead (ex. Canada, USA, Japan)
+
+        refresh : bool
+            if True, the timeline is revalidated with the API even if the cached one is still fresh (False by default)
+
+        Returns
+        -------
+        list
+            a list of dictionaries containing data for cases in previous dates (newest first, like the API sends them)
+
+        Raises
+        ------
+        ...
+        '''
+
+        # the days are rebuilt from the columnar timeline, so the response (only cached on disk) isn't decoded again for every page of days
+        columnar = await self.getColumnarTimeline(country, refresh)
+        return columnar.toDays()
+
+    async def getColumnarTimeline(self, country, refresh=False):
+        '''Returns the timeline of a country stored as columns, merging in only the newest days when it's refreshed.
+
+        Its version only goes up when a refresh actually changed something, so anything cached from it can be keyed on it.
+        Timelines mapped from the store are served without asking the API while they're younger than storeMaxAge,
+        and (however old they are) whenever the API can't be reached.
+
+        Parameters
+        ----------
+        country : str
+            the name of the country, or 'global' for the global timeline (ex. Canada, USA, Japan)
+
+        refresh : bool
+            if True, the timeline is revalidated with the API even if the cached one is still fresh (False by default)
+
+        Returns
+        -------
+        ColumnarTimeline
+            the timeline as a sorted array of dates and an array per statistic
+
+        Raises
+        ------
+        ...
+        '''
+
+        key = await self.getTimelineKey(country)
+        expiresAt, columnar = self.columnarTimelines.get(key, (None, None))
+
+        if columnar is not None and not refresh:
+            # a timeline mapped from the store (with no response behind it yet) is good enough while the ingester keeps it fresh
+            if expiresAt is None and self.store.getAge(key) < self.storeMaxAge:
+                return columnar
+
+            # the response it was converted from is still fresh, so it isn't read back from the disk tier
+            if expiresAt is not None and time.time() < expiresAt:
+                return columnar
+
+        timeline = await self.fetchTimeline(key, refresh)
+
+        if timeline is None:
+            self.storeStats['offlineHits'] += 1
+            if columnar is None:
+                columnar = self.store.load(key)
+                self.columnarTimelines[key] = (None, columnar)
+            return columnar
+
+        return self.updateColumnarTimeline(key, timeline)
+
+    def updateColumnarTimeline(self, key, timeline):
+        '''Merges a freshly fetched timeline into the one stored as columns.
+
+        Parameters
+        ----------
+        key : str
+            the country code, or 'global' for the global timeline
+
+        timeline : list
+            the timeline as the API sent it
+
+        Returns
+        -------
+        ColumnarTimeline
+            the timeline as a sorted array of dates and an array per statistic
+
+        Raises
+        ------
+        ...
+        '''
+
+        columnar = self.columnarTimelines.get(key, (None, None))[1]
+
+        if columnar is None:
+            columnar = ColumnarTimeline.fromDays(timeline)
+            self.timelineStats['builds'] += 1
+        else:
+            merged = columnar.merge(timeline, self.revisionWindow) # only the last revisionWindow days are converted
+            self.timelineStats['merges' if merged is not columnar else 'unchanged'] += 1
+            columnar = merged
+
+        # only the columns are kept, and they're served on their own until the response behind them expires (see getColumnarTimeline)
+        self.columnarTimelines[key] = (self.getCacheExpiry(self.getTimelineLink(key)) or 0.0, columnar)
+        return columnar
+
+    def loadStore(self):
+        '''Maps every timeline in the store, so they don't have to be fetched again after a restart (called when the bot starts).
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        dict
+            the store's stats (see getStoreStats), including how long mapping the timelines took
+
+        Raises
+        ------
+        ...
+        '''
+
+        for key, timeline in self.store.loadAll().items():
+            if key not in self.columnarTimelines:
+                self.columnarTimelines[key] = (None, timeline) # no response behind it yet, see getColumnarTimeline
 
-    getCountryStats(country)
-        Returns the specific statistics of a country
+        self.refreshMetrics()
+        return self.getStoreStats()
 
-    getCountryTimeline(country)
-        Returns the timeline of cases within a given country
+    async def storeTimeline(self, key):
+        '''Refreshes a timeline and saves it to the store if it changed (returns False if the API couldn't be reached).'''
 
-    queryDate(country, date)
-        Returns the statistics given a certain date
+        timeline = await self.fetchTimeline(key, refresh=True)
+        if timeline is None:
+            return False
 
-    getDateGraph(country, date, graphType = 'bar')
-        Generates a graph that displays the statistics of a certain date, given a country
+        self.store.save(key, self.updateColumnarTimeline(key, timeline))
+        return True
 
-    getTimelineGraph(country, statistic, graphType = 'line')
-        Generates a graph that displays the timeline of a certain statistic overtime given a country and graph type
-    '''
+    async def ingestTimelines(self):
+        '''Refreshes every timeline and saves the ones that changed to the store every storeInterval seconds (runs until cancelled).
 
-    def __init__(self):
+        Timelines the store already has from less than half an interval ago (ex. saved right before a restart) are left
+        as they were mapped by loadStore until the next pass.
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        ...
+
+        Raises
+        ------
+        ...
         '''
+
+        while True:
+            try:
+                countries = await self.getCountriesResponse(refresh=True)
+
+                # an error status code (or anything else that isn't a list of countries) is never saved over the stored one
+                if not isinstance(countries, dict) or 'data' not in countries:
+                    self.storeStats['ingestFailures'] += 1
+                else:
+                    self.store.saveCountries(countries)
+
+                    # timelines saved recently (ex. right before a restart) are already mapped from the store, so they aren't fetched again yet
+                    # (anything older than half an interval is, so one saved in the previous pass is never skipped over clock drift)
+                    keys = [country['code'] for country in countries['data']] + ['global']
+                    keys = [key for key in keys if self.store.getAge(key) >= self.storeInterval / 2]
+
+                    # the timelines go through the same cache and limits as commands do, a few at a time
+                    results = await boundedGather(self.storeTimeline, keys, self.compareConcurrency)
+                    self.refreshMetrics() # every timeline that changed gets its metrics recomputed, all at once
+
+                    self.storeStats['ingests'] += 1
+                    self.storeStats['ingestFailures'] += sum(1 for result in results if result is not True)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.storeStats['ingestFailures'] += 1
+            finally:
+                self.store.flush()
+
+            await asyncio.sleep(self.storeInterval)
+
+    def startStoreIngest(self):
+        '''Starts refreshing the store in the background (called when the bot starts, stopped when the session is closed).
+
         Parameters
         ----------
         ...
+
+        Returns
+        -------
+        asyncio.Task/None
+            the task refreshing the store, or None if the store is disabled
+
+        Raises
+        ------
+        ...
         '''
 
-        super().__init__() # inherit from parent class
+        if not self.store.isEnabled():
+            return None
 
-    async def getCountries(self):
-        '''Returns a list of available countries in a dictionary format with the country code.
+        task = asyncio.ensure_future(self.ingestTimelines())
+        self.refreshTasks.add(task) # cancelled along with the other background refreshes when the session closes
+        task.add_done_callback(self.refreshTasks.discard)
+        return task
+
+    def getStoreStats(self):
+        '''Returns the number of timelines in the store, their size on disk, how long mapping them took, and the counters.
 
         Parameters
         ----------
@@ -63,92 +868,256 @@ class CovidAPI(APIHandler.APIHandler):
 
         Returns
         -------
-        list
-            list of all available countries as dictionaries with the name and country code
+        dict
+            the number of timelines, bytes on disk, load time (in seconds), and counters
 
         Raises
         ------
         ...
         '''
 
-        api = await self.getAPI('https://corona-api.com/countries') # grabs api
-        data = api['data'] # gets the data
-        countries = [{'name':data[i]['name'],'code':data[i]['code']} async for i in aiter(range(len(data)))] # takes the name and country code of each country and puts it in a list
-        return countries
+        return {**self.store.getStats(), **self.storeStats}
 
-    async def getCountryCode(self, country):
-        '''Returns the country code of a specific country as a string.
+    def refreshMetrics(self):
+        '''Computes the derived metrics of every timeline that changed, in one pass (called after the timelines are refreshed).
 
         Parameters
         ----------
-        country : str
-            the name of the country (ex. Canada, USA, Japan)
+        ...
 
         Returns
         -------
-        str
-            the country code of the given country a two character string
+        int
+            the number of timelines whose metrics were computed
 
         Raises
         ------
         ...
         '''
 
-        countryList = await self.getCountries() # gets the list of countries
+        computed = self.derivedMetrics.update({key: columnar for key, (expiresAt, columnar) in self.columnarTimelines.items() if columnar is not None})
 
-        # checks if the country paramter matches with a valid country, if it does it returns the code. If not, it returns false
-        async for c in aiter(countryList):
-            if c['name'] == country:
-                return c['code']
-        else:
-            return False
+        if computed:
+            self.rankCountries() # growth rates changed
+        return computed
 
-    async def getCountryStats(self, country):
-        '''Returns the specific statistics of a country.
+    async def getMetrics(self, country):
+        '''Returns the latest 7-day averages, growth rate, and doubling time of a country.
 
         Parameters
         ----------
         country : str
-            the name of the country (ex. Canada, USA, Japan)
+            the name of the country, or 'global' for the global timeline (ex. Canada, USA, Japan)
 
         Returns
         -------
         dict
-            dictionaries containing all the data including coordinates, name, country code, latest statistics, and timeline
+            each derived metric (see utils.derivedMetrics.metrics) mapped to a (date, value) tuple, or None if it's unknown
 
         Raises
         ------
         ...
         '''
-        code = await self.getCountryCode(country) # gets the code of the country
-        data = await self.getAPI(f'http://corona-api.com/countries/{code}') # gets the country's stats with the code
-        return  data['data'] # data returned
 
-    async def getCountryTimeline(self, country):
-        '''Returns the timeline of cases within a given country.
+        key = await self.getTimelineKey(country)
+        timeline = await self.getColumnarTimeline(country)
+        return self.derivedMetrics.getLatest(key, timeline) # already computed unless the timeline changed since the last ingest
+
+    def rankCountries(self):
+        '''Ranks every country in the snapshot by each leaderboard statistic (called whenever the snapshot or the metrics are refreshed).
 
         Parameters
         ----------
-        country : str
-            the name of the country, if 'global' is inputted instead of a country name it will grab the global timeline instead (ex. Canada, USA, Japan)
+        ...
+
+        Returns
+        -------
+        Leaderboards/None
+            the new leaderboards, or None if there is no snapshot yet
+
+        Raises
+        ------
+        ...
+        '''
+
+        if self.snapshot is None:
+            return None
+
+        records = list(self.snapshot.records.values())
+        growth = self.derivedMetrics.getLatestValues('growth_rate') # only the countries whose timelines have been fetched have one
+
+        # None (not reported by the API) becomes NaN, which leaves the country off that leaderboard
+        values = {
+            'cases_per_million': np.array([record.casesPerMillion for record in records], dtype=float),
+            'death_rate': np.array([record.deathRate for record in records], dtype=float),
+            'new_cases': np.array([record.confirmedToday for record in records], dtype=float),
+            'growth_rate': np.array([growth.get(record.code, np.nan) for record in records], dtype=float)
+        }
+
+        self.leaderboards = Leaderboards([record.code.upper() for record in records], values)
+        return self.leaderboards
+
+    async def getLeaderboard(self, statistic, k=10):
+        '''Returns the k countries with the largest values of a statistic.
+
+        Parameters
+        ----------
+        statistic : str
+            the statistic to rank by, can choose from cases_per_million, death_rate, new_cases, growth_rate
+
+        k : int
+            the number of countries to return (10 by default, at most utils.leaderboards.depth)
 
         Returns
         -------
         list
-            a list of dictionaries containing data for cases in previous dates
+            (CountryStats, value) tuples, largest first
+
+        Raises
+        ------
+        ValueError
+            if the statistic provided is incorrect.
+        '''
+
+        if statistic not in rankedStatistics:
+            raise ValueError('Invalid statistic.')
+
+        snapshot = await self.getSnapshot() # reranks only if the list of countries changed since the last refresh
+
+        if self.leaderboards is None:
+            self.rankCountries()
+
+        return [(snapshot.get(code), value) for code, value in self.leaderboards.getTop(statistic, k)]
+
+    def getPercentiles(self, code):
+        '''Returns a country's rank and percentile on every leaderboard, without making a request.
+
+        Parameters
+        ----------
+        code : str
+            the two letter code of the country (ex. CA, US)
+
+        Returns
+        -------
+        dict
+            each leaderboard statistic mapped to a (rank, percentile) tuple (empty if the countries haven't been ranked yet)
 
         Raises
         ------
         ...
         '''
 
-        # grabs the stats of the country, but if 'global' is input as the country name, it will grab the global timeline instead
-        if country.lower() != 'global':
-            stats = await self.getCountryStats(country)
-            return stats['timeline']
-        else:
-            stats = await self.getAPI('https://corona-api.com/timeline')
-            return stats['data']
+        return self.leaderboards.getPercentiles(code) if self.leaderboards is not None else {}
+
+    def getRenderStats(self):
+        '''Returns the number of graphs rendered, how many are queued right now, and how long they take.
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        dict
+            the counters of the render pool (see utils.renderPool.RenderPool.getStats)
+
+        Raises
+        ------
+        ...
+        '''
+
+        return {**self.renderPool.getStats(), 'cache': self.graphCache.getStats(), 'coalesced': self.renderFlight.coalesced}
+
+    def getTimelineDigest(self, key, timeline):
+        '''Returns a digest of a timeline's data, computed once per version of the timeline.
+
+        Unlike the timeline's version (which starts over whenever the bot restarts), the digest only depends on the data,
+        so graphs spilled to disk are still keyed correctly after a restart.
+
+        Parameters
+        ----------
+        key : str
+            the country code of the timeline, or 'global'
+
+        timeline : ColumnarTimeline
+            the timeline
+
+        Returns
+        -------
+        str
+            the digest of the timeline's dates and statistics
+
+        Raises
+        ------
+        ...
+        '''
+
+        source, digest = self.timelineDigests.get(key, (None, None))
+
+        # timelines are never modified (a refresh that changes one makes a new one), so the same object has the same digest
+        if timeline is not source:
+            digest = self.store.getDigest(timeline)
+            self.timelineDigests[key] = (timeline, digest)
+
+        return digest
+
+    async def renderGraph(self, key, renderer, *args):
+        '''Returns a graph from the graph cache, or renders it (in the render pool) and caches it.
+
+        Parameters
+        ----------
+        key : str
+            everything the graph depends on, including the digest of its data
+
+        renderer : str
+            the name of the render function (see utils.graphRenderer, which is only imported by the render workers)
+
+        *args
+            the plain values and arrays to render the graph with
+
+        Returns
+        -------
+        bytes
+            the graph as a PNG image
+
+        Raises
+        ------
+        RenderTimeoutError
+            if the graph took too long to render
+
+        RenderFailedError
+            if the worker drawing the graph died
+        '''
+
+        entry = self.graphCache.get(key)
+        if entry is not None:
+            return entry.value # matplotlib isn't touched at all
+
+        return await self.renderFlight.do(key, self.renderAndCache, key, renderer, *args)
+
+    async def renderAndCache(self, key, renderer, *args):
+        image = await self.renderPool.render(renderer, *args)
+        self.graphCache.set(key, image, self.graphCacheTTL)
+        return image
+
+    def getTimelineStats(self):
+        '''Returns the number of timelines converted, merged, and left unchanged.
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        dict
+            the number of timelines stored and the counters
+
+        Raises
+        ------
+        ...
+        '''
+
+        return {'timelines': len(self.columnarTimelines), **self.timelineStats}
 
     async def queryDate(self, country, date):
         '''Returns the statistics given a certain date.
@@ -172,14 +1141,43 @@ class CovidAPI(APIHandler.APIHandler):
         '''
 
         targetDate = datetime.strptime(f'{date}', '%B %d %Y').date() # formats the date
-        timeline = await self.getCountryTimeline(country) # grabs country timeline
+        timeline = await self.getColumnarTimeline(country) # grabs country timeline (as columns)
 
-        # checks if the date provided matches a date on the timeline, if not, it will return false
-        async for day in aiter(timeline):
-            if str(targetDate) in day['date']:
-                return day
-        else:
-            return False
+        # binary search for the date on the timeline, if it isn't there, it will return false
+        return timeline.query(targetDate) or False
+
+    async def queryDateRange(self, country, start, end):
+        '''Returns the part of a country's timeline between two dates.
+
+        Paramters
+        ---------
+        country : str
+            the name of the country, or 'global' for the global timeline (ex. Canada, USA, Japan)
+
+        start : str
+            the first date of the range (ex. August 1 2020)
+
+        end : str
+            the last date of the range, included (ex. August 31 2020)
+
+        Returns
+        -------
+        ColumnarTimeline/bool
+            the days in the range as views of the stored timeline (see ColumnarTimeline.summarize), or False if there are none
+
+        Raises
+        ------
+        ValueError
+            if a date isn't in the right format
+        '''
+
+        startDate = datetime.strptime(f'{start}', '%B %d %Y').date() # formats the dates
+        endDate = datetime.strptime(f'{end}', '%B %d %Y').date()
+        timeline = await self.getColumnarTimeline(country) # grabs country timeline (as columns)
+
+        # two binary searches find the ends of the range, the days in between aren't copied
+        days = timeline.range(min(startDate, endDate), max(startDate, endDate))
+        return days if len(days) else False
 
     async def getDateGraph(self, country, date, graphType = 'bar'):
         '''Generates a graph that displays the statistics of a certain date, given a country.
@@ -197,8 +1195,8 @@ class CovidAPI(APIHandler.APIHandler):
 
         Returns
         -------
-        str/bool
-            a string saying that a graph has been created, or returns false
+        io.BytesIO/bool
+            the graph as a PNG image, or returns false
 
         Raises
         ------
@@ -212,31 +1210,15 @@ class CovidAPI(APIHandler.APIHandler):
         if data:
             stats = [data['deaths'], data['confirmed'], data['recovered'], data['new_confirmed'], data['new_recovered'], data['new_deaths'], data['active']] #puts the statistics in an array
 
-            # handles graphType
-            if graphType.lower() == 'bar':
-                labels = ['deaths', 'confirmed', 'recovered', '(new) confirmed', '(new) recovered', '(new) deaths', 'active'] # sets the labels
-                plt.bar(labels, stats) # creates bar graph
-                plt.xticks(rotation=15) # gives the labels in the x-axis a 15 degree rotation to avoid overlapping
-                plt.tick_params(axis='x', which='major', labelsize=7) # adjusts label size
-                plt.ticklabel_format(style='plain', axis='y')
-                plt.title(f'Statistics for {country} on {date}')
-                plt.xlabel('Statistics')  # set label for x-axis
-                plt.ylabel('Cases')  # set label for y-axis
-            elif graphType.lower() == 'pie':
-                labels = [f'deaths - {stats[0]}', f'confirmed - {stats[1]}', f'recovered - {stats[2]}',
-                      f'(new) confirmed - {stats[3]}', f'(new) recovered - {stats[4]}', f'(new) deaths - {stats[5]}',
-                      f'active - {stats[6]}'] # formats the labels for the legend
-                pie = plt.pie(stats, startangle=90) # creates a pie chart
-                plt.legend(pie[0], labels, bbox_to_anchor=(-0.5,0.5), title=f"Statistics for {country} on {date}", loc='center left') # formats the legend
-                plt.axis('equal') # equal aspect ratio ensures that pie is drawn as a circle.
-                plt.title(f'Statistics for {country} on {date}')
-            else:
+            if graphType.lower() not in ['bar', 'pie']:
                 raise ValueError('Invalid graph type. Can only make a bar graph or pie chart.') # raises an error if incorrect graphType is provided
 
-            plt.savefig('dateGraph.png', bbox_inches='tight') # saves graph as a file
-            plt.close() # closes the graph
+            # only the numbers are sent to a render worker, the event loop keeps serving everything else meanwhile
+            # the numbers shown are the data of the graph, so they're part of the key instead of a digest of the whole timeline
+            title = f'Statistics for {country} on {date}'
+            image = await self.renderGraph(f"date|{title}|{graphType.lower()}|{','.join(map(str, stats))}", 'renderDateGraph', title, stats, graphType.lower())
 
-            return f'new {graphType} graph created (as dateGraph.png)'
+            return io.BytesIO(image) # sent straight from memory, so two people graphing at once never share a file
         else:
             return False
 
@@ -249,15 +1231,16 @@ class CovidAPI(APIHandler.APIHandler):
             name of the country, if 'global' is inputted instead of a country name it will grab the global timeline instead (ex. Canada, USA, Japan)
 
         statistic : str
-            the name of the statistic, can choose from deaths, confirmed, recovered, active, new_confirmed, new_recovered, new_deaths
+            the name of the statistic, can choose from deaths, confirmed, recovered, active, new_confirmed, new_recovered, new_deaths,
+            or a derived one: new_confirmed_7day_avg, new_deaths_7day_avg, new_recovered_7day_avg, growth_rate, doubling_time
 
         graphType : str
             type of graph, can choose from a line (default value), bar, and scatter plot
 
         Returns
         -------
-        string/bool
-            a string saying that a graph has been created, or returns false
+        io.BytesIO/bool
+            the graph as a PNG image, or returns false
 
         Raises
         ------
@@ -265,54 +1248,171 @@ class CovidAPI(APIHandler.APIHandler):
             if the graphType provided is incorrect.
         '''
 
-        countryTimeline = await self.getCountryTimeline(country) # grabs timeline
+        countryTimeline = await self.getColumnarTimeline(country) # grabs timeline (as columns)
 
         # if there is a response it will graph the timeline, if not, it will return false
-        if countryTimeline:
-            dates = [countryTimeline[i]['date'] async for i in aiter(range(len(countryTimeline)))] # grabs dates and puts it in an array
-            stat = [countryTimeline[i][f'{statistic}'] async for i in aiter(range(len(countryTimeline)))] # grabs the statistics and puts it in an array
-
-            dateTimes = mdates.num2date(mdates.datestr2num(dates)) # convert date strings to datetime objects
-            fig, ax = plt.subplots() # create two subplots
-            plt.ticklabel_format(style='plain') # to avoid weird values like 1e7
-
-            # to handle the graph type
-            if graphType.lower() == 'line':
-                ax.plot(dateTimes, stat)
-            elif graphType.lower() == 'bar':
-                ax.bar(dateTimes, stat)
-            elif graphType.lower() == 'scatter':
-                ax.scatter(dateTimes, stat)
+        if len(countryTimeline):
+            # the statistics come straight out of the columns (or the derived metrics), without going through the days one by one
+            if statistic in fields:
+                stat = countryTimeline.columns[statistic]
+                stat = np.where(stat == missingValue, np.nan, stat) # days the API had no data for are left out
+            elif statistic in metrics:
+                stat = self.derivedMetrics.get(await self.getTimelineKey(country), countryTimeline)[statistic]
             else:
+                raise ValueError('Invalid statistic.')
+
+            if graphType.lower() not in ['line', 'bar', 'scatter']:
                 raise ValueError('Invalid graph type.')
 
             # properly formats the title based on the statistic
             if statistic in ['new_confirmed', 'new_recovered', 'new_deaths']:
                 formatStatistic = string.capwords(statistic.replace('_', ' '))
                 if 'Deaths' in formatStatistic:
-                    plt.title(f'# of {formatStatistic} Over Time ({country.capitalize()})')
+                    title = f'# of {formatStatistic} Over Time ({country.capitalize()})'
                 else:
-                    plt.title(f'# of {formatStatistic} Cases Over Time ({country.capitalize()})')
+                    title = f'# of {formatStatistic} Cases Over Time ({country.capitalize()})'
             elif statistic in ['deaths', 'confirmed', 'recovered', 'active']:
                 formatStatistic = statistic.capitalize()
                 if 'Deaths' in formatStatistic:
-                    plt.title(f'# of {formatStatistic} Over Time ({country.capitalize()})')
+                    title = f'# of {formatStatistic} Over Time ({country.capitalize()})'
                 else:
-                    plt.title(f'# of {formatStatistic} Cases Over Time ({country.capitalize()})')
+                    title = f'# of {formatStatistic} Cases Over Time ({country.capitalize()})'
             else:
-                raise ValueError('Invalid statistic.')
+                title = f'{metrics[statistic]} ({country.capitalize()})'
 
-            plt.xlabel('Dates') # set label for x-axis
-            plt.ylabel('Cases') # set label for y-axis
-            fig.autofmt_xdate() # interprets the x-axis as dates and neatly formats it to avoid any messy overlapping
+            yLabel = {'growth_rate': 'Growth (%)', 'doubling_time': 'Days'}.get(statistic, 'Cases')
 
-            plt.savefig('timelineGraph.png') # saves graph as file NOTE: use os.remove('timelineGraph.png') in bot function
-            plt.close() # closes the graph
+            # the dates (datetime64) and values are plain arrays, so they're cheap to send to a render worker
+            key = await self.getTimelineKey(country)
+            cacheKey = f'timeline|{title}|{statistic}|{graphType.lower()}|{self.getTimelineDigest(key, countryTimeline)}'
+            image = await self.renderGraph(cacheKey, 'renderTimelineGraph', title, yLabel, countryTimeline.dates, stat, graphType.lower())
 
-            return f'new {graphType} graph created (as timelineGraph.png)'
+            return io.BytesIO(image)
         else:
             return False
 
+    async def resolveCountries(self, countries):
+        '''Returns the names of the countries that exist (and the ones that don't), without duplicates or going over compareLimit.
+
+        Parameters
+        ----------
+        countries : list
+            the names, codes, or aliases of the countries (ex. ['Canada', 'USA', 'S. Korea'])
+
+        Returns
+        -------
+        tuple
+            the names of the countries found (in the order given) and the queries that didn't match any country
+
+        Raises
+        ------
+        ValueError
+            if more than compareLimit countries are given
+        '''
+
+        if len(countries) > self.compareLimit:
+            raise ValueError(f'Can only compare up to {self.compareLimit} countries at once.')
+
+        names, unknown = [], []
+        for country in countries:
+            match = await self.resolveCountry(country)
+            if match is None:
+                unknown.append(country)
+            elif match['name'] not in names:
+                names.append(match['name'])
+
+        return names, unknown
+
+    async def compareCountries(self, countries):
+        '''Returns the statistics of several countries, fetched concurrently.
+
+        The countries go through the same cache, snapshot, and rate limits as single countries, but at most
+        compareConcurrency of them are fetched at once and all of them have to be done within compareDeadline seconds.
+
+        Parameters
+        ----------
+        countries : list
+            the names, codes, or aliases of the countries (ex. ['Canada', 'USA', 'S. Korea'])
+
+        Returns
+        -------
+        dict
+            'countries' holds the statistics of every country that could be fetched (in the order given, see getCountryStats),
+            'missing' holds the countries that don't exist or couldn't be fetched in time
+
+        Raises
+        ------
+        ValueError
+            if more than compareLimit countries are given
+        '''
+
+        names, missing = await self.resolveCountries(countries)
+        results = await boundedGather(self.getCountryStats, names, self.compareConcurrency, self.compareDeadline)
+
+        stats = []
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                missing.append(name) # one country failing (or running out of time) doesn't fail the comparison
+            else:
+                stats.append(result)
+
+        return {'countries': stats, 'missing': missing}
+
+    async def getComparisonGraph(self, countries, statistic, graphType = 'line'):
+        '''Generates a graph that overlays the timelines of a certain statistic for several countries.
+
+        Parameters
+        ----------
+        countries : list
+            the names, codes, or aliases of the countries (ex. ['Canada', 'USA', 'S. Korea'])
+
+        statistic : str
+            the name of the statistic, can choose from deaths, confirmed, recovered, active, new_confirmed, new_recovered, new_deaths
+
+        graphType : str
+            type of graph, can choose from a line (default value) and scatter plot
+
+        Returns
+        -------
+        dict/bool
+            'image' holds the graph as a PNG in a BytesIO, 'missing' holds the countries that don't exist or couldn't be fetched in time, or returns false if none could be
+
+        Raises
+        ------
+        ValueError
+            if the statistic or graphType provided is incorrect, or more than compareLimit countries are given
+        '''
+
+        if statistic not in fields:
+            raise ValueError('Invalid statistic.')
+        if graphType.lower() not in ['line', 'scatter']:
+            raise ValueError('Invalid graph type. Can only make a line graph or scatter plot.')
+
+        names, missing = await self.resolveCountries(countries)
+        timelines = await boundedGather(self.getColumnarTimeline, names, self.compareConcurrency, self.compareDeadline)
+
+        series = []
+        digests = []
+
+        for name, timeline in zip(names, timelines):
+            if isinstance(timeline, BaseException) or not len(timeline):
+                missing.append(name)
+                continue
+
+            values = timeline.columns[statistic]
+            known = values != missingValue # days the API had no data for are left out
+            series.append((name, timeline.dates[known], values[known]))
+            digests.append(f'{name}:{self.getTimelineDigest(await self.getTimelineKey(name), timeline)}')
+
+        if not series:
+            return False
+
+        formatStatistic = string.capwords(statistic.replace('_', ' '))
+        cacheKey = f"comparison|{statistic}|{graphType.lower()}|{','.join(digests)}"
+        image = await self.renderGraph(cacheKey, 'renderComparisonGraph', f'# of {formatStatistic} Over Time', series, graphType.lower())
+
+        return {'image': io.BytesIO(image), 'missing': missing}
+
 '''
 #TESTING FUNCTIONS:
 
@@ -320,8 +1420,3 @@ loop = asyncio.get_event_loop()
 test = loop.run_until_complete(CovidAPI().getDateGraph('Japan', 'January 1 2021'))
 print(test)
 '''
-
-
-
-
-
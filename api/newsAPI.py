@@ -3,7 +3,10 @@ import os
 from api import APIHandler
 from database.DBHandler import DatabaseHandler
 from utils.asyncOperations import *
+from utils.circuitBreaker import HostPolicy
+from utils.rateLimiter import RateLimiter
 from datetime import datetime
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -18,7 +21,7 @@ class NewsAPI(APIHandler.APIHandler):
     Attributes
     ----------
     baseURL : str
-        the base link in the form of a string that will be used to access the data
+        the base link in the form of a string that will be used to access the data (can be pointed at the local stand-in server with NEWS_API_URL in the .env file)
 
     payload : dict
         a dictionary of strings that lets you pass on specific arguments into the link (empty by default)
@@ -29,6 +32,12 @@ class NewsAPI(APIHandler.APIHandler):
     database : DatabaseHandler
         an instance of the DatabaseHandler class
 
+    rateLimiter : RateLimiter
+        spreads the daily request quota of the news API across the day (shared by every instance)
+
+    newsPolicy : dict
+        the timeout/retry settings of the news API (which only retries once, since every retry uses up quota), registered in the shared hostPolicies under the host of baseURL
+
     Methods
     -------
     updateSources()
@@ -67,13 +76,22 @@ class NewsAPI(APIHandler.APIHandler):
     querySource(sourceName)
         Checks if a source is valid.
 
-    getTopHeadlines(country='', category='', sources='', query='')
+    getTopHeadlines(country='', category='', sources='', query='', priority='interactive')
         Gets the recent and latest headlines related to a query.
 
-    getEverything(query='', titleSearch='', sources='', domains='', exludeDomains='', fromDate='', toDate='', language='', sortBy='')
+    getEverything(query='', titleSearch='', sources='', domains='', exludeDomains='', fromDate='', toDate='', language='', sortBy='', priority='interactive')
         Gets ALL articles related to a query.
     """
 
+    # the quota settings can be overriden in the .env file (the default matches the free developer plan)
+    rateLimiter = RateLimiter(
+        int(os.getenv('NEWS_API_DAILY_QUOTA', 100)),
+        burst=int(os.getenv('NEWS_API_BURST', 10)),
+        reserveFraction=float(os.getenv('NEWS_API_RESERVE', 0.2))
+    )
+
+    newsPolicy = {**APIHandler.APIHandler.defaultPolicy, 'retries': 1} # every retry uses up quota, so failed requests are only retried once
+
     def __init__(self):
         """
         Parameters
@@ -82,9 +100,13 @@ class NewsAPI(APIHandler.APIHandler):
         """
 
         self.apiKey = os.getenv('NEWS_API_KEY') # environment variable is used for security purposes
+        self.baseURL = os.getenv('NEWS_API_URL', 'https://newsapi.org').rstrip('/') # environment variable so it can be pointed at the local stand-in server
         self.database = DatabaseHandler() # initialize an instance of the DatabaseHandler class
         super().__init__() # inherit from parent class
 
+        # kept with every other host's policy (so it shows up in getBreakerStats), under whichever host the news API is at
+        self.hostPolicies.setdefault(urlparse(self.baseURL).hostname, HostPolicy(**self.newsPolicy))
+
     async def updateSources(self):
         '''Updates the list of sources within the database.
 
@@ -102,7 +124,7 @@ class NewsAPI(APIHandler.APIHandler):
         ...
         '''
 
-        sources = await self.getAPI('https://newsapi.org/v2/sources?', headers={'X-Api-Key':self.apiKey}) # grabs api
+        sources = await self.getAPI(f'{self.baseURL}/v2/sources?', headers={'X-Api-Key':self.apiKey}, priority='background') # grabs api (as a background request, so it is shed first when the quota runs low)
         sourcesList = sources['sources'] # gets all the sources
 
         # iterates through each source and grabs the id, name, description, url, category, language, and country
@@ -401,7 +423,7 @@ class NewsAPI(APIHandler.APIHandler):
         else:
             return None
 
-    async def getTopHeadlines(self, country='', category='', sources='', query=''):
+    async def getTopHeadlines(self, country='', category='', sources='', query='', priority='interactive'):
         '''Gets the recent and latest headlines related to a query.
 
         Parameters
@@ -418,6 +440,9 @@ class NewsAPI(APIHandler.APIHandler):
         query : str
             a key-word or phrase to look for in articles
 
+        priority : str
+            'interactive' (default) for requests made by users, 'background' for prefetches (which are shed first when the quota runs low)
+
         Returns
         -------
         dict
@@ -427,6 +452,9 @@ class NewsAPI(APIHandler.APIHandler):
         ------
         ValueError
             if the category, sources are invalid OR if you have a source with either a country or category OR if you all paramters are blank.
+
+        RateLimitError
+            if the request would go over the rate limit or the daily quota
         '''
         search = {'country':country, 'category':category, 'sources':sources, 'q':query} # puts all parameters in dictionary
         filter = {key: value async for (key, value) in aiter(search.items()) if value} # removes keys that contain empty string as value
@@ -461,10 +489,10 @@ class NewsAPI(APIHandler.APIHandler):
         if not country and not category and not sources and not query:
             raise ValueError('You need at least one of the required parameters! [country, category, sources, query]')
 
-        articles = await self.getAPI('https://newsapi.org/v2/top-headlines?', {**filter, 'pageSize':100}, {'X-Api-Key':self.apiKey}) # grabs all articles
+        articles = await self.getAPI(f'{self.baseURL}/v2/top-headlines?', {**filter, 'pageSize':100}, {'X-Api-Key':self.apiKey}, priority) # grabs all articles
         return articles
 
-    async def getEverything(self, query='', titleSearch='', sources='', domains='', exludeDomains='', fromDate='', toDate='', language='', sortBy=''):
+    async def getEverything(self, query='', titleSearch='', sources='', domains='', exludeDomains='', fromDate='', toDate='', language='', sortBy='', priority='interactive'):
         '''Gets ALL articles related to a query.
 
         Parameters
@@ -496,6 +524,9 @@ class NewsAPI(APIHandler.APIHandler):
         sortBy : str
             a specifier how the articles will be sorted (relevancy, popularity, publishedAt)
 
+        priority : str
+            'interactive' (default) for requests made by users, 'background' for prefetches (which are shed first when the quota runs low)
+
         Returns
         -------
         dict
@@ -505,6 +536,9 @@ class NewsAPI(APIHandler.APIHandler):
         ------
         ValueError
             if the language, sources are invalid OR if the toDate is greater than the fromDate OR if you all paramters are blank.
+
+        RateLimitError
+            if the request would go over the rate limit or the daily quota
         '''
         search = {'q':query, 'qInTitle':titleSearch, 'sources':sources, 'domains':domains, 'excludeDomains':exludeDomains, 'from':fromDate, 'to':toDate, 'language':language, 'sortBy':sortBy} # maps the values of the parameters to a dictionary
         filter = {key: value async for (key, value) in aiter(search.items()) if value} # for every key value pair in the filter, add it to the dictionary if the value is not an empty string
@@ -556,7 +590,7 @@ class NewsAPI(APIHandler.APIHandler):
         if not query and not titleSearch and not sources and not domains:
             raise ValueError('You need at least one of the required parameters! [query, titleSearch, sources, domains]')
 
-        articles = await self.getAPI('https://newsapi.org/v2/everything?', {**filter, 'pageSize':100}, {'X-Api-Key':self.apiKey}) # grabs all articles related to the query
+        articles = await self.getAPI(f'{self.baseURL}/v2/everything?', {**filter, 'pageSize':100}, {'X-Api-Key':self.apiKey}, priority) # grabs all articles related to the query
         return articles
 
 '''
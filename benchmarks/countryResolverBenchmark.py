@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import random
+import time
+from api.countryResolver import CountryResolver
+from standIn.standInServer import loadFixture
+from utils.asyncOperations import aiter
+
+'''
+Compares looking up a country in the CountryResolver index against the linear scan getCountryCode used to do
+(rebuilding the list of countries and walking it with aiter on every lookup).
+
+The countries come from the stand-in fixtures, padded out with made up ones to about the size of the real list.
+
+USAGE (from the root of the project):
+python -m benchmarks.countryResolverBenchmark
+python -m benchmarks.countryResolverBenchmark --countries 250 --lookups 20000
+'''
+
+def makeCountries(count):
+    '''Returns the fixture countries followed by made up ones, count in total.'''
+
+    countries = loadFixture('countries.json')['data']
+    extra = [{'name': f'Country Number {i}', 'code': f'X{i}'} for i in range(max(count - len(countries), 0))]
+    return countries + extra
+
+async def linearScan(data, country):
+    '''The lookup getCountryCode did before the index (getCountries followed by a scan).'''
+
+    countryList = [{'name':data[i]['name'],'code':data[i]['code']} async for i in aiter(range(len(data)))]
+
+    async for c in aiter(countryList):
+        if c['name'] == country:
+            return c['code']
+    else:
+        return False
+
+async def main(args):
+    data = makeCountries(args.countries)
+    names = [country['name'] for country in data]
+    queries = [random.choice(names) for _ in range(args.lookups)]
+
+    start = time.perf_counter()
+    for query in queries:
+        await linearScan(data, query)
+    scanTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    resolver = CountryResolver(data)
+    buildTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for query in queries:
+        resolver.resolve(query)
+    indexTime = time.perf_counter() - start
+
+    # the fuzzy fallback only runs on misses, so it is timed on its own with misspelled real names (the made up ones all look alike)
+    realNames = [country['name'] for country in loadFixture('countries.json')['data'] if len(country['name']) > 4]
+    typos = [random.choice(realNames)[:-1] + 'x' for _ in range(args.lookups // 10)]
+    start = time.perf_counter()
+    for query in typos:
+        resolver.resolve(query, fuzzy=True)
+    fuzzyTime = time.perf_counter() - start
+
+    print(f'{len(data)} countries, {args.lookups} lookups')
+    print(f'  linear scan   {scanTime / args.lookups * 1e6:9.2f}us per lookup')
+    print(f'  index         {indexTime / args.lookups * 1e6:9.2f}us per lookup ({scanTime / indexTime:.0f}x faster, built once in {buildTime * 1000:.2f}ms)')
+    print(f'  fuzzy (miss)  {fuzzyTime / max(len(typos), 1) * 1e6:9.2f}us per lookup')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the country index against the old linear scan.')
+    parser.add_argument('--countries', type=int, default=250, help='number of countries in the list')
+    parser.add_argument('--lookups', type=int, default=10000, help='number of lookups timed')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,92 @@
+import aiohttp
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from aiohttp import web
+from api import covidAPI
+from utils import jsonCodec
+from utils.jsonStream import decodeProjected
+
+'''
+Compares the peak memory (and time) of decoding a large /timeline response with r.json()
+against the streaming decoder that CovidAPI uses to keep only the fields it needs (which decodes the
+items with the selected json codec, so JSON_CODEC=json measures it without orjson or ujson).
+
+USAGE (from the root of the project):
+python -m benchmarks.decodeMemoryBenchmark
+python -m benchmarks.decodeMemoryBenchmark --days 20000
+'''
+
+def makeTimeline(days):
+    '''Builds a /timeline response shaped like corona-api's (with every field it sends).'''
+
+    data = [{
+        'updated_at': '2021-01-01T04:20:53.000Z',
+        'date': f'{2020 + i // 365}-{(i // 28) % 12 + 1:02d}-{i % 28 + 1:02d}',
+        'deaths': 1000 + i,
+        'confirmed': 50000 + i * 10,
+        'recovered': 30000 + i * 5,
+        'active': 19000 + i * 4,
+        'new_confirmed': 10 + i % 7,
+        'new_recovered': 5 + i % 3,
+        'new_deaths': i % 2,
+        'is_in_progress': False
+    } for i in range(days)]
+
+    return json.dumps({'data': data, '_cacheHit': True}).encode()
+
+async def startLocalServer(body):
+    async def handler(request):
+        return web.Response(body=body, content_type='application/json')
+
+    app = web.Application()
+    app.router.add_get('/timeline', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}/timeline'
+
+async def decodeWhole(session, url):
+    async with session.get(url) as r:
+        return await r.json()
+
+async def decodeStreamed(session, url):
+    arrayKey, fields = covidAPI.CovidAPI.streamedEndpoints['/timeline']
+    async with session.get(url) as r:
+        data, size = await decodeProjected(r.content, arrayKey, fields)
+        return data
+
+async def measure(name, decode, session, url):
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = await decode(session, url)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'{name:<10} peak {peak / 1024 ** 2:8.2f}MB | kept {current / 1024 ** 2:8.2f}MB | {elapsed * 1000:8.2f}ms')
+    return data
+
+async def main(args):
+    body = makeTimeline(args.days)
+    runner, url = await startLocalServer(body)
+    print(f'/timeline with {args.days} days ({len(body) / 1024 ** 2:.2f}MB), streamed items decoded with {jsonCodec.codec.name}\n')
+
+    async with aiohttp.ClientSession() as session:
+        await decodeWhole(session, url) # warms up the connection so it isn't counted
+
+        whole = await measure('r.json()', decodeWhole, session, url)
+        del whole
+        streamed = await measure('streamed', decodeStreamed, session, url)
+
+    assert len(streamed['data']) == args.days
+    await runner.cleanup()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the peak memory of decoding /timeline as a whole against the streaming decoder.')
+    parser.add_argument('--days', type=int, default=50000, help='number of days in the generated timeline')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,95 @@
+import argparse
+import io
+import time
+import numpy as np
+from matplotlib import pyplot as plt
+from utils import graphRenderer
+
+'''
+Compares the CPU time of a render with the figure templates of utils.graphRenderer (built once, only the data
+swapped in) against building every graph from scratch through pyplot, the way the graphs used to be drawn.
+
+USAGE (from the root of the project):
+python -m benchmarks.graphTemplateBenchmark
+python -m benchmarks.graphTemplateBenchmark --renders 50 --days 1000
+'''
+
+def pyplotTimelineGraph(title, yLabel, dates, values, graphType):
+    '''The timeline graph as it was drawn before the templates (a new figure through pyplot every time).'''
+
+    fig, ax = plt.subplots()
+    ax.ticklabel_format(style='plain', axis='y')
+
+    if graphType == 'line':
+        ax.plot(dates, values)
+    elif graphType == 'bar':
+        ax.bar(dates, values)
+    else:
+        ax.scatter(dates, values)
+
+    ax.set_title(title)
+    ax.set_xlabel('Dates')
+    ax.set_ylabel(yLabel)
+    fig.autofmt_xdate()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    plt.close(fig)
+    return buffer.getvalue()
+
+def pyplotDateGraph(title, stats, graphType):
+    '''The date graph as it was drawn before the templates.'''
+
+    if graphType == 'bar':
+        plt.bar(['deaths', 'confirmed', 'recovered', '(new) confirmed', '(new) recovered', '(new) deaths', 'active'], stats)
+        plt.xticks(rotation=15)
+        plt.tick_params(axis='x', which='major', labelsize=7)
+        plt.ticklabel_format(style='plain', axis='y')
+        plt.title(title)
+        plt.xlabel('Statistics')
+        plt.ylabel('Cases')
+    else:
+        pie = plt.pie(stats, startangle=90)
+        plt.legend(pie[0], [str(stat) for stat in stats], bbox_to_anchor=(-0.5,0.5), title=title, loc='center left')
+        plt.axis('equal')
+        plt.title(title)
+
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', bbox_inches='tight')
+    plt.close()
+    return buffer.getvalue()
+
+def measure(function, renders, *args):
+    '''Returns the average CPU time of a render in milliseconds (after one render to warm up).'''
+
+    function(*args)
+    start = time.process_time()
+    for _ in range(renders):
+        function(*args)
+    return (time.process_time() - start) / renders * 1000
+
+def main(args):
+    dates = np.arange(np.datetime64('2021-01-10') - args.days + 1, np.datetime64('2021-01-11'))
+    values = np.cumsum(np.random.default_rng(0).integers(0, 1000, args.days)).astype(float)
+    stats = [3000, 200000, 150000, 4000, 3000, 50, 47000]
+
+    print(f'{args.renders} renders each, {args.days} day timelines (CPU time per render)\n')
+
+    cases = [
+        (f'timeline {graphType}', pyplotTimelineGraph, graphRenderer.renderTimelineGraph, ('# of Confirmed Cases Over Time', 'Cases', dates, values, graphType))
+        for graphType in ['line', 'bar', 'scatter']
+    ] + [
+        (f'date {graphType}', pyplotDateGraph, graphRenderer.renderDateGraph, ('Statistics for Japan on January 1 2021', stats, graphType))
+        for graphType in ['bar', 'pie']
+    ]
+
+    for name, before, after, renderArgs in cases:
+        beforeTime = measure(before, args.renders, *renderArgs)
+        afterTime = measure(after, args.renders, *renderArgs)
+        print(f'{name:<18} pyplot {beforeTime:7.1f}ms | template {afterTime:7.1f}ms | {beforeTime / afterTime:4.2f}x')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the figure templates against drawing every graph through pyplot.')
+    parser.add_argument('--renders', type=int, default=20, help='number of renders of each graph')
+    parser.add_argument('--days', type=int, default=365, help='number of days in the timeline graphs')
+    main(parser.parse_args())
@@ -0,0 +1,73 @@
+import argparse
+import json
+import time
+from benchmarks.decodeMemoryBenchmark import makeTimeline
+from utils import jsonCodec
+
+'''
+Decodes (and encodes) a /timeline and a newsapi /v2/everything payload with every json backend that is installed.
+
+Recorded responses can be passed in with --timeline and --everything, otherwise payloads shaped like them are generated.
+
+USAGE (from the root of the project):
+python -m benchmarks.jsonCodecBenchmark
+python -m benchmarks.jsonCodecBenchmark --timeline recorded/timeline.json --everything recorded/everything.json
+'''
+
+def makeEverything(articles):
+    '''Builds a /v2/everything response shaped like newsapi.org's.'''
+
+    data = [{
+        'source': {'id': 'cbc-news', 'name': 'CBC News'},
+        'author': 'CBC News',
+        'title': f'COVID-19 update number {i}: what you need to know today',
+        'description': 'The latest on the coronavirus pandemic, including case counts, vaccine rollout and restrictions. ' * 2,
+        'url': f'https://www.cbc.ca/news/canada/covid-19-update-{i}-1.5861234',
+        'urlToImage': f'https://i.cbc.ca/1.5861234.1610000000!/image_{i}.jpg',
+        'publishedAt': '2021-01-05T12:34:56Z',
+        'content': 'Health officials reported new cases of COVID-19 on Tuesday as hospitals… [+4213 chars]'
+    } for i in range(articles)]
+
+    return json.dumps({'status': 'ok', 'totalResults': articles, 'articles': data}).encode()
+
+def timeIt(function, argument, repeat):
+    best = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+def main(args):
+    payloads = {
+        '/timeline': open(args.timeline, 'rb').read() if args.timeline else makeTimeline(args.days),
+        '/v2/everything': open(args.everything, 'rb').read() if args.everything else makeEverything(args.articles)
+    }
+
+    for endpoint, payload in payloads.items():
+        print(f'{endpoint} ({len(payload) / 1024:.0f}KB)')
+        baseline = None
+
+        for name in jsonCodec.getAvailableCodecs()[::-1]: # the standard library first, so it is the baseline
+            codec = jsonCodec.getCodec(name)
+            decoded = codec.loads(payload)
+            decodeTime = timeIt(codec.loads, payload, args.repeat)
+            encodeTime = timeIt(codec.dumps, decoded, args.repeat)
+            baseline = baseline or decodeTime
+
+            print(f'  {name:<8} decode {decodeTime * 1000:8.2f}ms ({baseline / decodeTime:5.2f}x) | encode {encodeTime * 1000:8.2f}ms')
+
+        print()
+
+    print(f'default codec: {jsonCodec.codec.name}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark every installed json backend on COVID and news payloads.')
+    parser.add_argument('--timeline', default='', help='path to a recorded /timeline response')
+    parser.add_argument('--everything', default='', help='path to a recorded /v2/everything response')
+    parser.add_argument('--days', type=int, default=5000, help='number of days in the generated timeline')
+    parser.add_argument('--articles', type=int, default=100, help='number of articles in the generated /v2/everything response')
+    parser.add_argument('--repeat', type=int, default=20, help='number of times each decode/encode is timed (the best time is kept)')
+    main(parser.parse_args())
@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import os
+import time
+from standIn.standInServer import StandInServer
+from utils.renderPool import RenderPool
+
+'''
+Measures N concurrent ?timelineGraph calls (against the stand-in server) with the graphs drawn on the event loop,
+the way they were before, and with them drawn in the render pool. Along with the throughput it measures
+how long the event loop was frozen at worst, which is how long heartbeats and every other command were kept waiting.
+
+USAGE (from the root of the project):
+python -m benchmarks.renderPoolBenchmark
+python -m benchmarks.renderPoolBenchmark --calls 32 --workers 4 --scale 10
+'''
+
+async def measureStalls(stop, stalls, interval=0.01):
+    '''Wakes up every interval seconds and records how late it was (how long the loop couldn't run anything else).'''
+
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - start - interval)
+
+async def run(client, name, calls):
+    stop = asyncio.Event()
+    stalls = []
+    monitor = asyncio.ensure_future(measureStalls(stop, stalls))
+
+    # every call asks for a different graph, so none of them are coalesced
+    countries = ['global', 'USA', 'Japan', 'India', 'Brazil', 'Germany']
+    statistics = ['new_confirmed', 'new_deaths', 'new_recovered', 'confirmed', 'deaths', 'recovered', 'active']
+    start = time.perf_counter()
+    await asyncio.gather(*[client.getTimelineGraph(countries[i % len(countries)], statistics[i // len(countries) % len(statistics)], 'line') for i in range(calls)])
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await monitor
+
+    stats = client.getRenderStats()
+    print(f'{name:<20} total {elapsed:6.2f}s | {calls / elapsed:6.2f} graphs/s | worst loop stall {max(stalls) * 1000:8.1f}ms | max queue depth {stats["maxQueueDepth"]}')
+
+async def main(args):
+    server = StandInServer(port=0, scale=args.scale)
+    os.environ['COVID_API_URL'] = await server.start()
+    os.environ['API_CACHE_PATH'] = ''
+    os.environ['COVID_STORE_PATH'] = ''
+    os.environ['GRAPH_CACHE_MEMORY_BYTES'] = '0' # every graph is rendered, never served from the graph cache
+
+    from api import APIHandler, covidAPI
+    await APIHandler.APIHandler.startSession()
+    client = covidAPI.CovidAPI()
+
+    try:
+        # the timelines are fetched once first, so only the rendering is measured
+        for country in ['global', 'USA', 'Japan', 'India', 'Brazil', 'Germany']:
+            await client.getColumnarTimeline(country)
+
+        print(f'{args.calls} concurrent ?timelineGraph calls\n')
+
+        client.renderPool = RenderPool(workers=0)
+        await run(client, 'on the event loop', args.calls)
+
+        client.renderPool = RenderPool(workers=args.workers)
+        await client.renderPool.start() # starts the workers, like a warmed up bot would have
+        client.renderPool.stats['maxQueueDepth'] = 0
+        await run(client, f'{args.workers} render workers', args.calls)
+        client.renderPool.shutdown()
+    finally:
+        await APIHandler.APIHandler.closeSession()
+        await server.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark graphs rendered on the event loop against the render pool.')
+    parser.add_argument('--calls', type=int, default=16, help='number of concurrent ?timelineGraph calls')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='number of render workers')
+    parser.add_argument('--scale', type=int, default=5, help='how many times longer the stand-in timelines are')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,61 @@
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import time
+import numpy as np
+from utils.renderPool import RenderPool, RenderTimeoutError
+
+'''
+Checks that a render that hangs doesn't leak a worker: the render times out, the workers of the old pool are
+killed rather than left to finish it, only the new pool's workers are left running, and the next graph is drawn
+by them. The hung render is a bar graph with a bar for every day of a very long timeline, which takes far longer
+than the timeout to draw.
+
+Exits with 1 if any worker of the old pool is still alive afterwards.
+
+USAGE (from the root of the project):
+python -m benchmarks.renderTimeoutCheck
+python -m benchmarks.renderTimeoutCheck --workers 4 --timeout 2 --days 60000
+'''
+
+def timeline(days):
+    dates = np.arange(np.datetime64('2021-01-10') - days + 1, np.datetime64('2021-01-11'))
+    return dates, np.arange(days, dtype=float)
+
+async def main(args):
+    pool = RenderPool(workers=args.workers, timeout=args.timeout)
+    await pool.start() # the workers are warmed up, so only the hung render runs into the timeout
+    oldWorkers = list(pool.executor._processes.values())
+
+    start = time.perf_counter()
+    try:
+        await pool.render('renderTimelineGraph', 'Hung render', 'Cases', *timeline(args.days), 'bar')
+        print('the render finished before the timeout, use more --days')
+        return 1
+    except RenderTimeoutError:
+        print(f'render timed out after {time.perf_counter() - start:.2f}s (timeout {args.timeout}s)')
+
+    # the old workers are given a moment to exit once they've been terminated
+    deadline = time.perf_counter() + args.grace
+    while any(worker.is_alive() for worker in oldWorkers) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+
+    leaked = [worker.pid for worker in oldWorkers if worker.is_alive()]
+    print(f'old workers still alive after {args.grace}s: {len(leaked)} {leaked if leaked else ""}')
+
+    await pool.start() # the new workers import matplotlib first, which could take longer than a short timeout on its own
+    image = await pool.render('renderTimelineGraph', 'After the timeout', 'Cases', *timeline(60), 'line')
+    print(f'next render: {len(image)} byte PNG | worker processes running: {len(multiprocessing.active_children())} (pool size {args.workers})')
+    print(f'stats: {pool.getStats()}')
+
+    pool.shutdown()
+    return 1 if leaked else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check that a hung render is killed instead of leaking a worker process.')
+    parser.add_argument('--workers', type=int, default=2, help='number of render workers')
+    parser.add_argument('--timeout', type=float, default=1, help='render timeout (in seconds)')
+    parser.add_argument('--days', type=int, default=40000, help='number of bars in the hung render')
+    parser.add_argument('--grace', type=float, default=5, help='how long (in seconds) the old workers have to exit')
+    sys.exit(asyncio.run(main(parser.parse_args())))
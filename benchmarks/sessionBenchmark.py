@@ -0,0 +1,99 @@
+import aiohttp
+import argparse
+import asyncio
+import statistics
+import time
+from aiohttp import web
+from api import APIHandler
+
+'''
+Compares opening a new aiohttp.ClientSession for every request (the old behaviour of APIHandler.getAPI)
+against the shared, pooled session that APIHandler now keeps open.
+
+USAGE (from the root of the project):
+python -m benchmarks.sessionBenchmark
+python -m benchmarks.sessionBenchmark --url https://corona-api.com/countries/ca --requests 50
+'''
+
+async def startLocalServer():
+    '''Starts a tiny local server that returns a small json payload (used when no url is given).'''
+
+    async def handler(request):
+        return web.json_response({'data': {'name': 'Canada', 'code': 'CA'}})
+
+    app = web.Application()
+    app.router.add_get('/countries/ca', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}/countries/ca'
+
+async def perRequestSession(url, requests, concurrency):
+    '''Opens (and closes) a brand new session for every single request.'''
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def fetch():
+        async with semaphore:
+            start = time.perf_counter()
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url) as r:
+                    await r.json()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[fetch() for _ in range(requests)])
+    return latencies
+
+async def pooledSession(url, requests, concurrency):
+    '''Sends every request through the shared session owned by APIHandler.'''
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    session = await APIHandler.APIHandler.startSession()
+
+    async def fetch():
+        async with semaphore:
+            start = time.perf_counter()
+            async with session.get(url) as r:
+                await r.json()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[fetch() for _ in range(requests)])
+    return latencies
+
+def report(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f'{name:<22} total {elapsed:7.3f}s | mean {statistics.mean(latencies) * 1000:7.2f}ms | p50 {p50:7.2f}ms | p99 {p99:7.2f}ms')
+
+async def main(args):
+    runner = None
+    url = args.url
+
+    if not url:
+        runner, url = await startLocalServer()
+
+    print(f'{args.requests} requests to {url} ({args.concurrency} at a time)\n')
+
+    start = time.perf_counter()
+    latencies = await perRequestSession(url, args.requests, args.concurrency)
+    report('per-request session', latencies, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    latencies = await pooledSession(url, args.requests, args.concurrency)
+    report('pooled session', latencies, time.perf_counter() - start)
+    await APIHandler.APIHandler.closeSession()
+
+    if runner:
+        await runner.cleanup()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark per-request sessions against the pooled APIHandler session.')
+    parser.add_argument('--url', default='', help='url to request (a local server is started if left blank)')
+    parser.add_argument('--requests', type=int, default=500, help='number of requests to send')
+    parser.add_argument('--concurrency', type=int, default=10, help='number of requests in flight at once')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,59 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+'''
+Measures how long the bot's imports take now that matplotlib is only imported by the render workers, against
+importing it up front with pyplot (the way api/covidAPI.py used to), and how long a render worker takes to
+warm up with the font cache already built and with a cold one (the first start on a new machine).
+
+Each measurement runs in a new interpreter, so nothing is already imported.
+
+USAGE (from the root of the project):
+python -m benchmarks.startupBenchmark
+python -m benchmarks.startupBenchmark --runs 10
+'''
+
+# what bot/main.py imports before it can connect, with and without pyplot in front of it
+lazyImports = 'from api import APIHandler, covidAPI, newsAPI'
+eagerImports = 'import matplotlib; from matplotlib import pyplot; import matplotlib.dates; ' + lazyImports
+
+def timeCode(code, runs, environment=None):
+    '''Runs code in a new interpreter runs times and returns how long it took each time (in seconds).'''
+
+    script = f'import time; start = time.perf_counter(); {code}; print(time.perf_counter() - start)'
+    times = []
+
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True, env=environment)
+        times.append(float(output.stdout.strip().splitlines()[-1]))
+
+    return times
+
+def report(name, times):
+    print(f'{name:<36} median {statistics.median(times) * 1000:8.1f}ms | best {min(times) * 1000:8.1f}ms')
+
+def main(args):
+    environment = {**os.environ, 'PYTHONPATH': os.getcwd()}
+
+    print(f'{args.runs} runs each\n')
+    report('imports (matplotlib up front)', timeCode(eagerImports, args.runs, environment))
+    report('imports (matplotlib in the workers)', timeCode(lazyImports, args.runs, environment))
+
+    # what a render worker does once it starts, off the bot's way to being ready
+    report('worker warm up', timeCode('from utils import renderPool; renderPool.warmUp()', args.runs, environment))
+
+    with tempfile.TemporaryDirectory() as configDirectory:
+        coldTimes = []
+        for run in range(args.runs):
+            runEnvironment = {**environment, 'MPLCONFIGDIR': os.path.join(configDirectory, str(run))} # no font cache to load, so it's built
+            coldTimes += timeCode('from utils import renderPool; renderPool.warmUp()', 1, runEnvironment)
+        report('worker warm up (cold font cache)', coldTimes)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the startup time of the bot with and without matplotlib imported up front.')
+    parser.add_argument('--runs', type=int, default=5, help='number of times each measurement is made')
+    main(parser.parse_args())
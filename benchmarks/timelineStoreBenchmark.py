@@ -0,0 +1,62 @@
+import argparse
+import shutil
+import tempfile
+import time
+from utils import jsonCodec
+from utils.columnarTimeline import ColumnarTimeline
+from utils.timelineStore import TimelineStore
+from benchmarks.decodeMemoryBenchmark import makeTimeline
+
+'''
+Measures how big the timeline store is on disk and how long a restarted bot takes to get its timelines back:
+mapping the store against decoding every (already downloaded) response and converting it to columns again.
+
+USAGE (from the root of the project):
+python -m benchmarks.timelineStoreBenchmark
+python -m benchmarks.timelineStoreBenchmark --countries 250 --days 1000
+'''
+
+def main(args):
+    payload = makeTimeline(args.days)
+    path = tempfile.mkdtemp()
+
+    try:
+        # fills the store the way the ingester does
+        store = TimelineStore(path)
+        start = time.perf_counter()
+        for i in range(args.countries):
+            store.save(f'C{i}', ColumnarTimeline.fromDays(jsonCodec.loads(payload)['data']))
+        store.flush()
+        saveTime = time.perf_counter() - start
+
+        # what a restart costs without the store (not counting the requests themselves)
+        start = time.perf_counter()
+        for i in range(args.countries):
+            ColumnarTimeline.fromDays(jsonCodec.loads(payload)['data'])
+        decodeTime = time.perf_counter() - start
+
+        # what a restart costs with it (a fresh store, so nothing is reused from above)
+        store = TimelineStore(path)
+        timelines = store.loadAll()
+        stats = store.getStats()
+
+        # the first query on a mapped timeline reads its pages from disk (or the OS cache)
+        start = time.perf_counter()
+        for timeline in timelines.values():
+            timeline.query(str(timeline.dates[len(timeline) // 2]))
+        queryTime = time.perf_counter() - start
+
+        print(f"{args.countries} countries x {args.days} days ({len(payload) * args.countries / 1024 ** 2:.1f}MB of json)")
+        print(f"  store on disk        {stats['bytes'] / 1024 ** 2:8.2f}MB")
+        print(f"  filling the store    {saveTime * 1000:8.1f}ms")
+        print(f"  decode + convert     {decodeTime * 1000:8.1f}ms")
+        print(f"  mapping the store    {stats['loadTime'] * 1000:8.1f}ms ({decodeTime / stats['loadTime']:.0f}x faster)")
+        print(f"  first query each     {queryTime * 1000:8.1f}ms")
+    finally:
+        shutil.rmtree(path)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the size and load time of the timeline store.')
+    parser.add_argument('--countries', type=int, default=250, help='number of country timelines stored')
+    parser.add_argument('--days', type=int, default=1000, help='number of days in each timeline')
+    main(parser.parse_args())
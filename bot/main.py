@@ -1,16 +1,45 @@
+import time
+startTime = time.perf_counter() # time-to-ready is measured from here
+
 import discord
 import os
 from discord import Embed
 from discord.ext import commands
 from typing import Union
-from api import covidAPI, newsAPI
+from api import APIHandler, covidAPI, newsAPI
 from utils.asyncOperations import *
+from utils.columnarTimeline import fields as timelineFields
+from utils.derivedMetrics import metrics as metricNames
+from utils.leaderboards import statistics as leaderboardNames
+from utils.rateLimiter import RateLimitError
 from dotenv import load_dotenv
 load_dotenv()
+importTime = time.perf_counter() - startTime # matplotlib isn't part of it, only the render workers import it
 
 # TODO: add documentation
 
-client = commands.Bot(command_prefix='?')
+class CovidBot(commands.Bot):
+    '''
+    The bot itself, extended so the shared API session is opened before connecting and closed on shutdown.
+    '''
+
+    async def start(self, *args, **kwargs):
+        await APIHandler.APIHandler.startSession() # opens the pooled HTTP session used by every API
+        covidClient.startSnapshotIngest() # keeps every country's latest statistics in memory, refreshed in the background
+
+        # maps the timelines saved on disk instead of refetching them, and keeps the store up to date in the background
+        storeStats = covidClient.loadStore()
+        print(f"Mapped {storeStats['timelines']} stored timelines ({storeStats['bytes'] / 1024:.0f}KB) in {storeStats['loadTime'] * 1000:.1f}ms")
+        covidClient.startStoreIngest()
+        await super().start(*args, **kwargs)
+
+    async def close(self):
+        await APIHandler.APIHandler.closeSession() # closes the pooled HTTP session and all of its connections
+        covidClient.renderPool.shutdown() # stops the graph render workers
+        covidClient.graphCache.close() # closes the rendered graphs spilled to disk (if they are)
+        await super().close()
+
+client = CovidBot(command_prefix='?')
 client.remove_command('help') # default built-in discord help command is removed to make way for the custom help command
 covidClient = covidAPI.CovidAPI()
 newsAPIClient = newsAPI.NewsAPI()
@@ -31,7 +60,7 @@ async def help(ctx):
 
     embed.add_field(
         name='__COVID-19 API__  :microbe:',
-        value='?covidCountries\n?countryStats\n?getDateStats\n?getTimeline\n?dateGraph\n?timelineGraph'
+        value='?covidCountries\n?countryStats\n?getDateStats\n?getRange\n?getMetrics\n?getTimeline\n?compare\n?leaderboard\n?dateGraph\n?timelineGraph'
     )
 
     embed.add_field(
@@ -168,6 +197,32 @@ async def getDateStats(ctx):
 
     await ctx.send(embed=embed)
 
+@help.command()
+async def getRange(ctx):
+    embed = discord.Embed(
+        title='?getRange',
+        description='Generates an embedded table summarizing the data for a country between two dates (totals, peaks, and averages).',
+        color=discord.Colour.blue()
+    )
+
+    embed.add_field(name='Syntax', value='?getRange `<country>` `<start date>` to `<end date>`')
+    embed.add_field(name='Example', value='?getRange `Japan` `December 1 2020` to `December 31 2020`')
+
+    await ctx.send(embed=embed)
+
+@help.command()
+async def getMetrics(ctx):
+    embed = discord.Embed(
+        title='?getMetrics',
+        description='Generates an embedded table containing the latest 7-day averages, growth rate, and doubling time for a country.',
+        color=discord.Colour.blue()
+    )
+
+    embed.add_field(name='Syntax', value='?getMetrics `<country>`')
+    embed.add_field(name='Example', value='?getMetrics `Italy`')
+
+    await ctx.send(embed=embed)
+
 @help.command()
 async def getTimeline(ctx):
     embed = discord.Embed(
@@ -181,6 +236,34 @@ async def getTimeline(ctx):
 
     await ctx.send(embed=embed)
 
+@help.command()
+async def compare(ctx):
+    embed = discord.Embed(
+        title='?compare',
+        description='Generates an embedded table comparing several countries, or a graph overlaying a statistic for them over time if one is given (line [default] or scatter).',
+        color=discord.Colour.blue()
+    )
+
+    embed.add_field(name='Syntax', value='?compare `<country>`, `<country>`, ... `<statistic (optional)>` `<graphType (optional)>`')
+    embed.add_field(name='Example 1', value='?compare `Canada`, `USA`, `Japan`')
+    embed.add_field(name='Example 2', value='?compare `Canada`, `USA`, `Japan` `new_confirmed`')
+
+    await ctx.send(embed=embed)
+
+@help.command()
+async def leaderboard(ctx):
+    embed = discord.Embed(
+        title='?leaderboard',
+        description='Generates an embedded table of the countries with the highest values of a statistic (can choose from: cases_per_million, death_rate, new_cases, growth_rate).',
+        color=discord.Colour.blue()
+    )
+
+    embed.add_field(name='Syntax', value='?leaderboard `<statistic>` `<number of countries (optional)>`')
+    embed.add_field(name='Example 1', value='?leaderboard `death_rate`')
+    embed.add_field(name='Example 2', value='?leaderboard `cases_per_million` `20`')
+
+    await ctx.send(embed=embed)
+
 @help.command()
 async def dateGraph(ctx):
     embed = discord.Embed(
@@ -199,7 +282,7 @@ async def dateGraph(ctx):
 async def timelineGraph(ctx):
     embed = discord.Embed(
         title='?timelineGraph',
-        description='Generates an graph (line [default], bar, and scatter) containing data for a statistic in a country over time (can choose from: deaths, confirmed, recovered, active, new_confirmed, new_recovered, new_deaths).',
+        description='Generates an graph (line [default], bar, and scatter) containing data for a statistic in a country over time (can choose from: deaths, confirmed, recovered, active, new_confirmed, new_recovered, new_deaths, new_confirmed_7day_avg, new_deaths_7day_avg, new_recovered_7day_avg, growth_rate, doubling_time).',
         color=discord.Colour.blue()
     )
 
@@ -211,7 +294,8 @@ async def timelineGraph(ctx):
 
 @client.event
 async def on_ready():
-    print('Bot is online!')
+    print(f'Bot is online! (ready in {time.perf_counter() - startTime:.2f}s, {importTime:.2f}s of it spent importing)')
+    covidClient.renderPool.start() # the render workers load matplotlib and the font cache now, off the way to being ready
 
 # general error handling
 @client.event
@@ -269,8 +353,9 @@ async def covidCountries(ctx):
 async def countryStats(ctx, *args):
     if args:
         country = ' '.join(args)
-        code = await covidClient.getCountryCode(country)
-        if code:
+        match = await covidClient.resolveCountry(country, fuzzy=True) # accepts codes, aliases, and small typos
+        if match:
+            country, code = match['name'], match['code']
             stats = await covidClient.getCountryStats(country)
 
             embed = discord.Embed(
@@ -279,27 +364,7 @@ async def countryStats(ctx, *args):
                 color=discord.Colour.blue()
             )
 
-            population = stats['population']
-            deaths_td = stats['today']['deaths']
-            confirmed_td = stats['today']['confirmed']
-            deathsTotal = stats['latest_data']['deaths']
-            confirmedTotal = stats['latest_data']['confirmed']
-            recoveredTotal = stats['latest_data']['recovered']
-            critical = stats['latest_data']['critical']
-            deathRate = stats['latest_data']['calculated']['death_rate']
-            recoveryRate = stats['latest_data']['calculated']['recovery_rate']
-            recover_vs_dead = stats['latest_data']['calculated']['recovered_vs_death_ratio']
-            casesPerMillion = stats['latest_data']['calculated']['cases_per_million_population']
-
-            formatStats = [population, deaths_td, confirmed_td, deathsTotal, confirmedTotal, recoveredTotal, critical, deathRate, recoveryRate, recover_vs_dead, casesPerMillion]
-
-            async for i in aiter(range(len(formatStats))):
-                if formatStats[i] is None:
-                    formatStats[i] = 'N/A'
-
-            async for i in aiter(range(7, 10)):
-                if formatStats[i] != 'N/A':
-                    formatStats[i] = '{:.2f}'.format(formatStats[i])
+            formatStats = stats.display # population, today's and total counts, then the rates (already formatted when the stats were ingested)
 
             embed.set_footer(text='data retrieved from: https://about-corona.net/')
             embed.set_thumbnail(url=f'https://www.countryflags.io/{code.lower()}/flat/64.png')
@@ -316,6 +381,15 @@ async def countryStats(ctx, *args):
             embed.add_field(name='Recovered/Death Ratio (%)', value=formatStats[9], inline=False)
             embed.add_field(name='Cases (Per Million)', value=formatStats[10], inline=False)
 
+            # ranked when the data was refreshed, so this is only a lookup
+            percentiles = covidClient.getPercentiles(code)
+            if percentiles:
+                embed.add_field(
+                    name='Percentiles (Among All Countries)',
+                    value='\n'.join(f'{leaderboardNames[statistic]}: #{rank} (percentile: {percentile:.0f})' for statistic, (rank, percentile) in percentiles.items()),
+                    inline=False
+                )
+
             await ctx.send(embed=embed)
         else:
             embed = discord.Embed(
@@ -470,19 +544,10 @@ async def getTimeline(ctx, *args):
 @client.command()
 async def getDateStats(ctx, *args):
     if args:
-        countryList = await covidClient.getCountries()
-        countries = [country['name'] async for country in aiter(countryList)]
+        queryCountry, queryDate = await covidClient.parseCountry(' '.join(args))
+        country = queryCountry
 
-        data = ' '.join(args)
-
-        async for country in aiter(countries):
-            if country in data:
-                queryCountry = country
-                break
-
-        queryDate = data.replace(f'{queryCountry} ', '')
-
-        dateStats = await covidClient.queryDate(queryCountry, queryDate)
+        dateStats = await covidClient.queryDate(queryCountry, queryDate) if queryCountry else False
 
         if dateStats:
             date = dateStats['date']
@@ -529,23 +594,206 @@ async def getDateStats(ctx, *args):
     else:
         await ctx.send("Please pass in the required arguments.")
 
+@client.command()
+async def getRange(ctx, *args):
+    if args:
+        queryCountry, dates = await covidClient.parseCountry(' '.join(args))
+        queryStart, _, queryEnd = dates.partition(' to ')
+
+        rangeStats = await covidClient.queryDateRange(queryCountry, queryStart, queryEnd) if queryCountry and queryEnd else False
+
+        if rangeStats:
+            summary = rangeStats.summarize() # totals, peaks, and averages of the whole range at once
+
+            embed = discord.Embed(
+                title=f'Statistics from {queryStart} to {queryEnd}',
+                description=f"Summarizing all COVID-19 related statistics for {queryCountry} over {summary['days']} days ({summary['start']} to {summary['end']})",
+                color=discord.Colour.blue()
+            )
+
+            embed.set_footer(text='data retrieved from: https://about-corona.net/')
+
+            if queryCountry.lower() != 'global':
+                code = await covidClient.getCountryCode(queryCountry)
+                embed.set_thumbnail(url=f'https://www.countryflags.io/{code.lower()}/flat/64.png')
+
+            embed.add_field(name='Country Name', value=queryCountry, inline=False)
+
+            # new cases, recoveries, and deaths are added up over the range, the totals are shown as they were at the end of it
+            for name, field in [('Confirmed (New)', 'new_confirmed'), ('Recovered (New)', 'new_recovered'), ('Deaths (New)', 'new_deaths')]:
+                stat = summary[field]
+                value = 'N/A' if stat is None else f"{stat['total']} total\n{stat['average']:.1f} per day\npeak of {stat['peak']} on {stat['peakDate']}"
+                embed.add_field(name=name, value=value)
+
+            for name, field in [('Confirmed (Total)', 'confirmed'), ('Deaths (Total)', 'deaths'), ('Recovered (Total)', 'recovered'), ('Active', 'active')]:
+                stat = summary[field]
+                value = 'N/A' if stat is None else f"{stat['first']} → {stat['last']}\npeak of {stat['peak']} on {stat['peakDate']}"
+                embed.add_field(name=name, value=value)
+
+            await ctx.send(embed=embed)
+        else:
+            embed = discord.Embed(
+                title=f'Statistics from {queryStart} to {queryEnd}',
+                description='No data could be provided...',
+                color=discord.Colour.blue()
+            )
+
+            embed.add_field(name='No Data', value='No data could be provided with this query, sorry!', inline=False)
+
+            await ctx.send(embed=embed)
+    else:
+        await ctx.send("Please pass in the required arguments.")
+
+@client.command()
+async def getMetrics(ctx, *args):
+    if args:
+        queryCountry = ' '.join(args)
+        countryMetrics = await covidClient.getMetrics(queryCountry) if await covidClient.getTimelineKey(queryCountry) else None
+
+        # only shown if at least one of the metrics is known (timelines shorter than a week have none)
+        if countryMetrics and any(countryMetrics.values()):
+            embed = discord.Embed(
+                title=f'Trends in {queryCountry}',
+                description=f'7-day averages and growth of COVID-19 cases in {queryCountry}',
+                color=discord.Colour.blue()
+            )
+
+            embed.set_footer(text='data retrieved from: https://about-corona.net/')
+
+            if queryCountry.lower() != 'global':
+                code = await covidClient.getCountryCode(queryCountry)
+                embed.set_thumbnail(url=f'https://www.countryflags.io/{code.lower()}/flat/64.png')
+
+            # growth rates are shown as percentages and doubling times in days, everything else as cases per day
+            for metric, title in metricNames.items():
+                latest = countryMetrics[metric]
+                if latest is None:
+                    value = 'N/A'
+                elif metric == 'growth_rate':
+                    value = f'{latest[1]:.2f}% per day\n(as of {latest[0]})'
+                elif metric == 'doubling_time':
+                    value = f'{latest[1]:.1f} days\n(as of {latest[0]})'
+                else:
+                    value = f'{latest[1]:.1f} per day\n(as of {latest[0]})'
+                embed.add_field(name=title, value=value)
+
+            await ctx.send(embed=embed)
+        else:
+            embed = discord.Embed(
+                title=f'Trends in {queryCountry}',
+                description='No data could be provided...',
+                color=discord.Colour.blue()
+            )
+
+            embed.add_field(name='No Data', value='No data could be provided with this query, sorry!', inline=False)
+
+            await ctx.send(embed=embed)
+    else:
+        await ctx.send("Please pass in the required arguments.")
+
+@client.command()
+async def compare(ctx, *args):
+    if args:
+        countries = [country.strip() for country in ' '.join(args).split(',') if country.strip()]
+
+        # a statistic (and graph type) after the last country asks for a graph instead of a table
+        lastCountry, rest = await covidClient.parseCountry(countries[-1])
+        queryStat, _, queryGraph = rest.partition(' ')
+
+        # anything else after it (or a last country that doesn't exist) is left as it is, so it's listed as missing
+        if lastCountry is not None and (not rest or queryStat in timelineFields):
+            countries[-1] = lastCountry
+        else:
+            queryStat = ''
+
+        if queryStat:
+            comparison = await covidClient.getComparisonGraph(countries, queryStat, queryGraph or 'line')
+
+            if comparison:
+                content = f"Couldn't find data for: {', '.join(comparison['missing'])}" if comparison['missing'] else None
+                await ctx.send(content=content, file=discord.File(comparison['image'], filename='comparisonGraph.png'))
+                return
+        else:
+            comparison = await covidClient.compareCountries(countries)
+
+            if comparison['countries']:
+                embed = discord.Embed(
+                    title='Country Comparison',
+                    description=f"Comparing COVID-19 related statistics for {', '.join(stats.name for stats in comparison['countries'])}.",
+                    color=discord.Colour.blue()
+                )
+
+                embed.set_footer(text='data retrieved from: https://about-corona.net/')
+
+                for stats in comparison['countries']:
+                    formatStats = stats.display
+
+                    embed.add_field(
+                        name=stats.name,
+                        value=f'Population: {formatStats[0]}\nConfirmed: {formatStats[4]}\nDeaths: {formatStats[3]}\nRecovered: {formatStats[5]}\nCritical: {formatStats[6]}\nDeath Rate (%): {formatStats[7]}\nCases (Per Million): {formatStats[10]}'
+                    )
+
+                if comparison['missing']:
+                    embed.add_field(name='No Data', value=', '.join(comparison['missing']), inline=False)
+
+                await ctx.send(embed=embed)
+                return
+
+        embed = discord.Embed(
+            title='Country Comparison',
+            description='No data could be provided...',
+            color=discord.Colour.blue()
+        )
+
+        embed.add_field(name='No Data', value='No data could be provided with this query, sorry!', inline=False)
+        await ctx.send(embed=embed)
+    else:
+        await ctx.send("Please pass in the required arguments.")
+
+@client.command()
+async def leaderboard(ctx, queryStat=None, queryCount='10'):
+    if queryStat:
+        if queryStat not in leaderboardNames:
+            raise ValueError('Invalid statistic')
+
+        ranking = await covidClient.getLeaderboard(queryStat, int(queryCount))
+
+        if ranking:
+            embed = discord.Embed(
+                title=f'Leaderboard ({leaderboardNames[queryStat]})',
+                description=f'The {len(ranking)} countries with the highest {leaderboardNames[queryStat].lower()}.',
+                color=discord.Colour.blue()
+            )
+
+            embed.set_footer(text='data retrieved from: https://about-corona.net/')
+
+            # rates are rounded to two decimals, counts are shown as they are
+            lines = [f"**{place}.** {stats.name}: {value:.2f}" if queryStat in ['death_rate', 'growth_rate'] else f"**{place}.** {stats.name}: {value:.0f}"
+                     for place, (stats, value) in enumerate(ranking, 1)]
+            embed.add_field(name='Countries', value='\n'.join(lines), inline=False)
+
+            await ctx.send(embed=embed)
+        else:
+            embed = discord.Embed(
+                title=f'Leaderboard ({leaderboardNames[queryStat]})',
+                description='No data could be provided...',
+                color=discord.Colour.blue()
+            )
+
+            embed.add_field(name='No Data', value='No data could be provided with this query, sorry!', inline=False)
+            await ctx.send(embed=embed)
+    else:
+        await ctx.send("Please pass in the required arguments.")
+
 @client.command()
 async def dateGraph(ctx, *args):
     if args:
-        countryList = await covidClient.getCountries()
-        countries = [country['name'] async for country in aiter(countryList)]
         graphTypes = ['bar', 'pie']
-        data = ' '.join(args)
+        queryCountry, newData = await covidClient.parseCountry(' '.join(args))
 
-        async for country in aiter(countries):
-            if country in data:
-                queryCountry = country
-                break
-        else:
+        if queryCountry is None:
             raise ValueError('Invalid Country Name')
 
-        newData = data.replace(f'{queryCountry} ', '')
-
         async for graphType in aiter(graphTypes):
             if graphType in newData:
                 queryGraph = graphType
@@ -560,9 +808,8 @@ async def dateGraph(ctx, *args):
                 graph = await covidClient.getDateGraph(queryCountry, queryDate)
 
         if graph:
-            image = discord.File("dateGraph.png")
+            image = discord.File(graph, filename='dateGraph.png') # the graph is already in memory, nothing to clean up after
             await ctx.send(file=image)
-            os.remove("dateGraph.png")
         else:
             embed = discord.Embed(
                 title=f'Graph for {queryCountry} on {queryDate}',
@@ -578,21 +825,12 @@ async def dateGraph(ctx, *args):
 @client.command()
 async def timelineGraph(ctx, *args):
     if args:
-        countryList = await covidClient.getCountries()
-        countries = [country['name'] async for country in aiter(countryList)]
         graphTypes = ['line', 'bar', 'scatter']
+        queryCountry, newData = await covidClient.parseCountry(' '.join(args))
 
-        data = ' '.join(args)
-
-        async for country in aiter(countries):
-            if country in data:
-                queryCountry = country
-                break
-        else:
+        if queryCountry is None:
             raise ValueError('Invalid Country Name')
 
-        newData = data.replace(f'{queryCountry} ', '')
-
         async for graphType in aiter(graphTypes):
             if graphType in newData:
                 queryGraph = graphType
@@ -607,9 +845,8 @@ async def timelineGraph(ctx, *args):
                 graph = await covidClient.getTimelineGraph(queryCountry, queryStats)
 
         if graph:
-            image = discord.File("timelineGraph.png")
+            image = discord.File(graph, filename='timelineGraph.png')
             await ctx.send(file=image)
-            os.remove("timelineGraph.png")
         else:
             embed = discord.Embed(
                 title=f'Graph For Data Over Time in {queryCountry}',
@@ -993,7 +1230,9 @@ async def newsHeadlines(ctx):
 
             headlines = await newsAPIClient.getTopHeadlines(countryResponse, categoryResponse, ','.join(sourcesResponse), queryResponse)
 
-            if headlines in [400, 401, 429, 500]:
+            if headlines == 429:
+                await ctx.send("Looks like the news API's request limit has been reached, please try again in a few minutes!")
+            elif headlines in [400, 401, 500]:
                 await ctx.send("Whoops, looks like something went wrong. Please try again at a later time!")
             else:
                 articles = headlines['articles']
@@ -1469,7 +1708,9 @@ async def newsSearch(ctx):
 
             newsArticles = await newsAPIClient.getEverything(queryResponse, titleResponse, ','.join(sourcesResponse), ','.join(domainsResponse), ','.join(exDomainsResponse), fromDateResponse, toDateResponse, languageResponse, sortByResponse)
 
-            if newsArticles in [400, 401, 429, 500]:
+            if newsArticles == 429:
+                await ctx.send("Looks like the news API's request limit has been reached, please try again in a few minutes!")
+            elif newsArticles in [400, 401, 500]:
                 await ctx.send("Whoops, looks like something went wrong. Please try again at a later time!")
             else:
                 articles = newsArticles['articles']
@@ -1656,11 +1897,18 @@ async def newsSortList(ctx):
 
 @newsSearch.error
 async def newsSearch_error(ctx, error):
-    await ctx.send(error)
+    # rate limit errors are sent without the 'Command raised an exception' prefix since they're meant for the user
+    if isinstance(getattr(error, 'original', None), RateLimitError):
+        await ctx.send(error.original)
+    else:
+        await ctx.send(error)
 
 @newsHeadlines.error
 async def newsHeadlines_error(ctx, error):
-    await ctx.send(error)
+    if isinstance(getattr(error, 'original', None), RateLimitError):
+        await ctx.send(error.original)
+    else:
+        await ctx.send(error)
 
 @timelineGraph.error
 async def timelineGraph_error(ctx, error):
@@ -1670,4 +1918,12 @@ async def timelineGraph_error(ctx, error):
 async def dateGraph_error(ctx, error):
     await ctx.send(error)
 
+@leaderboard.error
+async def leaderboard_error(ctx, error):
+    await ctx.send(error)
+
+@compare.error
+async def compare_error(ctx, error):
+    await ctx.send(error)
+
 client.run((os.getenv('BOT_TOKEN'))) # environment variable used for security purposes
\ No newline at end of file
@@ -0,0 +1,58 @@
+import aiohttp
+import argparse
+import asyncio
+import json
+import os
+from dotenv import load_dotenv
+from standIn.standInServer import fixturesPath
+load_dotenv()
+
+'''
+Records fresh fixtures for the stand-in server from the live APIs (overwriting the ones in standIn/fixtures).
+
+The news API key is read from NEWS_API_KEY in the .env file.
+
+USAGE (from the root of the project):
+python -m standIn.recordFixtures
+python -m standIn.recordFixtures --countries CA,US,JP --query coronavirus
+'''
+
+def saveFixture(name, data):
+    with open(os.path.join(fixturesPath, name), 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+
+    print(f'recorded {name}')
+
+async def getJSON(session, url, params={}, headers={}):
+    async with session.get(url, params=params, headers=headers) as r:
+        r.raise_for_status()
+        return await r.json()
+
+async def main(args):
+    newsHeaders = {'X-Api-Key': os.getenv('NEWS_API_KEY', '')}
+
+    async with aiohttp.ClientSession() as session:
+        countries = await getJSON(session, f'{args.covid_url}/countries')
+        saveFixture('countries.json', countries)
+
+        # only the timelines of the chosen countries are recorded (all of them if none were chosen)
+        codes = args.countries.split(',') if args.countries else [country['code'] for country in countries['data']]
+        timelines = {}
+        for code in codes:
+            country = await getJSON(session, f'{args.covid_url}/countries/{code}')
+            timelines[code] = country['data']['timeline']
+        saveFixture('countryTimelines.json', timelines)
+
+        saveFixture('timeline.json', await getJSON(session, f'{args.covid_url}/timeline'))
+
+        saveFixture('sources.json', await getJSON(session, f'{args.news_url}/v2/sources', headers=newsHeaders))
+        saveFixture('topHeadlines.json', await getJSON(session, f'{args.news_url}/v2/top-headlines', {'q': args.query, 'pageSize': 100}, newsHeaders))
+        saveFixture('everything.json', await getJSON(session, f'{args.news_url}/v2/everything', {'q': args.query, 'pageSize': 100}, newsHeaders))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Record fixtures for the stand-in server from the live APIs.')
+    parser.add_argument('--covid-url', default='https://corona-api.com', help='base link of the COVID-19 API')
+    parser.add_argument('--news-url', default='https://newsapi.org', help='base link of the news API')
+    parser.add_argument('--countries', default='', help='comma-separated country codes whose timelines are recorded (all of them by default)')
+    parser.add_argument('--query', default='covid', help='query used for the recorded headlines and articles')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,209 @@
+import argparse
+import asyncio
+import datetime
+import hashlib
+import json
+import os
+import random
+from aiohttp import web
+
+'''
+A local stand-in for corona-api.com and newsapi.org that replays the fixtures in standIn/fixtures.
+
+Point the bot (or a benchmark) at it by setting COVID_API_URL and NEWS_API_URL in the .env file, ex:
+COVID_API_URL=http://127.0.0.1:8080
+NEWS_API_URL=http://127.0.0.1:8080
+
+USAGE (from the root of the project):
+python -m standIn.standInServer
+python -m standIn.standInServer --latency 80 --jitter 40 --error-rate 0.05 --scale 10
+'''
+
+fixturesPath = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+def loadFixture(name):
+    with open(os.path.join(fixturesPath, name), encoding='utf-8') as file:
+        return json.load(file)
+
+def scaleTimeline(timeline, scale):
+    '''Makes a timeline (newest day first) scale times longer by repeating it further and further back in time.'''
+
+    if scale <= 1 or not timeline:
+        return timeline
+
+    scaled = list(timeline)
+
+    for repeat in range(1, scale):
+        shift = datetime.timedelta(days=len(timeline) * repeat)
+        for day in timeline:
+            date = datetime.date.fromisoformat(day['date'][:10]) - shift
+            scaled.append({**day, 'date': str(date), 'updated_at': f'{date}T04:20:53.000Z', 'is_in_progress': False})
+
+    return scaled
+
+class StandInServer:
+    """A local server that replays recorded API responses, with configurable latency, errors, and payload sizes
+
+    Attributes
+    ----------
+    host : str
+        the address the server listens on
+
+    port : int
+        the port the server listens on (0 picks a free one)
+
+    latency : float
+        the delay (in milliseconds) added to every response
+
+    jitter : float
+        a random extra delay (in milliseconds) of up to this much added to every response
+
+    errorRate : float
+        the fraction of requests (0 to 1) that are answered with errorStatus
+
+    errorStatus : int
+        the status code of injected errors (503 by default)
+
+    hangRate : float
+        the fraction of requests (0 to 1) that never get an answer (to test timeouts)
+
+    scale : int
+        how many times longer timelines and article lists are made
+
+    newsQuota : int
+        the number of news requests allowed before answering 429 (0 means unlimited)
+
+    stats : dict
+        the number of requests, 304 responses, injected errors, and hangs
+
+    Methods
+    -------
+    start()
+        Starts the server and returns its base link
+
+    stop()
+        Stops the server
+    """
+
+    def __init__(self, host='127.0.0.1', port=8080, latency=0, jitter=0, errorRate=0, errorStatus=503, hangRate=0, scale=1, newsQuota=0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.errorRate = errorRate
+        self.errorStatus = errorStatus
+        self.hangRate = hangRate
+        self.scale = scale
+        self.newsQuota = newsQuota
+        self.newsUsed = 0
+        self.runner = None
+        self.stats = {'requests': 0, 'notModified': 0, 'errors': 0, 'hangs': 0}
+        self.bodies = self.buildBodies()
+
+    def buildBodies(self):
+        '''Encodes every response up front, so serving them costs (almost) nothing.'''
+
+        countries = loadFixture('countries.json')
+        timelines = loadFixture('countryTimelines.json')
+        timeline = loadFixture('timeline.json')
+        topHeadlines = loadFixture('topHeadlines.json')
+        everything = loadFixture('everything.json')
+
+        bodies = {
+            '/countries': countries,
+            '/timeline': {**timeline, 'data': scaleTimeline(timeline['data'], self.scale)},
+            '/v2/sources': loadFixture('sources.json'),
+            '/v2/top-headlines': {**topHeadlines, 'articles': topHeadlines['articles'] * self.scale, 'totalResults': topHeadlines['totalResults'] * self.scale},
+            '/v2/everything': {**everything, 'articles': everything['articles'] * self.scale, 'totalResults': everything['totalResults'] * self.scale}
+        }
+
+        for country in countries['data']:
+            bodies[f"/countries/{country['code']}"] = {'data': {**country, 'timeline': scaleTimeline(timelines.get(country['code'], []), self.scale)}, '_cacheHit': True}
+
+        return {path: json.dumps(body).encode() for path, body in bodies.items()}
+
+    async def handle(self, request):
+        self.stats['requests'] += 1
+        path = request.path.rstrip('/')
+
+        # lowercase and uppercase country codes both work, like upstream
+        if path.startswith('/countries/'):
+            path = f"/countries/{path.split('/')[-1].upper()}"
+
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        if random.random() < self.hangRate:
+            self.stats['hangs'] += 1
+            await asyncio.sleep(3600)
+
+        if random.random() < self.errorRate:
+            self.stats['errors'] += 1
+            return web.json_response({'status': 'error', 'message': 'injected error'}, status=self.errorStatus)
+
+        headers = {}
+        if path.startswith('/v2/') and self.newsQuota:
+            self.newsUsed += 1
+            headers['X-RateLimit-Limit'] = str(self.newsQuota)
+            headers['X-RateLimit-Remaining'] = str(max(self.newsQuota - self.newsUsed, 0))
+            if self.newsUsed > self.newsQuota:
+                return web.json_response({'status': 'error', 'code': 'rateLimited'}, status=429, headers={**headers, 'Retry-After': '60'})
+
+        body = self.bodies.get(path)
+        if body is None:
+            return web.json_response({'status': 'error', 'message': f'{request.path} not found'}, status=404)
+
+        # the same body always gets the same ETag, so revalidation can be tested
+        headers['ETag'] = f'"{hashlib.md5(body).hexdigest()}"'
+        if request.headers.get('If-None-Match') == headers['ETag']:
+            self.stats['notModified'] += 1
+            return web.Response(status=304, headers=headers)
+
+        return web.Response(body=body, content_type='application/json', headers=headers)
+
+    async def start(self):
+        '''Starts the server and returns its base link (ex. http://127.0.0.1:8080).'''
+
+        app = web.Application()
+        app.router.add_get('/{path:.*}', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+
+        self.port = site._server.sockets[0].getsockname()[1] # the actual port, in case 0 was given
+        return f'http://{self.host}:{self.port}'
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+async def main(args):
+    server = StandInServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.error_status, args.hang_rate, args.scale, args.news_quota)
+    url = await server.start()
+    print(f'Stand-in server running on {url} (press CTRL+C to stop)')
+
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local stand-in for corona-api.com and newsapi.org that replays recorded fixtures.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='port to listen on')
+    parser.add_argument('--latency', type=float, default=0, help='delay (in milliseconds) added to every response')
+    parser.add_argument('--jitter', type=float, default=0, help='random extra delay (in milliseconds) of up to this much')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=503, help='status code of injected errors')
+    parser.add_argument('--hang-rate', type=float, default=0, help='fraction of requests that never get an answer')
+    parser.add_argument('--scale', type=int, default=1, help='how many times longer timelines and article lists are made')
+    parser.add_argument('--news-quota', type=int, default=0, help='news requests allowed before answering 429 (0 means unlimited)')
+
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -21,4 +21,193 @@ async def aiter(iterable):
     ...
     """
     for item in iterable:
-        yield item
\ No newline at end of file
+        yield item
+
+class SingleFlight:
+    """Coalesces concurrent calls that share the same key into one call
+
+    While a call for a key is still running, anyone else asking for the
+    same key waits on that call and receives its result instead of
+    starting a duplicate. Exceptions are shared the same way, so a
+    failing call is only made once no matter how many are waiting on it.
+
+    Attributes
+    ----------
+    inFlight : dict
+        the calls currently running, mapped by key to the task running them
+
+    leaders : int
+        the number of calls that were actually made
+
+    coalesced : int
+        the number of calls that waited on an existing call instead of making their own
+
+    Methods
+    -------
+    do(key, function, *args, **kwargs)
+        Runs function(*args, **kwargs) unless a call for the key is already running, in which case it waits on that call
+
+    finish(key, task)
+        Forgets a call once its task is done
+
+    cancelAll()
+        Cancels every call that is running and returns their tasks
+
+    getStats()
+        Returns the number of calls made, coalesced, and currently in flight
+    """
+
+    def __init__(self):
+        self.inFlight = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def finish(self, key, task):
+        """Forgets a call once its task is done (so the next call for the key starts a new one)"""
+
+        if self.inFlight.get(key) is task:
+            del self.inFlight[key]
+
+        if not task.cancelled():
+            task.exception() # marks the exception as retrieved so asyncio doesn't warn about it when nobody was left waiting
+
+    async def do(self, key, function, *args, **kwargs):
+        """Runs function(*args, **kwargs) unless a call for the key is already running, in which case it waits on that call
+
+        The call runs in its own task, so cancelling any of the callers (the first one included) only stops
+        that caller from waiting: the call keeps running for everyone else and is only forgotten once it's done.
+
+        Parameters
+        ----------
+        key : hashable
+            identifies calls that are considered identical
+
+        function : coroutine function
+            the function that is called if no identical call is running
+
+        Returns
+        -------
+        ...
+            whatever the (shared) call returned
+
+        Raises
+        ------
+        Exception
+            whatever the (shared) call raised
+        """
+
+        task = self.inFlight.get(key)
+
+        # if an identical call is already running, just wait for it to finish
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(function(*args, **kwargs))
+            self.inFlight[key] = task
+            self.leaders += 1
+            task.add_done_callback(lambda task: self.finish(key, task))
+
+        return await asyncio.shield(task) # shielded so one caller being cancelled doesn't cancel it for everyone
+
+    def cancelAll(self):
+        """Cancels every call that is running (ex. when shutting down) and returns their tasks so they can be waited for
+
+        Returns
+        -------
+        list
+            the cancelled tasks
+        """
+
+        tasks = list(self.inFlight.values())
+        for task in tasks:
+            task.cancel()
+
+        return tasks
+
+    def getStats(self):
+        """Returns the number of calls made, coalesced, and currently in flight
+
+        Parameters
+        ----------
+        ...
+
+        Returns
+        -------
+        dict
+            a dictionary with the leaders, coalesced, and inFlight counts
+
+        Raises
+        ------
+        ...
+        """
+
+        return {'leaders': self.leaders, 'coalesced': self.coalesced, 'inFlight': len(self.inFlight)}
+
+async def boundedGather(function, items, limit, deadline=None):
+    """Calls function on every item concurrently, at most limit at a time, all under one shared deadline
+
+    Unlike asyncio.gather, a call that fails or doesn't finish before the
+    deadline doesn't take the others down with it: its place in the
+    results holds the exception (asyncio.TimeoutError if it ran out of
+    time) and the calls still running at the deadline are cancelled. If
+    the caller is cancelled, every call still running is cancelled with it.
+
+    Parameters
+    ----------
+    function : coroutine function
+        the function called with each item
+
+    items : list
+        the items function is called with
+
+    limit : int
+        the most calls that can run at the same time
+
+    deadline : float
+        how long (in seconds) all of the calls together may take (no limit by default)
+
+    Returns
+    -------
+    list
+        the result (or exception) of each call, in the same order as items
+
+    Raises
+    ------
+    ...
+    """
+
+    if not items:
+        return []
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def call(item):
+        async with semaphore:
+            return await function(item)
+
+    tasks = [asyncio.ensure_future(call(item)) for item in items]
+
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+    except asyncio.CancelledError:
+        # the caller was cancelled (ex. the bot is shutting down), so none of the calls are left running behind it
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.wait(pending) # lets the cancelled calls clean up before returning
+
+    results = []
+    for task in tasks:
+        if task in pending:
+            results.append(asyncio.TimeoutError())
+        elif task.exception() is not None:
+            results.append(task.exception())
+        else:
+            results.append(task.result())
+
+    return results
@@ -0,0 +1,445 @@
+import os
+import sqlite3
+import time
+from cachetools import LRUCache
+from utils import jsonCodec
+
+class CacheEntry:
+    """A single cached value along with when it was stored and when it expires
+
+    Attributes
+    ----------
+    value : dict/list
+        the cached (json) value
+
+    size : int
+        the size of the value once serialized (in bytes)
+
+    storedAt : float
+        the time (in seconds since the epoch) the value was stored
+
+    expiresAt : float
+        the time (in seconds since the epoch) the value expires
+
+    etag : str
+        the ETag the API sent with the value (None if it didn't send one)
+
+    lastModified : str
+        the Last-Modified date the API sent with the value (None if it didn't send one)
+
+    transferSize : int
+        the number of bytes the API sent for the value, which a 304 (Not Modified) saves downloading again (its size if it isn't known)
+    """
+
+    __slots__ = ('value', 'size', 'storedAt', 'expiresAt', 'etag', 'lastModified', 'transferSize')
+
+    def __init__(self, value, size, storedAt, expiresAt, etag=None, lastModified=None, transferSize=None):
+        self.value = value
+        self.size = size
+        self.storedAt = storedAt
+        self.expiresAt = expiresAt
+        self.etag = etag
+        self.lastModified = lastModified
+        self.transferSize = size if transferSize is None else transferSize # the cached value can be smaller than what was sent (ex. streamed endpoints)
+
+    def isExpired(self, now=None):
+        """Returns True if the entry has expired"""
+
+        return (now or time.time()) >= self.expiresAt
+
+class MemoryTier(LRUCache):
+    """The in-memory tier of the cache, an LRU bounded by the total size of its entries (in bytes)
+
+    Attributes
+    ----------
+    evictions : int
+        the number of entries that were evicted to make room for newer ones
+    """
+
+    def __init__(self, maxBytes):
+        super().__init__(maxsize=maxBytes, getsizeof=lambda entry: entry.size)
+        self.evictions = 0
+
+    def popitem(self):
+        key, entry = super().popitem() # only called by cachetools when the cache is full
+        self.evictions += 1
+        return key, entry
+
+class TwoTierCache:
+    """A bounded in-memory LRU in front of a persistent (SQLite) store on disk
+
+    Values are looked up in memory first, then on disk (where they are
+    promoted back into memory). Both tiers are bounded by size and evict
+    the least recently used entries first, and since the disk tier
+    survives restarts a freshly started bot can keep serving what it
+    already had instead of refetching everything.
+
+    Attributes
+    ----------
+    path : str
+        the path of the SQLite file (the disk tier is disabled if it is empty)
+
+    memory : MemoryTier
+        the in-memory tier
+
+    maxDiskBytes : int
+        the maximum total size of the entries kept on disk
+
+    stats : dict
+        the number of hits (memory and disk), stale hits, misses, expired lookups, and evictions (memory and disk)
+
+    Methods
+    -------
+    get(key, allowExpired=False, promote=True)
+        Returns the entry stored under a key, or None if there is none (or it has expired)
+
+    peek(key)
+        Returns the entry stored under a key whether it has expired or not, without counting it in the stats
+
+    getExpiry(key)
+        Returns when the entry stored under a key expires, without reading its value
+
+    set(key, value, ttl, etag=None, lastModified=None, transferSize=None, inMemory=True)
+        Stores a value (and its validators) under a key for ttl seconds
+
+    renew(key, ttl, inMemory=True)
+        Makes an existing entry fresh for another ttl seconds (ex. after the API answers 304 Not Modified)
+
+    delete(key)
+        Removes a key from both tiers
+
+    getStats()
+        Returns the hit/miss/eviction counts and the size of each tier
+
+    flushAccesses()
+        Writes the times entries were last read from disk (kept in memory until then) in one transaction
+
+    close()
+        Closes the connection to the disk tier (it isn't reopened until closed is reset)
+    """
+
+    accessBatch = 64 # how many disk hits are kept in memory before their access times are written
+
+    def __init__(self, path, maxMemoryBytes=64 * 1024 ** 2, maxDiskBytes=256 * 1024 ** 2):
+        self.path = path
+        self.memory = MemoryTier(maxMemoryBytes)
+        self.maxDiskBytes = maxDiskBytes
+        self.connection = None
+        self.closed = False # set on shutdown, so nothing still running can reopen the disk tier
+        self.accessed = {} # keys read from disk mapped to when, not written yet (a write per hit would block the event loop)
+        self.diskBytes = None
+        self.stats = {'memoryHits': 0, 'diskHits': 0, 'staleHits': 0, 'misses': 0, 'expired': 0, 'diskEvictions': 0}
+
+    def getConnection(self):
+        """Returns the connection to the disk tier, opening it (and creating the table) the first time it is used"""
+
+        if self.connection is None and self.path and not self.closed:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self.connection = sqlite3.connect(self.path, isolation_level=None) # autocommit, each statement is its own transaction
+            self.connection.execute('PRAGMA journal_mode=WAL') # lets reads carry on while an entry is being written
+            self.connection.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, size INTEGER, storedAt REAL, expiresAt REAL, accessedAt REAL, etag TEXT, lastModified TEXT, transferSize INTEGER)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS cacheAccessedAt ON cache (accessedAt)')
+
+            # cache files made before validators (and transfer sizes) were stored are missing their columns
+            columns = [row[1] for row in self.connection.execute('PRAGMA table_info(cache)')]
+            for column, columnType in (('etag', 'TEXT'), ('lastModified', 'TEXT'), ('transferSize', 'INTEGER')):
+                if column not in columns:
+                    self.connection.execute(f'ALTER TABLE cache ADD COLUMN {column} {columnType}')
+
+            self.diskBytes = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+
+        return self.connection
+
+    def serialize(self, value):
+        return jsonCodec.dumps(value)
+
+    def deserialize(self, data):
+        return jsonCodec.loads(data)
+
+    def get(self, key, allowExpired=False, promote=True):
+        """Returns the entry stored under a key, or None if there is none (or it has expired)
+
+        Parameters
+        ----------
+        key : str
+            the key the value was stored under
+
+        allowExpired : bool
+            if True, an expired entry is still returned and counted as a stale hit (False by default)
+
+        promote : bool
+            if False, an entry read from disk isn't moved into memory (True by default)
+
+        Returns
+        -------
+        CacheEntry
+            the entry, or None
+        """
+
+        now = time.time()
+        entry = self.memory.get(key)
+        tier = 'memoryHits'
+
+        if entry is None:
+            entry = self.getFromDisk(key, now)
+            tier = 'diskHits'
+            if entry is not None and promote:
+                self.setInMemory(key, entry) # promotes it so the next lookup doesn't touch the disk
+
+        if entry is not None:
+            if not entry.isExpired(now):
+                self.stats[tier] += 1
+                return entry
+            elif allowExpired:
+                self.stats['staleHits'] += 1
+                return entry
+
+        if entry is not None:
+            self.stats['expired'] += 1
+        else:
+            self.stats['misses'] += 1
+
+        return None
+
+    def peek(self, key):
+        """Returns the entry stored under a key whether it has expired or not, without counting it in the stats
+
+        Parameters
+        ----------
+        key : str
+            the key the value was stored under
+
+        Returns
+        -------
+        CacheEntry
+            the entry, or None
+        """
+
+        entry = self.memory.get(key)
+        if entry is None:
+            entry = self.getFromDisk(key, time.time())
+
+        return entry
+
+    def getExpiry(self, key):
+        """Returns when the entry stored under a key expires (in seconds since the epoch), without reading its value
+
+        Parameters
+        ----------
+        key : str
+            the key the value was stored under
+
+        Returns
+        -------
+        float
+            the time the entry expires, or None if there is no entry
+        """
+
+        entry = self.memory.get(key)
+        if entry is not None:
+            return entry.expiresAt
+
+        connection = self.getConnection()
+        row = connection.execute('SELECT expiresAt FROM cache WHERE key = ?', (key,)).fetchone() if connection else None
+        return row[0] if row else None
+
+    def getFromDisk(self, key, now):
+        connection = self.getConnection()
+        if connection is None:
+            return None
+
+        row = connection.execute('SELECT value, size, storedAt, expiresAt, etag, lastModified, transferSize FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+
+        self.accessed[key] = now
+        if len(self.accessed) >= self.accessBatch:
+            self.flushAccesses()
+
+        return CacheEntry(self.deserialize(row[0]), *row[1:])
+
+    def flushAccesses(self):
+        """Writes the times entries were last read from disk (kept in memory until then) in one transaction"""
+
+        if self.accessed and self.connection is not None:
+            self.connection.execute('BEGIN')
+            self.connection.executemany('UPDATE cache SET accessedAt = ? WHERE key = ?', [(accessedAt, key) for key, accessedAt in self.accessed.items()])
+            self.connection.execute('COMMIT')
+
+        self.accessed.clear()
+
+    def setInMemory(self, key, entry):
+        try:
+            self.memory[key] = entry
+        except ValueError: # the value is bigger than the whole memory tier, so it is only kept on disk
+            self.memory.pop(key, None)
+
+    def set(self, key, value, ttl, etag=None, lastModified=None, transferSize=None, inMemory=True):
+        """Stores a value (and its validators) under a key for ttl seconds
+
+        Parameters
+        ----------
+        key : str
+            the key to store the value under
+
+        value : dict/list
+            the (json) value to store
+
+        ttl : int/float
+            how long (in seconds) the value is fresh for
+
+        etag : str
+            the ETag the API sent with the value (None by default)
+
+        lastModified : str
+            the Last-Modified date the API sent with the value (None by default)
+
+        transferSize : int
+            the number of bytes the API sent for the value (None by default, which means its serialized size)
+
+        inMemory : bool
+            if False, the value is only kept on disk, unless there is no disk tier (True by default)
+
+        Returns
+        -------
+        CacheEntry
+            the new entry
+        """
+
+        data = self.serialize(value)
+        now = time.time()
+        entry = CacheEntry(value, len(data), now, now + ttl, etag, lastModified, transferSize)
+
+        connection = self.getConnection()
+        if inMemory or connection is None:
+            self.setInMemory(key, entry)
+        else:
+            self.memory.pop(key, None)
+
+        if connection is not None:
+            old = connection.execute('SELECT size FROM cache WHERE key = ?', (key,)).fetchone()
+            connection.execute('INSERT OR REPLACE INTO cache (key, value, size, storedAt, expiresAt, accessedAt, etag, lastModified, transferSize) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', (key, data, entry.size, entry.storedAt, entry.expiresAt, now, etag, lastModified, entry.transferSize))
+            self.diskBytes += entry.size - (old[0] if old else 0)
+            self.evictFromDisk()
+
+        return entry
+
+    def renew(self, key, ttl, inMemory=True):
+        """Makes an existing entry fresh for another ttl seconds (ex. after the API answers 304 Not Modified)
+
+        Parameters
+        ----------
+        key : str
+            the key the value was stored under
+
+        ttl : int/float
+            how long (in seconds) the value is fresh for
+
+        inMemory : bool
+            if False, the entry is only kept on disk, unless there is no disk tier (True by default)
+
+        Returns
+        -------
+        CacheEntry
+            the renewed entry, or None if there was no entry to renew
+        """
+
+        entry = self.peek(key)
+        if entry is None:
+            return None
+
+        now = time.time()
+        entry.storedAt = now
+        entry.expiresAt = now + ttl
+
+        connection = self.getConnection()
+        if inMemory or connection is None:
+            self.setInMemory(key, entry)
+
+        if connection is not None:
+            connection.execute('UPDATE cache SET storedAt = ?, expiresAt = ?, accessedAt = ? WHERE key = ?', (entry.storedAt, entry.expiresAt, now, key))
+
+        return entry
+
+    def evictFromDisk(self):
+        """Removes the least recently used entries from disk until it fits within maxDiskBytes (in a single DELETE)"""
+
+        if self.diskBytes <= self.maxDiskBytes:
+            return
+
+        self.flushAccesses() # so entries that were read recently aren't taken for the least recently used ones
+
+        # counts how many of the oldest entries have to go (reading only as many rows as that takes)
+        excess = self.diskBytes - self.maxDiskBytes
+        count = freed = 0
+        rows = self.connection.execute('SELECT size FROM cache ORDER BY accessedAt, key') # the key breaks ties, so the DELETE picks the same rows
+        for (size,) in rows:
+            count += 1
+            freed += size
+            if freed >= excess:
+                break
+        rows.close()
+
+        self.connection.execute('DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessedAt, key LIMIT ?)', (count,))
+        self.diskBytes = self.diskBytes - freed if freed >= excess else 0 # running out of rows means everything was removed
+        self.stats['diskEvictions'] += count
+
+    def delete(self, key):
+        """Removes a key from both tiers"""
+
+        self.memory.pop(key, None)
+
+        connection = self.getConnection()
+        if connection is not None:
+            row = connection.execute('SELECT size FROM cache WHERE key = ?', (key,)).fetchone()
+            if row:
+                connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+                self.diskBytes -= row[0]
+
+    def getStats(self):
+        """Returns the hit/miss/eviction counts and the size of each tier
+
+        Returns
+        -------
+        dict
+            all the counters in stats, plus the number of memory evictions, entries, and bytes in each tier
+        """
+
+        connection = self.getConnection()
+        diskEntries = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0] if connection else 0
+
+        return {
+            **self.stats,
+            'memoryEvictions': self.memory.evictions,
+            'memoryEntries': len(self.memory),
+            'memoryBytes': self.memory.currsize,
+            'diskEntries': diskEntries,
+            'diskBytes': self.diskBytes or 0
+        }
+
+    def close(self):
+        """Closes the connection to the disk tier (it isn't reopened until closed is reset, only the memory tier is used until then)"""
+
+        self.closed = True
+
+        if self.connection is not None:
+            self.flushAccesses()
+            self.connection.close()
+            self.connection = None
+
+class GraphCache(TwoTierCache):
+    """A TwoTierCache of rendered graphs (PNG bytes), bounded in memory with an optional spill to disk
+
+    Graphs are stored under keys that include a digest of the data they were drawn from, so a graph is
+    never served for data that has since changed: the next request asks for a new key, and the old
+    graph is left to be evicted as it's no longer used.
+    """
+
+    def serialize(self, value):
+        return value # already bytes (stored as a blob)
+
+    def deserialize(self, data):
+        return bytes(data)
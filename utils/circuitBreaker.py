@@ -0,0 +1,159 @@
+import random
+import time
+
+class CircuitOpenError(Exception):
+    """Raised when a request isn't sent because the circuit breaker for its host is open"""
+
+class CircuitBreaker:
+    """Stops sending requests to a host after it fails too many times in a row
+
+    The breaker starts closed (requests go through). After failureThreshold
+    consecutive failures it opens and every request fails fast for
+    resetTimeout seconds. After that it is half-open: a single trial
+    request is let through, closing the breaker if it succeeds and opening
+    it again if it fails.
+
+    Attributes
+    ----------
+    failureThreshold : int
+        the number of consecutive failures that opens the breaker
+
+    resetTimeout : float
+        how long (in seconds) the breaker stays open before a trial request is let through
+
+    state : str
+        'closed', 'open', or 'halfOpen'
+
+    stats : dict
+        the number of successes, failures, rejected requests, and times the breaker opened
+
+    Methods
+    -------
+    allowRequest()
+        Returns True if a request can be sent right now
+
+    recordSuccess()
+        Records a successful request (closing the breaker)
+
+    recordFailure()
+        Records a failed request (opening the breaker if there have been too many in a row)
+
+    releaseTrial()
+        Lets another trial request through if the current one was cancelled before it finished
+
+    getStats()
+        Returns the state of the breaker along with its counters
+    """
+
+    def __init__(self, failureThreshold=5, resetTimeout=30):
+        self.failureThreshold = failureThreshold
+        self.resetTimeout = resetTimeout
+        self.state = 'closed'
+        self.consecutiveFailures = 0
+        self.openedAt = 0
+        self.trialInFlight = False
+        self.stats = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def allowRequest(self):
+        """Returns True if a request can be sent right now (and counts it as rejected if not)"""
+
+        if self.state == 'open' and time.monotonic() - self.openedAt >= self.resetTimeout:
+            self.state = 'halfOpen'
+
+        # only one trial request at a time is let through while half-open
+        if self.state == 'closed' or (self.state == 'halfOpen' and not self.trialInFlight):
+            self.trialInFlight = self.state == 'halfOpen'
+            return True
+
+        self.stats['rejected'] += 1
+        return False
+
+    def recordSuccess(self):
+        self.stats['successes'] += 1
+        self.consecutiveFailures = 0
+        self.trialInFlight = False
+        self.state = 'closed'
+
+    def recordFailure(self):
+        self.stats['failures'] += 1
+        self.consecutiveFailures += 1
+        self.trialInFlight = False
+
+        if self.state == 'halfOpen' or self.consecutiveFailures >= self.failureThreshold:
+            if self.state != 'open':
+                self.stats['opened'] += 1
+
+            self.state = 'open'
+            self.openedAt = time.monotonic()
+
+    def releaseTrial(self):
+        self.trialInFlight = False
+
+    def getStats(self):
+        """Returns the state of the breaker along with its counters
+
+        Returns
+        -------
+        dict
+            the state, consecutive failures, seconds until a trial request is let through (if open), and counters
+        """
+
+        retryIn = max(self.resetTimeout - (time.monotonic() - self.openedAt), 0) if self.state == 'open' else 0
+        return {'state': self.state, 'consecutiveFailures': self.consecutiveFailures, 'retryIn': round(retryIn, 1), **self.stats}
+
+class HostPolicy:
+    """How requests to one host are timed out, retried, and cut off when the host is unhealthy
+
+    Attributes
+    ----------
+    timeout : float
+        the deadline (in seconds) for a single attempt
+
+    deadline : float
+        the deadline (in seconds) for a request including all of its retries
+
+    retries : int
+        the number of times a request is retried after a timeout, connection error, or 5xx response
+
+    backoffBase : float
+        the delay (in seconds) before the first retry, doubled for every retry after that
+
+    backoffMax : float
+        the longest delay (in seconds) between two attempts
+
+    breaker : CircuitBreaker
+        the circuit breaker of the host
+
+    stats : dict
+        the number of retries and timed out attempts
+
+    Methods
+    -------
+    getBackoff(attempt)
+        Returns how long to wait before the next attempt (with full jitter)
+    """
+
+    def __init__(self, timeout=10, deadline=30, retries=2, backoffBase=0.5, backoffMax=8, failureThreshold=5, resetTimeout=30):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoffBase = backoffBase
+        self.backoffMax = backoffMax
+        self.breaker = CircuitBreaker(failureThreshold, resetTimeout)
+        self.stats = {'retries': 0, 'timeouts': 0}
+
+    def getBackoff(self, attempt):
+        """Returns how long to wait before the next attempt (a random delay up to the exponential backoff, so retries don't line up)
+
+        Parameters
+        ----------
+        attempt : int
+            the number of the attempt that just failed (starting at 0)
+
+        Returns
+        -------
+        float
+            the delay in seconds
+        """
+
+        return random.uniform(0, min(self.backoffMax, self.backoffBase * 2 ** attempt))
@@ -0,0 +1,263 @@
+import itertools
+import numpy as np
+
+'''
+Stores a timeline (a list of days as dictionaries, newest first) as one numpy array per statistic,
+sorted by date, so dates can be found with a binary search and ranges of days are views instead of copies.
+'''
+
+fields = ('deaths', 'confirmed', 'recovered', 'active', 'new_confirmed', 'new_recovered', 'new_deaths')
+missing = np.iinfo(np.int64).min # stands in for a statistic the API didn't have (None)
+
+class ColumnarTimeline:
+    """A timeline stored as a datetime64 array of dates and an int64 array per statistic
+
+    Attributes
+    ----------
+    dates : numpy.ndarray
+        the dates of the timeline (datetime64[D]), oldest first
+
+    columns : dict
+        the name of each statistic mapped to its values (int64), in the same order as dates
+
+    version : int
+        goes up every time a merge changes the timeline, so anything computed from it knows when to recompute
+
+    Methods
+    -------
+    fromDays(days)
+        Builds a columnar timeline from a list of days as returned by the API
+
+    merge(days, window)
+        Returns the timeline with the newest days of a fresh response merged in (or itself if nothing changed)
+
+    indexOf(date)
+        Returns the position of a date in the timeline (or None)
+
+    query(date)
+        Returns the statistics of a single date as a dictionary (or None)
+
+    range(start, end)
+        Returns the days between two dates (inclusive) as a timeline that shares memory with this one
+
+    row(index)
+        Returns the day at a position as a dictionary
+
+    summarize()
+        Returns the first and last value, total, average, and peak of every statistic
+
+    toDays()
+        Returns the timeline as a list of days (newest first), like the API sends it
+
+    getSize()
+        Returns the number of bytes used by the arrays
+    """
+
+    def __init__(self, dates, columns, version=1):
+        self.dates = dates
+        self.columns = columns
+        self.version = version
+
+    @classmethod
+    def fromDays(cls, days):
+        """Builds a columnar timeline from a list of days as returned by the API
+
+        Parameters
+        ----------
+        days : list
+            the days of the timeline as dictionaries with a date and the statistics (in any order)
+
+        Returns
+        -------
+        ColumnarTimeline
+            the same days sorted by date (if a date shows up more than once, the first one is kept)
+        """
+
+        dates = np.array([day['date'][:10] for day in days], dtype='datetime64[D]')
+        dates, first = np.unique(dates, return_index=True) # sorted, without duplicates
+
+        columns = {}
+        for field in fields:
+            values = np.array([missing if day.get(field) is None else day[field] for day in days], dtype=np.int64)
+            columns[field] = values[first]
+
+        return cls(dates, columns)
+
+    def merge(self, days, window):
+        """Returns the timeline with the newest days of a fresh response merged in (or itself if nothing changed)
+
+        Only the last window days (which the API may still revise) and any newer days are converted and replace
+        the end of the timeline, everything older is kept as it is. The timeline itself is never modified, so views
+        of it stay valid.
+
+        Parameters
+        ----------
+        days : list
+            the days of a fresh response, as dictionaries (newest first, like the API sends them)
+
+        window : int
+            how many of the newest days the API may have revised since the timeline was stored
+
+        Returns
+        -------
+        ColumnarTimeline
+            a new timeline with its version bumped, or this one if the newest days didn't change
+        """
+
+        if not len(self.dates):
+            return ColumnarTimeline.fromDays(days)
+
+        cutoff = str(self.dates[-1] - np.timedelta64(window - 1, 'D'))
+
+        # only the days inside the window (or newer) are converted, the rest of the response is never looked at
+        if days and days[0]['date'][:10] < days[-1]['date'][:10]:
+            days = reversed(days) # oldest first, so it's walked from the end instead
+        recentDays = list(itertools.takewhile(lambda day: day['date'][:10] >= cutoff, days))
+
+        if not recentDays:
+            return self
+
+        recent = ColumnarTimeline.fromDays(recentDays)
+        start = int(np.searchsorted(self.dates, recent.dates[0]))
+
+        # if the end of the timeline is exactly what was just fetched, it is kept as is (with the same version)
+        unchanged = len(self.dates) - start == len(recent) and np.array_equal(self.dates[start:], recent.dates)
+        if unchanged and all(np.array_equal(self.columns[field][start:], recent.columns[field]) for field in self.columns):
+            return self
+
+        dates = np.concatenate((self.dates[:start], recent.dates))
+        columns = {field: np.concatenate((values[:start], recent.columns[field])) for field, values in self.columns.items()}
+        return ColumnarTimeline(dates, columns, self.version + 1)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def indexOf(self, date):
+        """Returns the position of a date in the timeline (or None), found with a binary search
+
+        Parameters
+        ----------
+        date : datetime.date/str
+            the date to look for (ex. datetime.date(2021, 1, 1) or '2021-01-01')
+
+        Returns
+        -------
+        int/None
+            the position of the date, or None if the timeline doesn't have it
+        """
+
+        target = np.datetime64(date, 'D')
+        index = int(np.searchsorted(self.dates, target))
+
+        if index < len(self.dates) and self.dates[index] == target:
+            return index
+
+        return None
+
+    def query(self, date):
+        """Returns the statistics of a single date as a dictionary (or None)
+
+        Parameters
+        ----------
+        date : datetime.date/str
+            the date to look for
+
+        Returns
+        -------
+        dict/None
+            the date and statistics of that day, or None if the timeline doesn't have it
+        """
+
+        index = self.indexOf(date)
+        return None if index is None else self.row(index)
+
+    def range(self, start, end):
+        """Returns the days between two dates (inclusive) as a timeline that shares memory with this one
+
+        Parameters
+        ----------
+        start : datetime.date/str
+            the first date of the range
+
+        end : datetime.date/str
+            the last date of the range
+
+        Returns
+        -------
+        ColumnarTimeline
+            the days in the range (empty if there are none), as views of this timeline's arrays
+        """
+
+        first = int(np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left'))
+        last = int(np.searchsorted(self.dates, np.datetime64(end, 'D'), side='right'))
+
+        # basic slices of numpy arrays are views, so no data is copied
+        return ColumnarTimeline(self.dates[first:last], {field: values[first:last] for field, values in self.columns.items()}, self.version)
+
+    def row(self, index):
+        """Returns the day at a position as a dictionary (missing statistics are None, like in the API's response)
+
+        Parameters
+        ----------
+        index : int
+            the position of the day (negative positions count from the newest day)
+
+        Returns
+        -------
+        dict
+            the date (as a YYYY-MM-DD string) and every statistic of that day
+        """
+
+        day = {'date': str(self.dates[index])}
+
+        for field, values in self.columns.items():
+            value = values[index]
+            day[field] = None if value == missing else int(value)
+
+        return day
+
+    def summarize(self):
+        """Returns the first and last value, total, average, and peak of every statistic (computed with numpy, not day by day)
+
+        Returns
+        -------
+        dict
+            the number of days, first and last date, and a dictionary per statistic (None if the API had no data for it)
+        """
+
+        if not len(self.dates):
+            return {'days': 0, 'start': None, 'end': None}
+
+        summary = {'days': len(self.dates), 'start': str(self.dates[0]), 'end': str(self.dates[-1])}
+
+        for field, values in self.columns.items():
+            valid = values != missing
+            if valid.all():
+                known, knownDates = values, self.dates # no copies in the (usual) case where nothing is missing
+            elif valid.any():
+                known, knownDates = values[valid], self.dates[valid]
+            else:
+                summary[field] = None
+                continue
+
+            peak = int(np.argmax(known))
+            summary[field] = {
+                'first': int(known[0]),
+                'last': int(known[-1]),
+                'total': int(known.sum()),
+                'average': float(known.mean()),
+                'peak': int(known[peak]),
+                'peakDate': str(knownDates[peak])
+            }
+
+        return summary
+
+    def toDays(self):
+        """Returns the timeline as a list of days (newest first), like the API sends it"""
+
+        return [self.row(index) for index in range(len(self.dates) - 1, -1, -1)]
+
+    def getSize(self):
+        """Returns the number of bytes used by the arrays (views only count the part they cover)"""
+
+        return self.dates.nbytes + sum(values.nbytes for values in self.columns.values())
@@ -0,0 +1,230 @@
+import time
+import numpy as np
+from utils.columnarTimeline import missing
+
+'''
+Computes series derived from the timelines (rolling averages, growth rates, and doubling times) for many
+countries at once, by lining their timelines up in one matrix (a row per country, a column per day) so
+every metric is a handful of numpy operations instead of a loop over days.
+'''
+
+window = 7 # days in the rolling averages and the period growth is measured over
+
+# the statistics that can be asked for on top of the ones in the timelines, with how to describe them
+metrics = {
+    'new_confirmed_7day_avg': 'New Confirmed Cases (7-Day Average)',
+    'new_deaths_7day_avg': 'New Deaths (7-Day Average)',
+    'new_recovered_7day_avg': 'New Recovered Cases (7-Day Average)',
+    'growth_rate': 'Daily Growth Rate of Confirmed Cases (%, Over 7 Days)',
+    'doubling_time': 'Doubling Time of Confirmed Cases (Days)'
+}
+
+def toMatrix(timelines, field, start, days):
+    """Lines up one statistic of several timelines in a matrix (a row per timeline, NaN wherever a day is missing)"""
+
+    matrix = np.full((len(timelines), days), np.nan)
+
+    for row, timeline in enumerate(timelines):
+        values = timeline.columns[field]
+        offsets = (timeline.dates - start).astype(np.int64)
+        matrix[row, offsets] = np.where(values == missing, np.nan, values)
+
+    return matrix
+
+def rollingMean(matrix):
+    """Returns the mean of every window days along each row (NaN unless all of them are known)"""
+
+    known = ~np.isnan(matrix)
+    sums = np.cumsum(np.where(known, matrix, 0), axis=1)
+    counts = np.cumsum(known, axis=1)
+
+    # the sum of a window is the running total minus the running total from window days before
+    sums[:, window:] = sums[:, window:] - sums[:, :-window]
+    counts[:, window:] = counts[:, window:] - counts[:, :-window]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts == window, sums / window, np.nan)
+
+def growth(confirmed):
+    """Returns the average daily growth rate (%) and the doubling time (days) of cumulative cases over the last window days"""
+
+    previous = np.full(confirmed.shape, np.nan)
+    previous[:, window:] = confirmed[:, :-window]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.where(previous > 0, confirmed / previous, np.nan)
+        rate = 100 * (ratio ** (1 / window) - 1)
+        doubling = np.where(ratio > 1, window * np.log(2) / np.log(ratio), np.nan) # never doubles if cases didn't grow
+
+    return rate, doubling
+
+def compute(timelines):
+    """Computes every derived metric for several timelines in one pass
+
+    Parameters
+    ----------
+    timelines : list
+        the timelines (ColumnarTimeline) to compute the metrics of
+
+    Returns
+    -------
+    list
+        a dictionary per timeline mapping each metric to its values (float, NaN where it isn't defined), lined up with the timeline's dates
+    """
+
+    timelines = [timeline for timeline in timelines if len(timeline)]
+    if not timelines:
+        return []
+
+    start = min(timeline.dates[0] for timeline in timelines)
+    days = int((max(timeline.dates[-1] for timeline in timelines) - start).astype(np.int64)) + 1
+
+    results = {
+        'new_confirmed_7day_avg': rollingMean(toMatrix(timelines, 'new_confirmed', start, days)),
+        'new_deaths_7day_avg': rollingMean(toMatrix(timelines, 'new_deaths', start, days)),
+        'new_recovered_7day_avg': rollingMean(toMatrix(timelines, 'new_recovered', start, days))
+    }
+    results['growth_rate'], results['doubling_time'] = growth(toMatrix(timelines, 'confirmed', start, days))
+
+    # every row is cut back down to the days its own timeline has (a view if the timeline has no gaps)
+    series = []
+    for row, timeline in enumerate(timelines):
+        offsets = (timeline.dates - start).astype(np.int64)
+        first, last = int(offsets[0]), int(offsets[-1])
+        if last - first + 1 == len(offsets):
+            series.append({metric: values[row, first:last + 1] for metric, values in results.items()})
+        else:
+            series.append({metric: values[row, offsets] for metric, values in results.items()})
+
+    return series
+
+class DerivedMetrics:
+    """The derived metrics of every timeline, recomputed (in one batch) only for the timelines that changed
+
+    Attributes
+    ----------
+    series : dict
+        the key of every timeline mapped to the timeline the metrics were computed from and the metrics
+
+    stats : dict
+        the number of passes, timelines computed, and how long the last pass took
+
+    Methods
+    -------
+    update(timelines)
+        Computes the metrics of every timeline that changed since the last time, all in one pass
+
+    get(key, timeline)
+        Returns the metrics of a timeline, computing them first if it changed
+
+    getLatest(key, timeline)
+        Returns the most recent known value of every metric of a timeline, along with its date
+
+    getLatestValues(metric)
+        Returns the most recent known value of a metric for every timeline it has been computed for
+    """
+
+    def __init__(self):
+        self.series = {}
+        self.stats = {'passes': 0, 'computed': 0, 'passTime': 0.0}
+
+    def update(self, timelines):
+        """Computes the metrics of every timeline that changed since the last time, all in one pass
+
+        Parameters
+        ----------
+        timelines : dict
+            the key of every timeline (country code or 'global') mapped to the timeline
+
+        Returns
+        -------
+        int
+            the number of timelines whose metrics were computed
+        """
+
+        # timelines are never modified (a refresh that changes one makes a new one), so the same object means the same metrics
+        changed = {key: timeline for key, timeline in timelines.items() if key not in self.series or self.series[key][0] is not timeline}
+        changed = {key: timeline for key, timeline in changed.items() if len(timeline)}
+        if not changed:
+            return 0
+
+        start = time.perf_counter()
+        for (key, timeline), series in zip(changed.items(), compute(list(changed.values()))):
+            self.series[key] = (timeline, series)
+
+        self.stats['passes'] += 1
+        self.stats['computed'] += len(changed)
+        self.stats['passTime'] = time.perf_counter() - start
+
+        return len(changed)
+
+    def get(self, key, timeline):
+        """Returns the metrics of a timeline, computing them first if it changed
+
+        Parameters
+        ----------
+        key : str
+            the country code of the timeline, or 'global'
+
+        timeline : ColumnarTimeline
+            the current timeline
+
+        Returns
+        -------
+        dict
+            each metric mapped to its values, lined up with the timeline's dates
+        """
+
+        if not len(timeline):
+            return {metric: np.empty(0) for metric in metrics}
+
+        self.update({key: timeline})
+        return self.series[key][1]
+
+    def getLatest(self, key, timeline):
+        """Returns the most recent known value of every metric of a timeline, along with its date
+
+        Parameters
+        ----------
+        key : str
+            the country code of the timeline, or 'global'
+
+        timeline : ColumnarTimeline
+            the current timeline
+
+        Returns
+        -------
+        dict
+            each metric mapped to a (date, value) tuple, or None if it's never known
+        """
+
+        latest = {}
+
+        for metric, values in self.get(key, timeline).items():
+            known = np.flatnonzero(~np.isnan(values))
+            latest[metric] = (str(timeline.dates[known[-1]]), float(values[known[-1]])) if len(known) else None
+
+        return latest
+
+    def getLatestValues(self, metric):
+        """Returns the most recent known value of a metric for every timeline it has been computed for
+
+        Parameters
+        ----------
+        metric : str
+            the name of the metric (see metrics)
+
+        Returns
+        -------
+        dict
+            the key of every timeline mapped to the metric's latest known value (timelines where it's never known are left out)
+        """
+
+        latest = {}
+
+        for key, (timeline, series) in self.series.items():
+            known = np.flatnonzero(~np.isnan(series[metric]))
+            if len(known):
+                latest[key] = float(series[metric][known[-1]])
+
+        return latest
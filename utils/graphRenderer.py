@@ -0,0 +1,310 @@
+import io
+import threading
+import time
+import matplotlib
+matplotlib.use('Agg') # headless, so no GUI toolkit is ever loaded
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+'''
+Draws the graphs of the bot. Runs in the render workers (see utils.renderPool), so everything here only takes
+plain values and arrays that were prepared on the event loop, and never touches the API or the cache.
+Graphs are saved to memory and handed back as PNG bytes, so nothing is written to disk.
+
+Every kind of graph has a template: a Figure (with its own Agg canvas, never pyplot's global state) whose axes,
+labels, and tick formatters are set up once, so a render only swaps in the data and the titles.
+
+Importing this module imports matplotlib, so the bot itself never does: only the render workers import it
+(see utils.renderPool.runRender), and warm it up before the first graph is asked for (see warmUp).
+'''
+
+templates = threading.local() # every thread (or worker process) has its own templates, as a figure can't be drawn by two renders at once
+
+def getTemplate(templateClass, *args):
+    """Returns the template of a kind of graph for the current thread, building it the first time"""
+
+    name = '_'.join([templateClass.__name__] + list(args))
+    template = getattr(templates, name, None)
+
+    if template is None:
+        template = templateClass(*args)
+        setattr(templates, name, template)
+
+    return template
+
+def fitData(ax, points=()):
+    """Rescales the axes to the data that's visible, along with points from scatter plots (which relim doesn't look at)"""
+
+    ax.relim(visible_only=True)
+
+    for xy in points:
+        xy = xy[np.isfinite(xy).all(axis=1)]
+        if len(xy):
+            ax.update_datalim(xy)
+
+    ax.autoscale_view()
+
+class FigureTemplate:
+    """A figure (and its axes) that is built once and redrawn with new data on every render
+
+    Attributes
+    ----------
+    figure : matplotlib.figure.Figure
+        the figure, drawn on its own Agg canvas
+
+    ax : matplotlib.axes.Axes
+        the axes of the figure
+
+    Methods
+    -------
+    toPNG(**kwargs)
+        Returns the figure as PNG bytes
+    """
+
+    def __init__(self):
+        self.figure = Figure()
+        FigureCanvasAgg(self.figure) # attaches itself to the figure
+        self.ax = self.figure.add_subplot(1, 1, 1)
+
+    def toPNG(self, **kwargs):
+        """Returns the figure as PNG bytes"""
+
+        buffer = io.BytesIO()
+        self.figure.savefig(buffer, format='png', **kwargs)
+        return buffer.getvalue()
+
+class DateBarTemplate(FigureTemplate):
+    """A bar for each of the statistics of a single date"""
+
+    labels = ['deaths', 'confirmed', 'recovered', '(new) confirmed', '(new) recovered', '(new) deaths', 'active']
+
+    def __init__(self):
+        super().__init__()
+        self.bars = self.ax.bar(self.labels, [0] * len(self.labels))
+        self.ax.tick_params(axis='x', which='major', labelsize=7, labelrotation=15) # small and rotated to avoid overlapping
+        self.ax.ticklabel_format(style='plain', axis='y')
+        self.ax.set_xlabel('Statistics')
+        self.ax.set_ylabel('Cases')
+
+    def render(self, title, stats):
+        for bar, stat in zip(self.bars, stats):
+            bar.set_height(stat)
+
+        self.ax.set_title(title)
+        fitData(self.ax)
+        return self.toPNG(bbox_inches='tight')
+
+class DatePieTemplate(FigureTemplate):
+    """A pie chart of the statistics of a single date, with the values in the legend"""
+
+    labels = DateBarTemplate.labels
+    startAngle = 90
+
+    def __init__(self):
+        super().__init__()
+        self.wedges, _ = self.ax.pie([1] * len(self.labels), startangle=self.startAngle)
+        self.legend = self.ax.legend(self.wedges, self.labels, bbox_to_anchor=(-0.5,0.5), title=' ', loc='center left')
+        self.ax.axis('equal') # equal aspect ratio ensures that pie is drawn as a circle.
+
+    def render(self, title, stats):
+        stats = np.asarray(stats, dtype=float)
+        if (stats < 0).any():
+            raise ValueError("Wedge sizes 'x' must be non negative values")
+
+        # the same angles pyplot's pie would give the wedges (only normalized if they add up to more than a whole pie)
+        total = stats.sum()
+        fractions = stats / total if total > 1 else stats
+        ends = self.startAngle + 360 * np.cumsum(fractions)
+        starts = ends - 360 * fractions
+
+        for wedge, start, end in zip(self.wedges, starts, ends):
+            wedge.set_theta1(start)
+            wedge.set_theta2(end)
+
+        for text, label, stat in zip(self.legend.get_texts(), self.labels, stats):
+            text.set_text(f'{label} - {stat:.0f}')
+
+        self.legend.get_title().set_text(title)
+        self.ax.set_title(title)
+        return self.toPNG(bbox_inches='tight')
+
+class TimelineTemplate(FigureTemplate):
+    """A statistic over time, as a line, bar, or scatter graph"""
+
+    barWidth = 0.8 # in days
+
+    def __init__(self, graphType):
+        super().__init__()
+        self.graphType = graphType
+        self.artist = None
+
+        if graphType == 'line':
+            self.artist, = self.ax.plot([], [])
+        elif graphType == 'scatter':
+            self.artist = self.ax.scatter([], [])
+
+        self.ax.xaxis_date()
+        self.ax.ticklabel_format(style='plain', axis='y') # to avoid weird values like 1e7
+        self.ax.set_xlabel('Dates')
+
+    def render(self, title, yLabel, dates, values):
+        x = mdates.date2num(dates)
+        points = ()
+
+        if self.graphType == 'line':
+            self.artist.set_data(x, values)
+        elif self.graphType == 'scatter':
+            points = (np.column_stack([x, values]),)
+            self.artist.set_offsets(points[0])
+        elif self.artist is not None and len(self.artist) == len(x):
+            # same number of days, so the bars are moved and resized instead of being made again
+            for bar, day, value in zip(self.artist, x - self.barWidth / 2, values):
+                bar.set_x(day)
+                bar.set_height(value)
+        else:
+            if self.artist is not None:
+                self.artist.remove()
+            self.artist = self.ax.bar(x, values, width=self.barWidth, color='C0')
+
+        self.ax.set_title(title)
+        self.ax.set_ylabel(yLabel)
+        fitData(self.ax, points)
+        self.figure.autofmt_xdate() # rotates the (new) date labels to avoid any messy overlapping
+
+        return self.toPNG()
+
+class ComparisonTemplate(FigureTemplate):
+    """The same statistic over time for several countries, as lines or scatter plots"""
+
+    def __init__(self, graphType):
+        super().__init__()
+        self.graphType = graphType
+        self.artists = [] # one per country, kept (and hidden when unused) for the next render
+
+        self.ax.xaxis_date()
+        self.ax.ticklabel_format(style='plain', axis='y') # to avoid weird values like 1e7
+        self.ax.set_xlabel('Dates')
+        self.ax.set_ylabel('Cases')
+
+    def render(self, title, series):
+        while len(self.artists) < len(series):
+            color = f'C{len(self.artists) % 10}'
+            if self.graphType == 'line':
+                self.artists.append(self.ax.plot([], [], color=color)[0])
+            else:
+                self.artists.append(self.ax.scatter([], [], s=6, color=color))
+
+        points = []
+
+        for index, artist in enumerate(self.artists):
+            artist.set_visible(index < len(series))
+            if index >= len(series):
+                continue
+
+            name, dates, values = series[index]
+            x = mdates.date2num(dates)
+            artist.set_label(name)
+
+            if self.graphType == 'line':
+                artist.set_data(x, values)
+            else:
+                points.append(np.column_stack([x, values]))
+                artist.set_offsets(points[-1])
+
+        self.ax.set_title(title)
+        self.ax.legend(self.artists[:len(series)], [name for name, dates, values in series])
+        fitData(self.ax, points)
+        self.figure.autofmt_xdate() # rotates the (new) date labels to avoid any messy overlapping
+
+        return self.toPNG(bbox_inches='tight')
+
+def renderDateGraph(title, stats, graphType):
+    """Draws the statistics of a single date as a bar graph or pie chart
+
+    Parameters
+    ----------
+    title : str
+        the title of the graph
+
+    stats : list
+        deaths, confirmed, recovered, new confirmed, new recovered, new deaths, and active cases (in that order)
+
+    graphType : str
+        'bar' or 'pie' (checked by the caller)
+
+    Returns
+    -------
+    bytes
+        the graph as a PNG image
+    """
+
+    return getTemplate(DateBarTemplate if graphType == 'bar' else DatePieTemplate).render(title, stats)
+
+def renderTimelineGraph(title, yLabel, dates, values, graphType):
+    """Draws a statistic over time as a line, bar, or scatter graph
+
+    Parameters
+    ----------
+    title : str
+        the title of the graph
+
+    yLabel : str
+        the label of the y-axis
+
+    dates : numpy.ndarray
+        the dates (datetime64)
+
+    values : numpy.ndarray
+        the value on every date (NaN where it isn't known)
+
+    graphType : str
+        'line', 'bar', or 'scatter' (checked by the caller)
+
+    Returns
+    -------
+    bytes
+        the graph as a PNG image
+    """
+
+    return getTemplate(TimelineTemplate, graphType).render(title, yLabel, dates, values)
+
+def renderComparisonGraph(title, series, graphType):
+    """Draws the same statistic over time for several countries on one graph
+
+    Parameters
+    ----------
+    title : str
+        the title of the graph
+
+    series : list
+        a (name, dates, values) tuple for every country, with the days that aren't known already left out
+
+    graphType : str
+        'line' or 'scatter' (checked by the caller)
+
+    Returns
+    -------
+    bytes
+        the graph as a PNG image
+    """
+
+    return getTemplate(ComparisonTemplate, graphType).render(title, series)
+
+def warmUp():
+    """Builds and draws every template once, so the font cache and glyphs are loaded before the first graph is asked for
+
+    Returns
+    -------
+    float
+        how long warming up took (in seconds)
+    """
+
+    start = time.perf_counter()
+
+    for templateClass, args in [(DateBarTemplate, ()), (DatePieTemplate, ()), (TimelineTemplate, ('line',)), (TimelineTemplate, ('bar',)),
+                                (TimelineTemplate, ('scatter',)), (ComparisonTemplate, ('line',)), (ComparisonTemplate, ('scatter',))]:
+        getTemplate(templateClass, *args).figure.canvas.draw()
+
+    return time.perf_counter() - start
@@ -0,0 +1,85 @@
+import json
+import os
+
+'''
+Decodes and encodes json with the fastest library that is installed (orjson, then ujson),
+falling back to the standard library's json module when neither is.
+
+The backend can be forced with the JSON_CODEC environment variable (orjson, ujson, or json).
+'''
+
+class JSONCodec:
+    """Decodes and encodes json with one backend library
+
+    Attributes
+    ----------
+    name : str
+        the name of the backend library (orjson, ujson, or json)
+
+    Methods
+    -------
+    loads(data)
+        Decodes json (str or bytes) into python objects
+
+    dumps(value)
+        Encodes python objects into a compact json string
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+        if name == 'orjson':
+            import orjson
+            self.loads = orjson.loads
+            self.dumps = lambda value: orjson.dumps(value).decode() # orjson encodes to bytes
+        elif name == 'ujson':
+            import ujson
+            self.loads = ujson.loads
+            self.dumps = lambda value: ujson.dumps(value, ensure_ascii=False)
+        elif name == 'json':
+            self.loads = json.loads
+            self.dumps = lambda value: json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        else:
+            raise ValueError(f'Invalid json codec: {name} (can only use orjson, ujson, or json)')
+
+def getAvailableCodecs():
+    """Returns the names of every json backend that can be imported, fastest first
+
+    Returns
+    -------
+    list
+        the names of the installed backends (json is always included)
+    """
+
+    available = []
+
+    for name in ('orjson', 'ujson'):
+        try:
+            __import__(name)
+        except ImportError:
+            continue
+        else:
+            available.append(name)
+
+    available.append('json')
+    return available
+
+def getCodec(name=''):
+    """Returns a codec for the given backend, or for the fastest one installed if no name is given
+
+    Parameters
+    ----------
+    name : str
+        the name of the backend (orjson, ujson, or json), empty by default
+
+    Returns
+    -------
+    JSONCodec
+        the codec
+    """
+
+    return JSONCodec(name or getAvailableCodecs()[0])
+
+codec = getCodec(os.getenv('JSON_CODEC', '')) # the codec used throughout the bot
+loads = codec.loads
+dumps = codec.dumps
@@ -0,0 +1,240 @@
+import codecs
+import json
+from utils import jsonCodec
+
+decoder = json.JSONDecoder()
+whitespace = ' \t\n\r'
+numberCharacters = '0123456789+-.eE'
+
+class JSONStreamReader:
+    """Reads a json document from an asynchronous byte stream a piece at a time
+
+    Only the part of the document that is currently being decoded is
+    kept in memory, so large documents can be walked through without
+    ever holding the whole thing (or its full object tree) at once.
+
+    Attributes
+    ----------
+    stream : aiohttp.StreamReader
+        the stream the document is read from (anything with an async read(n) method works)
+
+    chunkSize : int
+        the number of bytes read from the stream at a time
+
+    bytesRead : int
+        the number of bytes read from the stream so far
+
+    Methods
+    -------
+    skipWhitespace()
+        Moves past any whitespace, reading more of the stream if needed
+
+    expect(character)
+        Moves past the next character, raising a ValueError if it isn't the one expected
+
+    decodeValue()
+        Decodes the next complete json value
+
+    decodeItems()
+        Decodes every complete item of an array that is in the buffer at once, with the selected json codec
+    """
+
+    maxGuesses = 8 # how many '}' decodeItems tries as the end of the last complete item before giving up on the buffer
+
+    def __init__(self, stream, chunkSize=64 * 1024):
+        self.stream = stream
+        self.chunkSize = chunkSize
+        self.bytesRead = 0
+        self.buffer = ''
+        self.position = 0
+        self.finished = False
+        self.utf8 = codecs.getincrementaldecoder('utf-8')() # handles characters that are split between two chunks
+
+    async def readMore(self):
+        """Adds the next chunk of the stream to the buffer (dropping the part that has already been decoded)"""
+
+        chunk = await self.stream.read(self.chunkSize)
+        self.bytesRead += len(chunk)
+
+        if not chunk:
+            self.finished = True
+
+        self.buffer = self.buffer[self.position:] + self.utf8.decode(chunk, final=not chunk)
+        self.position = 0
+
+    async def skipWhitespace(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in whitespace:
+                self.position += 1
+
+            if self.position < len(self.buffer) or self.finished:
+                return
+
+            await self.readMore()
+
+    async def peek(self):
+        await self.skipWhitespace()
+
+        if self.position >= len(self.buffer):
+            raise ValueError('Unexpected end of json document')
+
+        return self.buffer[self.position]
+
+    async def expect(self, character):
+        if await self.peek() != character:
+            raise ValueError(f'Expected {character!r} at byte {self.bytesRead - len(self.buffer) + self.position} of json document')
+
+        self.position += 1
+
+    async def decodeValue(self):
+        """Decodes the next complete json value, reading more of the stream until it is complete"""
+
+        await self.skipWhitespace()
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # the value is cut off at the end of the buffer, unless the stream has nothing left
+                if self.finished:
+                    raise
+
+                await self.readMore()
+            else:
+                # a number that runs up to the end of the buffer (or stops at a '.', 'e', etc.) might continue in the next chunk
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and not self.finished:
+                    if end == len(self.buffer) or self.buffer[end] in numberCharacters:
+                        await self.readMore()
+                        continue
+
+                self.position = end
+                return value
+
+    def decodeBuffered(self):
+        """Decodes the items of an array from the current position up to the last complete one in the buffer (or returns None if there isn't one)
+
+        The last complete item ends at one of the last '}' in the buffer. Only a cut made between two items (not in
+        a string or inside an item) is valid json once wrapped in brackets, so each one is tried until one decodes.
+        """
+
+        end = len(self.buffer)
+
+        for _ in range(self.maxGuesses):
+            end = self.buffer.rfind('}', self.position, end)
+            if end < 0:
+                return None
+
+            try:
+                items = jsonCodec.loads('[' + self.buffer[self.position:end + 1] + ']')
+            except ValueError:
+                continue # the '}' closes an object inside an item (or the object the array is in), so an earlier one is tried
+
+            self.position = end + 1
+            return items
+
+        return None
+
+    async def decodeItems(self):
+        """Decodes every complete item of an array that is in the buffer at once, with the selected json codec
+
+        The reader has to be at the start of an item, and is left right after the last one decoded. Items that
+        aren't objects, and objects that are much bigger than a chunk, are decoded one at a time with decodeValue.
+
+        Returns
+        -------
+        list
+            the decoded items (at least one)
+        """
+
+        if await self.peek() == '{':
+            items = self.decodeBuffered()
+
+            # the buffer ends in the middle of the first item, so it's tried again with the next chunk
+            if items is None and not self.finished and len(self.buffer) - self.position < self.chunkSize:
+                await self.readMore()
+                items = self.decodeBuffered()
+
+            if items:
+                return items
+
+        return [await self.decodeValue()]
+
+async def decodeProjected(stream, arrayKey, fields, chunkSize=64 * 1024):
+    """Decodes a json object from a stream, keeping only some fields of each item in one of its arrays
+
+    The items of the array are decoded a chunk at a time with the selected
+    json codec (see utils.jsonCodec) and immediately cut down to the given
+    fields, so the full array is never held in memory. Every other key of
+    the object is decoded with the standard library's json module, as only
+    small values are expected there.
+
+    Parameters
+    ----------
+    stream : aiohttp.StreamReader
+        the stream the json object is read from
+
+    arrayKey : str
+        the key of the array whose items are cut down (ex. 'data')
+
+    fields : tuple
+        the fields that are kept from each item (missing fields are set to None)
+
+    chunkSize : int
+        the number of bytes read from the stream at a time
+
+    Returns
+    -------
+    tuple
+        the decoded object and the number of bytes read from the stream
+
+    Raises
+    ------
+    ValueError
+        if the stream doesn't contain a valid json object
+    """
+
+    reader = JSONStreamReader(stream, chunkSize)
+    result = {}
+
+    await reader.expect('{')
+
+    if await reader.peek() == '}':
+        reader.position += 1
+        return result, reader.bytesRead
+
+    while True:
+        key = await reader.decodeValue()
+        await reader.expect(':')
+
+        if key == arrayKey and await reader.peek() == '[':
+            reader.position += 1
+            items = []
+
+            if await reader.peek() == ']':
+                reader.position += 1
+            else:
+                while True:
+                    for item in await reader.decodeItems():
+                        items.append({field: item.get(field) for field in fields} if isinstance(item, dict) else item)
+
+                    if await reader.peek() == ',':
+                        reader.position += 1
+                    else:
+                        await reader.expect(']')
+                        break
+
+            result[key] = items
+        else:
+            result[key] = await reader.decodeValue()
+
+        if await reader.peek() == ',':
+            reader.position += 1
+        else:
+            await reader.expect('}')
+            break
+
+    # reads whatever is left so the connection can be reused
+    while not reader.finished:
+        await reader.readMore()
+
+    return result, reader.bytesRead
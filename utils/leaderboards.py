@@ -0,0 +1,131 @@
+import os
+import numpy as np
+
+'''
+Ranks every country by a few statistics once, when the data is refreshed, so a leaderboard is a slice of an
+already sorted list and a country's place in it is a dictionary lookup.
+'''
+
+depth = int(os.getenv('COVID_LEADERBOARD_DEPTH', 25)) # how many countries are kept at the top of each leaderboard
+
+# the statistics countries can be ranked by, with how to describe them
+statistics = {
+    'cases_per_million': 'Cases (Per Million)',
+    'death_rate': 'Death Rate (%)',
+    'new_cases': 'New Confirmed Cases (Today)',
+    'growth_rate': 'Daily Growth Rate (%, Over 7 Days)'
+}
+
+def topIndexes(values, k):
+    """Returns the indexes of the k largest values, largest first (only those k are sorted)"""
+
+    if k < len(values):
+        indexes = np.argpartition(-values, k - 1)[:k] # everything past the k-th largest is left unsorted
+    else:
+        indexes = np.arange(len(values))
+
+    return indexes[np.argsort(-values[indexes], kind='stable')]
+
+class Leaderboards:
+    """The top countries and the percentile of every country for each statistic, computed once per refresh
+
+    Attributes
+    ----------
+    top : dict
+        each statistic mapped to a list of (country code, value) tuples, largest first (at most depth long)
+
+    percentiles : dict
+        the country code of every ranked country mapped to its rank and percentile for each statistic
+
+    counts : dict
+        each statistic mapped to the number of countries ranked by it (the ones it is known for)
+
+    Methods
+    -------
+    getTop(statistic, k)
+        Returns the k countries with the largest values of a statistic
+
+    getPercentiles(code)
+        Returns a country's rank and percentile for every statistic it is known for
+    """
+
+    def __init__(self, codes, values):
+        """
+        Parameters
+        ----------
+        codes : list
+            the code of every country
+
+        values : dict
+            each statistic mapped to an array of its value for every country (lined up with codes, NaN if it isn't known)
+        """
+
+        codes = np.asarray(codes)
+        self.top = {}
+        self.percentiles = {code: {} for code in codes}
+        self.counts = {}
+
+        for statistic, column in values.items():
+            column = np.asarray(column, dtype=float)
+            known = ~np.isnan(column)
+            rankedCodes, column = codes[known], column[known]
+            self.counts[statistic] = len(column)
+
+            if not len(column):
+                self.top[statistic] = []
+                continue
+
+            # only the top of the leaderboard is ever listed, so that's all that gets sorted
+            self.top[statistic] = [(str(rankedCodes[i]), float(column[i])) for i in topIndexes(column, depth)]
+
+            # countries with the same value share a rank, and the percentile is the share of countries ranked below
+            ordered = np.sort(column)
+            below = np.searchsorted(ordered, column, side='left')
+            ranks = len(column) - np.searchsorted(ordered, column, side='right') + 1
+            percentiles = 100 * below / max(len(column) - 1, 1)
+
+            for code, rank, percentile in zip(rankedCodes.tolist(), ranks.tolist(), percentiles.tolist()):
+                self.percentiles[code][statistic] = (rank, percentile)
+
+    def getTop(self, statistic, k):
+        """Returns the k countries with the largest values of a statistic
+
+        Parameters
+        ----------
+        statistic : str
+            the statistic to rank by (see statistics)
+
+        k : int
+            how many countries to return (at most depth)
+
+        Returns
+        -------
+        list
+            (country code, value) tuples, largest first
+
+        Raises
+        ------
+        ValueError
+            if the statistic isn't one countries are ranked by
+        """
+
+        if statistic not in self.top:
+            raise ValueError('Invalid statistic.')
+
+        return self.top[statistic][:max(k, 0)]
+
+    def getPercentiles(self, code):
+        """Returns a country's rank and percentile for every statistic it is known for
+
+        Parameters
+        ----------
+        code : str
+            the two letter code of the country, in any case (ex. CA, us)
+
+        Returns
+        -------
+        dict
+            each statistic mapped to a (rank, percentile) tuple (empty if the country isn't ranked)
+        """
+
+        return self.percentiles.get(code.upper(), {})
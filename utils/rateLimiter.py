@@ -0,0 +1,198 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+class RateLimitError(Exception):
+    """Raised when a request can't be made without going over the rate limit or the daily quota"""
+
+class RateLimiter:
+    """A token bucket that paces requests to an API with a daily quota
+
+    Tokens refill at a steady rate (by default the daily quota spread
+    evenly over the day) up to a small burst. Interactive requests wait
+    a short while for a token, background requests (prefetches, syncs)
+    queue behind them and are shed outright once the remaining quota
+    drops into the reserve kept for interactive use. Rate limit headers
+    sent back by the API (and 429 responses) correct the local count.
+
+    Attributes
+    ----------
+    dailyQuota : int
+        the number of requests allowed per day
+
+    rate : float
+        the number of tokens added to the bucket every second
+
+    burst : int
+        the maximum number of tokens the bucket can hold
+
+    reserve : int
+        the number of requests kept for interactive use at the end of the quota
+
+    maxWait : float
+        how long (in seconds) an interactive request waits for a token before giving up
+
+    maxBackgroundWait : float
+        how long (in seconds) a background request waits for a token before giving up
+
+    stats : dict
+        the number of requests allowed, delayed, shed, and rate limited upstream
+
+    Methods
+    -------
+    acquire(priority='interactive')
+        Waits for a token, raising RateLimitError if there isn't one in time (or the quota is used up)
+
+    update(status, headers)
+        Updates the remaining quota with the status and rate limit headers of a response
+
+    getRemaining()
+        Returns the number of requests left in the daily quota
+
+    getStats()
+        Returns the counters along with the quota used and left
+    """
+
+    def __init__(self, dailyQuota, burst=10, reserveFraction=0.2, maxWait=5, maxBackgroundWait=60, rate=None):
+        self.dailyQuota = dailyQuota
+        self.rate = rate or dailyQuota / 86400
+        self.burst = burst
+        self.reserve = int(dailyQuota * reserveFraction)
+        self.maxWait = maxWait
+        self.maxBackgroundWait = maxBackgroundWait
+
+        self.tokens = burst
+        self.refilledAt = time.monotonic()
+        self.used = 0
+        self.upstreamRemaining = None # the remaining quota according to the API (if it sends rate limit headers)
+        self.resetAt = self.getNextReset()
+        self.blockedUntil = 0 # set when the API answers with a 429
+        self.waitingInteractive = 0
+        self.stats = {'allowed': 0, 'delayed': 0, 'shed': 0, 'upstreamLimited': 0}
+
+    def getNextReset(self):
+        """Returns the time (in seconds since the epoch) of the next midnight (UTC), when the daily quota resets"""
+
+        tomorrow = datetime.now(timezone.utc).date() + timedelta(days=1)
+        return datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=timezone.utc).timestamp()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilledAt) * self.rate)
+        self.refilledAt = now
+
+        # starts the count over once the quota resets
+        if time.time() >= self.resetAt:
+            self.used = 0
+            self.upstreamRemaining = None
+            self.resetAt = self.getNextReset()
+
+    def getRemaining(self):
+        """Returns the number of requests left in the daily quota"""
+
+        remaining = self.dailyQuota - self.used
+        if self.upstreamRemaining is not None:
+            remaining = min(remaining, self.upstreamRemaining)
+
+        return max(remaining, 0)
+
+    async def acquire(self, priority='interactive'):
+        """Waits for a token, raising RateLimitError if there isn't one in time (or the quota is used up)
+
+        Parameters
+        ----------
+        priority : str
+            'interactive' (default) for requests made by users, anything else (ex. 'background') for prefetches and syncs
+
+        Returns
+        -------
+        ...
+
+        Raises
+        ------
+        RateLimitError
+            if the quota is used up, the API has asked us to back off, or no token became available in time
+        """
+
+        interactive = priority == 'interactive'
+        deadline = time.monotonic() + (self.maxWait if interactive else self.maxBackgroundWait)
+        delayed = False
+
+        if interactive:
+            self.waitingInteractive += 1
+
+        try:
+            while True:
+                self.refill()
+                remaining = self.getRemaining()
+
+                if remaining <= 0:
+                    self.stats['shed'] += 1
+                    raise RateLimitError('The daily request quota for this API has been used up, please try again tomorrow!')
+
+                if time.time() < self.blockedUntil:
+                    self.stats['shed'] += 1
+                    raise RateLimitError('This API is rate limiting us right now, please try again in a few minutes!')
+
+                # background requests are dropped once only the reserve for interactive requests is left
+                if not interactive and remaining <= self.reserve:
+                    self.stats['shed'] += 1
+                    raise RateLimitError('The request quota is nearly used up, so background requests are paused.')
+
+                # background requests also let any interactive request that is waiting go first
+                if self.tokens >= 1 and (interactive or self.waitingInteractive == 0):
+                    self.tokens -= 1
+                    self.used += 1
+                    self.stats['allowed'] += 1
+                    self.stats['delayed'] += delayed
+                    return
+
+                wait = max((1 - self.tokens) / self.rate, 0.05)
+                if time.monotonic() + wait > deadline:
+                    self.stats['shed'] += 1
+                    raise RateLimitError('Too many requests are being made right now, please try again in a few minutes!')
+
+                delayed = True
+                await asyncio.sleep(wait)
+        finally:
+            if interactive:
+                self.waitingInteractive -= 1
+
+    def update(self, status, headers):
+        """Updates the remaining quota with the status and rate limit headers of a response
+
+        Parameters
+        ----------
+        status : int
+            the HTTP status code of the response
+
+        headers : dict
+            the HTTP headers of the response (X-RateLimit-Remaining, X-RateLimit-Reset and Retry-After are read if present)
+
+        Returns
+        -------
+        ...
+
+        Raises
+        ------
+        ...
+        """
+
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is not None and remaining.isdigit():
+            self.upstreamRemaining = int(remaining)
+
+        reset = headers.get('X-RateLimit-Reset')
+        if reset is not None and reset.isdigit() and int(reset) > time.time():
+            self.resetAt = int(reset)
+
+        if status == 429:
+            self.stats['upstreamLimited'] += 1
+            retryAfter = headers.get('Retry-After')
+            self.blockedUntil = time.time() + (int(retryAfter) if retryAfter and retryAfter.isdigit() else 60)
+
+    def getStats(self):
+        """Returns the counters along with the quota used and left"""
+
+        self.refill()
+        return {**self.stats, 'used': self.used, 'remaining': self.getRemaining(), 'tokens': round(self.tokens, 2)}
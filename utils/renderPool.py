@@ -0,0 +1,221 @@
+import asyncio
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+class RenderTimeoutError(Exception):
+    """Raised when a graph takes longer than the render timeout to draw"""
+
+class RenderFailedError(Exception):
+    """Raised when the worker drawing a graph dies (ex. it ran out of memory)"""
+
+def runRender(renderer, *args):
+    """Calls a render function of utils.graphRenderer by name (importing matplotlib the first time, in the worker)"""
+
+    from utils import graphRenderer
+    return getattr(graphRenderer, renderer)(*args)
+
+def warmUp():
+    """Imports matplotlib and builds every figure template, so a worker is ready before its first graph"""
+
+    from utils import graphRenderer
+    return graphRenderer.warmUp()
+
+class RenderPool:
+    """A pool of worker processes that draw graphs, so matplotlib never blocks the event loop
+
+    The data of a graph is prepared on the event loop and only plain values and arrays are sent to a
+    worker. Only the workers import matplotlib, and they warm it up as soon as they start (see start),
+    so neither the bot's startup nor its first graph waits on it. Every worker is replaced after
+    recycleAfter renders (matplotlib slowly leaks memory across figures), and the whole pool is replaced
+    (its workers killed) when a render times out or a worker dies, so a stuck render never holds on to a
+    worker, or to the memory of one, that later renders would queue behind. A process pool can't lose
+    one worker without breaking, so the other renders that were on a pool killed this way are retried
+    once on the new one.
+
+    Attributes
+    ----------
+    workers : int
+        the number of worker processes (0 renders on the event loop itself, like before the pool existed)
+
+    timeout : float
+        how long (in seconds) a render can take, including the time spent waiting for a worker
+
+    recycleAfter : int
+        the number of renders after which the workers are replaced
+
+    executor : ProcessPoolExecutor
+        the current pool (started on the first render)
+
+    terminated : weakref.WeakSet
+        the pools whose workers were killed by recycle (so the renders they broke can tell they weren't to blame)
+
+    stats : dict
+        the number of renders, timeouts, failures, retries, and times the pool was recycled, the number of renders
+        waiting for or running in a worker right now (queueDepth) and the most there have been at once,
+        and the total time renders took from being queued to being done
+
+    Methods
+    -------
+    start()
+        Starts the workers and warms them up in the background
+
+    render(renderer, *args)
+        Runs a render function in a worker and returns its result
+
+    recycle(executor=None, terminate=False)
+        Replaces the workers (renders already running are left to finish, unless they're terminated)
+
+    shutdown()
+        Stops the workers
+
+    getStats()
+        Returns the counters, along with the average render time
+    """
+
+    def __init__(self, workers=2, timeout=20, recycleAfter=200):
+        self.workers = workers
+        self.timeout = timeout
+        self.recycleAfter = recycleAfter
+        self.executor = None
+        self.terminated = weakref.WeakSet()
+        self.rendered = 0 # renders since the workers were last replaced
+        self.stats = {'renders': 0, 'timeouts': 0, 'failures': 0, 'retries': 0, 'recycles': 0, 'queueDepth': 0, 'maxQueueDepth': 0, 'renderTime': 0.0}
+
+    def getExecutor(self):
+        """Returns the pool, starting it first if it isn't running"""
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warmUp) # every new worker warms up first
+
+        return self.executor
+
+    def start(self):
+        """Starts the workers and warms them up in the background (called once the bot is ready, off its critical path)
+
+        Returns
+        -------
+        asyncio.Future
+            resolves to how long warming up took (in seconds)
+        """
+
+        if self.workers <= 0:
+            return asyncio.get_event_loop().run_in_executor(None, warmUp) # renders happen on the event loop, so matplotlib is loaded in a thread
+
+        return asyncio.wrap_future(self.getExecutor().submit(warmUp)) # the pool starts all of its workers on the first task
+
+    def recycle(self, executor=None, terminate=False):
+        """Replaces the workers (renders already running are left to finish, the next one starts a new pool)
+
+        Parameters
+        ----------
+        executor : ProcessPoolExecutor
+            the pool to replace (the current one by default), nothing is done if it was already replaced
+
+        terminate : bool
+            whether the workers of the old pool are killed instead of being left to finish (for a stuck or broken pool)
+        """
+
+        if executor is None:
+            executor = self.executor
+        elif executor is not self.executor:
+            return # another render that failed on the same pool already replaced it
+
+        if executor is not None:
+            processes = list((getattr(executor, '_processes', None) or {}).values()) # taken before shutting down, which forgets them
+            executor.shutdown(wait=False) # shutdown(cancel_futures=True) would need python 3.9
+
+            # a stuck worker would never finish otherwise, and shutting down only waits for it
+            if terminate:
+                self.terminated.add(executor)
+                for process in processes:
+                    if process.is_alive():
+                        process.terminate()
+
+            self.executor = None
+            self.stats['recycles'] += 1
+            self.getExecutor().submit(warmUp) # the new workers start warming up now rather than on the next render
+
+        self.rendered = 0
+
+    def shutdown(self):
+        """Stops the workers (called when the bot shuts down)"""
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    async def render(self, renderer, *args):
+        """Runs a render function in a worker and returns its result
+
+        Parameters
+        ----------
+        renderer : str
+            the name of a render function in utils.graphRenderer (ex. renderTimelineGraph)
+
+        *args
+            plain values and arrays to call it with
+
+        Returns
+        -------
+        ...
+            whatever the render function returns
+
+        Raises
+        ------
+        RenderTimeoutError
+            if the render (including its time in the queue) takes longer than timeout seconds
+
+        RenderFailedError
+            if the worker drawing it died
+        """
+
+        self.stats['queueDepth'] += 1
+        self.stats['maxQueueDepth'] = max(self.stats['maxQueueDepth'], self.stats['queueDepth'])
+        start = time.perf_counter()
+
+        try:
+            if self.workers <= 0:
+                return runRender(renderer, *args)
+
+            retried = False
+            while True:
+                executor = self.getExecutor()
+                try:
+                    future = asyncio.get_event_loop().run_in_executor(executor, runRender, renderer, *args)
+                    return await asyncio.wait_for(future, self.timeout) # cancelling a render that hasn't started takes it off the queue
+                except asyncio.TimeoutError:
+                    self.stats['timeouts'] += 1
+                    self.recycle(executor, terminate=True) # the worker may be stuck, so it's killed and later renders get fresh ones
+                    raise RenderTimeoutError('The graph took too long to render, please try again later.')
+                except BrokenProcessPool:
+                    # the pool was killed because another render on it timed out, so this one is drawn again by the new workers
+                    if executor in self.terminated and not retried:
+                        retried = True
+                        self.stats['retries'] += 1
+                        continue
+
+                    self.stats['failures'] += 1
+                    self.recycle(executor, terminate=True) # a worker died (ex. ran out of memory), which breaks the whole pool
+                    raise RenderFailedError('Something went wrong while drawing the graph, please try again later.')
+        finally:
+            self.stats['queueDepth'] -= 1
+            self.stats['renders'] += 1
+            self.stats['renderTime'] += time.perf_counter() - start
+
+            self.rendered += 1
+            if self.rendered >= self.recycleAfter:
+                self.recycle()
+
+    def getStats(self):
+        """Returns the counters, along with the average render time (in seconds)
+
+        Returns
+        -------
+        dict
+            the counters and 'averageRenderTime'
+        """
+
+        renders = self.stats['renders']
+        return {**self.stats, 'workers': self.workers, 'averageRenderTime': self.stats['renderTime'] / renders if renders else 0.0}
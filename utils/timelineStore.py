@@ -0,0 +1,260 @@
+import hashlib
+import os
+import time
+import numpy as np
+from utils import jsonCodec
+from utils.columnarTimeline import ColumnarTimeline, fields
+
+'''
+Keeps every timeline on disk as a numpy file (one per country) that is memory-mapped when it's loaded,
+so a restarted bot has every timeline right away, and can keep answering while the API is down.
+'''
+
+# one record per day, so a whole timeline is a single file that can be mapped straight into a ColumnarTimeline
+recordType = np.dtype([('date', 'datetime64[D]')] + [(field, np.int64) for field in fields])
+
+class TimelineStore:
+    """A directory of memory-mapped timelines (one .npy file per country) and the list of countries they belong to
+
+    Attributes
+    ----------
+    path : str
+        the directory the timelines are stored in (the store is disabled if it is empty)
+
+    manifest : dict
+        the key of every stored timeline mapped to when it was saved, its size, and a digest of its contents
+
+    stats : dict
+        the number of timelines saved, skipped because they didn't change, and loaded, and how long loading them took
+
+    Methods
+    -------
+    save(key, timeline)
+        Saves a timeline to disk, unless the stored one is identical
+
+    flush()
+        Writes the manifest to disk (called after a batch of saves)
+
+    load(key)
+        Returns a stored timeline, memory-mapped from disk (or None)
+
+    loadAll()
+        Maps every stored timeline and returns them by key
+
+    saveCountries(countries)
+        Saves a /countries response, so countries can be listed and looked up offline
+
+    loadCountries()
+        Returns the stored /countries response (or None)
+
+    has(key)
+        Returns True if a timeline is stored under the key
+
+    getAge(key)
+        Returns how long ago a timeline was saved, in seconds
+
+    getStats()
+        Returns the number of timelines stored, their size on disk, and the counters
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest = None
+        self.countries = None
+        self.stats = {'saves': 0, 'unchanged': 0, 'loads': 0, 'loadTime': 0.0}
+
+    def isEnabled(self):
+        return bool(self.path)
+
+    def getFile(self, name):
+        return os.path.join(self.path, name)
+
+    def write(self, name, writeFunction):
+        """Writes a file through a temporary one, so a crash never leaves a half written file behind"""
+
+        os.makedirs(self.path, exist_ok=True)
+        temporary = self.getFile(f'{name}.tmp')
+
+        with open(temporary, 'wb') as file:
+            writeFunction(file)
+
+        os.replace(temporary, self.getFile(name))
+
+    def getManifest(self):
+        """Returns the manifest, reading it from disk the first time"""
+
+        if self.manifest is None:
+            try:
+                with open(self.getFile('manifest.json'), 'rb') as file:
+                    self.manifest = jsonCodec.loads(file.read())
+            except (OSError, ValueError):
+                self.manifest = {} # nothing stored yet (or the manifest was damaged, in which case everything is saved again)
+
+        return self.manifest
+
+    def getDigest(self, timeline):
+        """Returns a digest of a timeline's dates and statistics (to tell whether it changed since it was saved)"""
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(timeline.dates).tobytes())
+        for field in fields:
+            digest.update(np.ascontiguousarray(timeline.columns[field]).tobytes())
+
+        return digest.hexdigest()
+
+    def save(self, key, timeline):
+        """Saves a timeline to disk, unless the stored one is identical
+
+        Parameters
+        ----------
+        key : str
+            the country code of the timeline, or 'global'
+
+        timeline : ColumnarTimeline
+            the timeline to save
+
+        Returns
+        -------
+        bool
+            True if the timeline was written, False if it was already stored or the store is disabled
+        """
+
+        if not self.isEnabled():
+            return False
+
+        manifest = self.getManifest()
+        digest = self.getDigest(timeline)
+
+        if key in manifest and manifest[key]['digest'] == digest and os.path.exists(self.getFile(f'{key}.npy')):
+            manifest[key]['savedAt'] = time.time() # still up to date, so it counts as fresh
+            self.stats['unchanged'] += 1
+            return False
+
+        records = np.empty(len(timeline), dtype=recordType)
+        records['date'] = timeline.dates
+        for field in fields:
+            records[field] = timeline.columns[field]
+
+        self.write(f'{key}.npy', lambda file: np.save(file, records))
+        manifest[key] = {'savedAt': time.time(), 'size': os.path.getsize(self.getFile(f'{key}.npy')), 'digest': digest, 'version': timeline.version}
+        self.stats['saves'] += 1
+
+        return True
+
+    def flush(self):
+        """Writes the manifest to disk (called after a batch of saves)"""
+
+        if self.isEnabled() and self.manifest is not None:
+            self.write('manifest.json', lambda file: file.write(jsonCodec.dumps(self.manifest).encode()))
+
+    def load(self, key):
+        """Returns a stored timeline, memory-mapped from disk (or None)
+
+        Parameters
+        ----------
+        key : str
+            the country code of the timeline, or 'global'
+
+        Returns
+        -------
+        ColumnarTimeline/None
+            the timeline, whose columns are read-only views of the mapped file, or None if it isn't stored
+        """
+
+        entry = self.getManifest().get(key) if self.isEnabled() else None
+        if entry is None:
+            return None
+
+        try:
+            records = np.load(self.getFile(f'{key}.npy'), mmap_mode='r') # only the pages that are actually read are loaded
+        except (OSError, ValueError):
+            return None
+
+        self.stats['loads'] += 1
+        return ColumnarTimeline(records['date'], {field: records[field] for field in fields}, entry.get('version', 1))
+
+    def loadAll(self):
+        """Maps every stored timeline and returns them by key (how long it took is kept in stats['loadTime'])
+
+        Returns
+        -------
+        dict
+            the key of every stored timeline mapped to the timeline
+        """
+
+        start = time.perf_counter()
+        timelines = {}
+
+        for key in list(self.getManifest()):
+            timeline = self.load(key)
+            if timeline is not None:
+                timelines[key] = timeline
+
+        self.stats['loadTime'] = time.perf_counter() - start
+        return timelines
+
+    def saveCountries(self, countries):
+        """Saves a /countries response, so countries can be listed and looked up offline
+
+        Parameters
+        ----------
+        countries : dict
+            the /countries response
+
+        Returns
+        -------
+        ...
+
+        Raises
+        ------
+        ValueError
+            if countries isn't a json response (ex. the status code of a failed request)
+        """
+
+        if not isinstance(countries, (dict, list)):
+            raise ValueError(f'Can only store a json response, not {type(countries).__name__}.')
+
+        if self.isEnabled() and countries is not self.countries:
+            self.write('countries.json', lambda file: file.write(jsonCodec.dumps(countries).encode()))
+            self.countries = countries
+
+    def loadCountries(self):
+        """Returns the stored /countries response (or None), always the same object once it's loaded
+
+        Returns
+        -------
+        dict/None
+            the /countries response, or None if it isn't stored
+        """
+
+        if self.countries is None and self.isEnabled():
+            try:
+                with open(self.getFile('countries.json'), 'rb') as file:
+                    self.countries = jsonCodec.loads(file.read())
+            except (OSError, ValueError):
+                return None
+
+        return self.countries
+
+    def has(self, key):
+        """Returns True if a timeline is stored under the key"""
+
+        return self.isEnabled() and key in self.getManifest()
+
+    def getAge(self, key):
+        """Returns how long ago a timeline was saved, in seconds (infinity if it isn't stored)"""
+
+        entry = self.getManifest().get(key) if self.isEnabled() else None
+        return time.time() - entry['savedAt'] if entry is not None else float('inf')
+
+    def getStats(self):
+        """Returns the number of timelines stored, their size on disk, and the counters
+
+        Returns
+        -------
+        dict
+            the number of timelines, their total size in bytes, and the counters
+        """
+
+        manifest = self.getManifest() if self.isEnabled() else {}
+        return {'timelines': len(manifest), 'bytes': sum(entry['size'] for entry in manifest.values()), **self.stats}